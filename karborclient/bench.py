@@ -0,0 +1,421 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+karbor-bench: concurrent load generator for the karbor API.
+
+Runs a mix of list, show and create operations with a pool of worker
+threads sharing one client, for a duration or a number of requests, then
+reports throughput, latency percentiles, errors and connection reuse::
+
+    karbor-bench --workers 16 --duration 60 --mix list=70,show=25,create=5
+    karbor-bench --fake --workers 8 --requests 10000
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import math
+import random
+import sys
+import threading
+import time
+
+from keystoneauth1 import loading
+from oslo_serialization import jsonutils
+from oslo_utils import encodeutils
+import six
+
+from karborclient import client as karbor_client
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import utils
+from karborclient import fake_server
+
+OPERATIONS = ('list', 'show', 'create')
+RESOURCES = ('plans', 'checkpoints')
+PERCENTILES = (50, 95, 99)
+
+
+def parse_mix(mix):
+    """Parse ``list=70,show=25,create=5`` into a dict of weights."""
+    weights = {}
+    for item in mix.split(','):
+        operation, _sep, weight = item.partition('=')
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise exc.CommandError('Unknown operation %s, must be one of: '
+                                   '%s.' % (operation, ', '.join(OPERATIONS)))
+        try:
+            weights[operation] = float(weight or 1)
+        except ValueError:
+            raise exc.CommandError('Invalid weight for %s: %s'
+                                   % (operation, weight))
+    if not any(weights.values()):
+        raise exc.CommandError('The operation mix must not be empty.')
+    return weights
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+
+class Workload(object):
+    """Operations run against one resource type.
+
+    :param cs: a karbor v1 client
+    :param resource: ``plans`` or ``checkpoints``
+    :param provider_id: provider of the checkpoints and created plans
+    :param page_size: limit of the list requests
+    """
+
+    def __init__(self, cs, resource, provider_id, page_size=100):
+        self.cs = cs
+        self.resource = resource
+        self.provider_id = provider_id
+        self.page_size = page_size
+        self.ids = []
+        self.plan_ids = []
+        self.created = []
+        self._lock = threading.Lock()
+
+    def prepare(self):
+        """Collect IDs to show, and plans to create checkpoints from."""
+        self.plan_ids = [p.id for p in self.cs.plans.list(
+            limit=self.page_size)]
+        if self.resource == 'plans':
+            self.ids = list(self.plan_ids)
+        else:
+            self.ids = [c.id for c in self.cs.checkpoints.list(
+                self.provider_id, limit=self.page_size)]
+
+    def list(self, rng):
+        if self.resource == 'plans':
+            return self.cs.plans.list(limit=self.page_size)
+        return self.cs.checkpoints.list(self.provider_id,
+                                        limit=self.page_size)
+
+    def show(self, rng):
+        if not self.ids:
+            raise exc.CommandError('No %s to show.' % self.resource)
+        resource_id = rng.choice(self.ids)
+        if self.resource == 'plans':
+            return self.cs.plans.get(resource_id)
+        return self.cs.checkpoints.get(self.provider_id, resource_id)
+
+    def create(self, rng):
+        if self.resource == 'plans':
+            created = self.cs.plans.create(
+                'karbor-bench-%d' % rng.randint(0, 1 << 30),
+                self.provider_id, [], {})
+        else:
+            if not self.plan_ids:
+                raise exc.CommandError('No plan to create checkpoints of.')
+            created = self.cs.checkpoints.create(
+                self.provider_id, rng.choice(self.plan_ids))
+        with self._lock:
+            self.created.append(created.id)
+        return created
+
+    def cleanup(self):
+        """Delete the resources created by the run."""
+        for resource_id in self.created:
+            try:
+                if self.resource == 'plans':
+                    self.cs.plans.delete(resource_id)
+                else:
+                    self.cs.checkpoints.delete(self.provider_id, resource_id)
+            except exc.ClientException:
+                pass
+        del self.created[:]
+
+
+class Recorder(object):
+    """Thread-safe collection of operation latencies and errors."""
+
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, operation, elapsed, error=None):
+        with self._lock:
+            self.latencies[operation].append(elapsed)
+            if error is not None:
+                self.errors[(operation, error)] += 1
+
+    @property
+    def count(self):
+        return sum(len(v) for v in self.latencies.values())
+
+
+def _error_name(e):
+    status = getattr(e, 'http_status', None)
+    if status:
+        return '%s (%s)' % (type(e).__name__, status)
+    return type(e).__name__
+
+
+class ConnectionCounter(object):
+    """Count the TCP connections opened by urllib3 while active."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._patched = []
+
+    def __enter__(self):
+        from urllib3 import connection
+
+        for cls in (connection.HTTPConnection, connection.HTTPSConnection):
+            original = cls.__dict__.get('connect')
+            if original is None:
+                continue
+            self._patched.append((cls, original))
+            setattr(cls, 'connect', self._wrap(original))
+        return self
+
+    def _wrap(self, connect):
+        counter = self
+
+        def wrapper(conn, *args, **kwargs):
+            with counter._lock:
+                counter.count += 1
+            return connect(conn, *args, **kwargs)
+        return wrapper
+
+    def __exit__(self, exc_type, exc_value, tb):
+        for cls, original in self._patched:
+            setattr(cls, 'connect', original)
+        del self._patched[:]
+        return False
+
+
+def run(workload, mix, workers=4, duration=None, requests=None, seed=0):
+    """Run the workload and return the results as a dict.
+
+    The run stops after ``duration`` seconds or ``requests`` operations,
+    whichever comes first.
+    """
+    if duration is None and requests is None:
+        raise ValueError('A duration or a number of requests is required.')
+    operations = sorted(mix)
+    weights = [mix[op] for op in operations]
+    recorder = Recorder()
+    remaining = [requests]
+    remaining_lock = threading.Lock()
+    deadline = None
+
+    def take():
+        if deadline is not None and time.time() >= deadline:
+            return False
+        if requests is None:
+            return True
+        with remaining_lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        while take():
+            operation = rng.choices(operations, weights)[0]
+            started = time.time()
+            error = None
+            try:
+                getattr(workload, operation)(rng)
+            except Exception as e:
+                error = _error_name(e)
+            recorder.record(operation, time.time() - started, error)
+
+    with ConnectionCounter() as connections:
+        started = time.time()
+        if duration is not None:
+            deadline = started + duration
+        threads = [threading.Thread(target=worker, args=(i,))
+                   for i in range(workers)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - started
+
+    return summarize(recorder, elapsed, workers, connections.count)
+
+
+def summarize(recorder, elapsed, workers, connections):
+    total = recorder.count
+    operations = {}
+    for operation, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        stats = {'count': len(latencies),
+                 'errors': sum(n for (op, _e), n in recorder.errors.items()
+                               if op == operation),
+                 'mean': sum(latencies) / len(latencies),
+                 'max': latencies[-1]}
+        for p in PERCENTILES:
+            stats['p%d' % p] = percentile(latencies, p)
+        operations[operation] = stats
+    all_latencies = sorted(v for values in recorder.latencies.values()
+                           for v in values)
+    return {
+        'workers': workers,
+        'elapsed': elapsed,
+        'requests': total,
+        'throughput': total / elapsed if elapsed else 0.0,
+        'latency': dict(('p%d' % p, percentile(all_latencies, p))
+                        for p in PERCENTILES),
+        'operations': operations,
+        'errors': dict(('%s: %s' % key, n)
+                       for key, n in sorted(recorder.errors.items())),
+        'connections': connections,
+        'connection_reuse': (1 - float(connections) / total
+                             if total and connections <= total else 0.0),
+    }
+
+
+def print_results(results):
+    print('%(requests)d requests in %(elapsed).2fs with %(workers)d workers: '
+          '%(throughput).1f req/s' % results)
+    print('Connections opened: %d, reuse: %.1f%%'
+          % (results['connections'], 100 * results['connection_reuse']))
+    rows = [dict(stats, operation=operation)
+            for operation, stats in sorted(results['operations'].items())]
+    fields = ['Operation', 'Count', 'Errors', 'Mean', 'p50', 'p95', 'p99',
+              'Max']
+    formatters = dict(
+        (f, lambda r, k=f.lower(): '%.1fms' % (r[k] * 1000))
+        for f in ('Mean', 'p50', 'p95', 'p99', 'Max'))
+    formatters['Operation'] = lambda r: r['operation']
+    formatters['Count'] = lambda r: r['count']
+    formatters['Errors'] = lambda r: r['errors']
+    utils.print_list(rows, fields, formatters=formatters, sortby_index=None)
+    if results['errors']:
+        utils.print_dict(results['errors'], property='Error')
+
+
+def get_parser(argv):
+    parser = argparse.ArgumentParser(
+        prog='karbor-bench',
+        description='Concurrent load generator for the karbor API.')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Number of concurrent workers. Default=4.')
+    parser.add_argument('--duration', type=float, metavar='<seconds>',
+                        help='Run for <seconds>.')
+    parser.add_argument('--requests', type=int, metavar='<count>',
+                        help='Stop after <count> operations. Default=1000 '
+                             'when no duration is given.')
+    parser.add_argument('--mix', default='list=70,show=25,create=5',
+                        help='Weights of the list, show and create '
+                             'operations. Default=list=70,show=25,create=5.')
+    parser.add_argument('--resource', choices=RESOURCES, default='plans',
+                        help='Resource the operations apply to.')
+    parser.add_argument('--provider-id',
+                        default='cf56bd3e-97a7-4078-b6d5-f36246333fd9',
+                        help='Provider of the plans and checkpoints.')
+    parser.add_argument('--page-size', type=int, default=100,
+                        help='Limit of the list requests. Default=100.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the operation choice.')
+    parser.add_argument('--cleanup', action='store_true',
+                        help='Delete the created resources at the end.')
+    parser.add_argument('--coalesce', action='store_true',
+                        help='Let concurrent identical GETs share one '
+                             'request.')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as JSON.')
+    parser.add_argument('--fake', action='store_true',
+                        help='Run against an in-process fake karbor API.')
+    parser.add_argument('--fake-latency', type=float, default=0,
+                        help='Latency of the fake API in seconds.')
+    parser.add_argument('--karbor-url',
+                        default=utils.env('KARBOR_URL'),
+                        help='Karbor endpoint, used with --os-auth-token '
+                             'to skip Keystone. Defaults to '
+                             'env[KARBOR_URL].')
+    parser.add_argument('--os-auth-token',
+                        default=utils.env('OS_AUTH_TOKEN'),
+                        help='Defaults to env[OS_AUTH_TOKEN].')
+    parser.add_argument('--os-region-name',
+                        default=utils.env('OS_REGION_NAME'),
+                        help='Defaults to env[OS_REGION_NAME].')
+    loading.register_session_argparse_arguments(parser)
+    loading.register_auth_argparse_arguments(parser, argv,
+                                             default='password')
+    return parser
+
+
+def make_client(args):
+    """Return a karbor client and the fake server it talks to, if any."""
+    kwargs = {'coalesce_requests': args.coalesce}
+    if args.fake:
+        server = fake_server.FakeServer(
+            latency=args.fake_latency, seed=args.seed).start()
+        return karbor_client.Client(
+            '1', server.endpoint, token='token',
+            project_id=server.project_id, **kwargs), server
+    if args.karbor_url and args.os_auth_token:
+        return karbor_client.Client(
+            '1', args.karbor_url, token=args.os_auth_token,
+            project_id=getattr(args, 'os_project_id', None),
+            **kwargs), None
+    auth = loading.load_auth_from_argparse_arguments(args)
+    session = loading.load_session_from_argparse_arguments(args, auth=auth)
+    return karbor_client.Client(
+        '1', None, session=session, auth=auth, service_type='data-protect',
+        region_name=args.os_region_name, **kwargs), None
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    try:
+        args = get_parser(argv).parse_args(argv)
+        mix = parse_mix(args.mix)
+        requests = args.requests
+        if requests is None and args.duration is None:
+            requests = 1000
+        cs, server = make_client(args)
+        try:
+            workload = Workload(cs, args.resource, args.provider_id,
+                                args.page_size)
+            workload.prepare()
+            results = run(workload, mix, workers=args.workers,
+                          duration=args.duration, requests=requests,
+                          seed=args.seed)
+            if args.cleanup:
+                workload.cleanup()
+        finally:
+            if server is not None:
+                server.stop()
+    except KeyboardInterrupt:
+        print('... terminating karbor-bench', file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(encodeutils.safe_encode(six.text_type(e)), file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(jsonutils.dumps(results, indent=2, sort_keys=True))
+    else:
+        print_results(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -64,6 +64,21 @@ class ConnectionRefused(ClientException):
     pass
 
 
+class CircuitOpen(ConnectionRefused):
+    """The circuit breaker of the endpoint fails requests fast."""
+    pass
+
+
+class DeadlineExceeded(ClientException):
+    """The deadline of the operation expired."""
+    pass
+
+
+class RateLimitExceeded(ClientException):
+    """The client side rate limit does not allow the request now."""
+    pass
+
+
 class AuthPluginOptionsMissing(AuthorizationFailure):
     """Auth plugin misses some options."""
     def __init__(self, opt_names):
@@ -283,13 +298,12 @@ class PreconditionFailed(HTTPClientError):
     message = _("Precondition Failed")
 
 
-class RequestEntityTooLarge(HTTPClientError):
-    """HTTP 413 - Request Entity Too Large.
+class RetryAfterMixin(object):
+    """Error telling when to retry, from its Retry-After header.
 
-    The request is larger than the server is willing or able to process.
+    ``retry_after`` is the number of seconds to wait, 0 when unknown.
     """
-    http_status = 413
-    message = _("Request Entity Too Large")
+    retry_after = 0
 
     def __init__(self, *args, **kwargs):
         try:
@@ -297,7 +311,25 @@ class RequestEntityTooLarge(HTTPClientError):
         except (KeyError, ValueError):
             self.retry_after = 0
 
-        super(RequestEntityTooLarge, self).__init__(*args, **kwargs)
+        super(RetryAfterMixin, self).__init__(*args, **kwargs)
+
+
+class RequestEntityTooLarge(RetryAfterMixin, HTTPClientError):
+    """HTTP 413 - Request Entity Too Large.
+
+    The request is larger than the server is willing or able to process.
+    """
+    http_status = 413
+    message = _("Request Entity Too Large")
+
+
+class TooManyRequests(RetryAfterMixin, HTTPClientError):
+    """HTTP 429 - Too Many Requests.
+
+    The user has sent too many requests in a given amount of time.
+    """
+    http_status = 429
+    message = _("Too Many Requests")
 
 
 class RequestUriTooLong(HTTPClientError):
@@ -378,7 +410,7 @@ class BadGateway(HttpServerError):
     message = _("Bad Gateway")
 
 
-class ServiceUnavailable(HttpServerError):
+class ServiceUnavailable(RetryAfterMixin, HttpServerError):
     """HTTP 503 - Service Unavailable.
 
     The server is currently unavailable.
@@ -433,9 +465,6 @@ def from_response(response, method, url):
         "url": url,
         "request_id": req_id,
     }
-    if "retry-after" in response.headers:
-        kwargs["retry_after"] = response.headers["retry-after"]
-
     content_type = response.headers.get("Content-Type", "")
     if content_type.startswith("application/json"):
         try:
@@ -459,4 +488,7 @@ def from_response(response, method, url):
             cls = HTTPClientError
         else:
             cls = HttpError
+    # Only the exceptions with a retry_after attribute accept it.
+    if "retry-after" in response.headers and hasattr(cls, "retry_after"):
+        kwargs["retry_after"] = response.headers["retry-after"]
     return cls(**kwargs)
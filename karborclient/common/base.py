@@ -16,12 +16,18 @@ Base utilities to build API operation managers and objects on top of.
 
 import abc
 import copy
+import functools
+import inspect
+import sys
+import time
 
 import six
 from six.moves.urllib import parse
 
 from karborclient.common.apiclient import exceptions
 from karborclient.common import http
+from karborclient.common import metrics
+from karborclient.common import tracing
 
 
 SORT_DIR_VALUES = ('asc', 'desc')
@@ -41,12 +47,137 @@ def getid(obj):
         return obj
 
 
+def _freeze(value):
+    """Return a hashable, type-aware key for a decoded JSON value."""
+    if isinstance(value, dict):
+        return (dict, tuple(sorted((k, _freeze(v))
+                                   for k, v in value.items())))
+    if isinstance(value, list):
+        return (list, tuple(_freeze(v) for v in value))
+    return (type(value), value)
+
+
+def instrumented(operation):
+    """Report a manager method to the metrics exporters and the tracer.
+
+    Emits an operation counter labelled with the resource type, operation
+    and outcome, and a latency histogram, and wraps the call in a tracing
+    span parenting its HTTP requests. Costs nothing measurable when neither
+    metrics nor tracing are enabled. The operation of a generator lasts
+    until its iteration ends.
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(self, *args, **kwargs):
+                if tracing.enabled():
+                    with _operation_span(self, operation):
+                        for item in _measured_iter(self, operation, func,
+                                                   args, kwargs):
+                            yield item
+                    return
+                for item in _measured_iter(self, operation, func, args,
+                                           kwargs):
+                    yield item
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if tracing.enabled():
+                with _operation_span(self, operation):
+                    return _measured(self, operation, func, args, kwargs)
+            return _measured(self, operation, func, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def _operation_span(manager, operation):
+    name = '%s.%s' % (manager.resource_type, operation)
+    return tracing.span(name, **{'karbor.resource': manager.resource_type,
+                                 'karbor.operation': operation})
+
+
+def _measured(manager, operation, func, args, kwargs):
+    if not metrics.enabled():
+        return func(manager, *args, **kwargs)
+    started_at = time.time()
+    status = 'success'
+    try:
+        return func(manager, *args, **kwargs)
+    except Exception as e:
+        status = type(e).__name__
+        raise
+    finally:
+        labels = {'resource': manager.resource_type,
+                  'operation': operation}
+        metrics.observe(metrics.OPERATION_DURATION, labels,
+                        time.time() - started_at)
+        labels['status'] = status
+        metrics.inc(metrics.OPERATIONS, labels)
+
+
+def _measured_iter(manager, operation, func, args, kwargs):
+    if not metrics.enabled():
+        for item in func(manager, *args, **kwargs):
+            yield item
+        return
+    started_at = time.time()
+    status = 'success'
+    try:
+        for item in func(manager, *args, **kwargs):
+            yield item
+    except Exception as e:
+        status = type(e).__name__
+        raise
+    finally:
+        labels = {'resource': manager.resource_type,
+                  'operation': operation}
+        metrics.observe(metrics.OPERATION_DURATION, labels,
+                        time.time() - started_at)
+        labels['status'] = status
+        metrics.inc(metrics.OPERATIONS, labels)
+
+
+class SharedValues(object):
+    """Deduplicate repeated field values across the rows of a list.
+
+    Strings are interned and equal dicts or lists are replaced by a single
+    shared object, so a big list with low-cardinality fields keeps only
+    one copy of each distinct value in memory.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._values = {}
+
+    def share(self, value):
+        if isinstance(value, str):
+            return sys.intern(value)
+        if isinstance(value, (dict, list)):
+            try:
+                key = _freeze(value)
+            except TypeError:
+                return value
+            return self._values.setdefault(key, value)
+        return value
+
+    def __call__(self, row):
+        for field in self.fields:
+            if field in row:
+                row[field] = self.share(row[field])
+        return row
+
+
 class Manager(object):
     """Managers interact with a particular type of API (servers, flavors,
 
     images, etc.) and provide CRUD operations for them.
     """
     resource_class = None
+    # Fields of list responses that repeat the same values across many
+    # rows. Their values are shared between the rows of a list; treat
+    # nested dicts and lists of listed resources as read-only.
+    shared_fields = ()
 
     def __init__(self, api):
         self.api = api
@@ -55,11 +186,24 @@ class Manager(object):
         else:
             self.project_id = self.api.project_id
 
+    @property
+    def resource_type(self):
+        if self.resource_class is None:
+            return type(self).__name__.lower()
+        return self.resource_class.__name__.lower()
+
     def _list(self, url, response_key=None, obj_class=None,
-              data=None, headers=None, return_raw=False,):
+              data=None, headers=None, return_raw=False, stream=False):
 
         if headers is None:
             headers = {}
+        if stream:
+            return self._iter_list(url, response_key, obj_class, headers)
+        return self._get_list(url, response_key, obj_class, headers,
+                              return_raw)
+
+    @instrumented('list')
+    def _get_list(self, url, response_key, obj_class, headers, return_raw):
         resp, body = self.api.json_request('GET', url, headers=headers)
 
         if obj_class is None:
@@ -73,13 +217,67 @@ class Manager(object):
             data = body
         if return_raw:
             return data
+        if self.shared_fields:
+            share = SharedValues(self.shared_fields)
+            return [obj_class(self, share(res), loaded=True)
+                    for res in data if res]
         return [obj_class(self, res, loaded=True) for res in data if res]
 
+    @instrumented('list')
+    def _iter_list(self, url, response_key, obj_class=None, headers=None):
+        """Yield the resources of a list as the response is received.
+
+        Only the resource being decoded is held in memory, and callers can
+        process the first resources before the last ones are downloaded.
+        """
+        if obj_class is None:
+            obj_class = self.resource_class
+        share = None
+        if self.shared_fields:
+            share = SharedValues(self.shared_fields)
+        for res in self.api.json_stream(url, response_key,
+                                        headers=headers or {}):
+            if res:
+                if share is not None:
+                    res = share(res)
+                yield obj_class(self, res, loaded=True)
+
+    @instrumented('list')
+    def _list_pages(self, url, response_key, obj_class=None, headers=None):
+        """Yield the resources of every page of a list.
+
+        The pages are requested one after the other, following the
+        ``next`` link of the ``<response_key>_links`` of each page, and the
+        resources of a page are yielded before the next page is requested.
+        """
+        if obj_class is None:
+            obj_class = self.resource_class
+        share = None
+        if self.shared_fields:
+            share = SharedValues(self.shared_fields)
+        path = url.split('?', 1)[0]
+        while url:
+            resp, body = self.api.json_request('GET', url,
+                                               headers=headers or {})
+            for res in body.get(response_key) or []:
+                if res:
+                    if share is not None:
+                        res = share(res)
+                    yield obj_class(self, res, loaded=True)
+            url = None
+            for link in body.get('%s_links' % response_key) or []:
+                if link.get('rel') == 'next':
+                    query = parse.urlsplit(link['href']).query
+                    if query:
+                        url = '%s?%s' % (path, query)
+
+    @instrumented('delete')
     def _delete(self, url, headers=None):
         if headers is None:
             headers = {}
         self.api.raw_request('DELETE', url, headers=headers)
 
+    @instrumented('update')
     def _update(self, url, data, response_key=None, headers=None):
         if headers is None:
             headers = {}
@@ -91,6 +289,7 @@ class Manager(object):
                 return self.resource_class(self, body[response_key])
             return self.resource_class(self, body)
 
+    @instrumented('create')
     def _create(self, url, data=None, response_key=None,
                 return_raw=False, headers=None):
         if headers is None:
@@ -108,6 +307,7 @@ class Manager(object):
             return self.resource_class(self, body[response_key])
         return self.resource_class(self, body)
 
+    @instrumented('get')
     def _get(self, url, response_key=None, return_raw=False, headers=None):
         if headers is None:
             headers = {}
@@ -0,0 +1,166 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Circuit breakers failing requests fast while an endpoint is down.
+
+A breaker is closed while its endpoint answers. After ``failure_threshold``
+consecutive failures (connection errors, or 502, 503 and 504 responses) it
+opens: requests fail at once with :class:`CircuitOpen` instead of waiting
+for the socket timeout. After ``reset_timeout`` seconds it is half open and
+lets ``half_open_requests`` requests through to probe the endpoint; it
+closes again on success and opens again on failure.
+"""
+
+import threading
+import time
+
+from oslo_log import log as logging
+
+from karborclient.common.apiclient import exceptions as exc
+
+LOG = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Responses telling that the endpoint is down behind a proxy.
+FAILURE_STATUSES = (502, 503, 504)
+
+
+class CircuitBreaker(object):
+    """Circuit breaker of one endpoint.
+
+    :param endpoint: the endpoint, used in messages.
+    :param failure_threshold: consecutive failures opening the circuit.
+    :param reset_timeout: seconds the circuit stays open before probing.
+    :param half_open_requests: requests let through at once while probing.
+    """
+
+    def __init__(self, endpoint, failure_threshold=5, reset_timeout=30.0,
+                 half_open_requests=1, clock=time.monotonic):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_requests = half_open_requests
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and self._expired():
+                return HALF_OPEN
+            return self._state
+
+    def _expired(self):
+        return self._clock() - self._opened_at >= self.reset_timeout
+
+    def _set_state(self, state):
+        if state != self._state:
+            LOG.warning('Circuit of %s is %s', self.endpoint, state)
+            self._state = state
+
+    def enter(self):
+        """Let a request through.
+
+        :raises CircuitOpen: if the circuit is open, or half open with as
+                             many probes in flight as allowed.
+        """
+        with self._lock:
+            if self._state == OPEN and self._expired():
+                self._set_state(HALF_OPEN)
+                self._probes = 0
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and \
+                    self._probes < self.half_open_requests:
+                self._probes += 1
+                return
+            retry_in = max(0.0, self._opened_at + self.reset_timeout -
+                           self._clock())
+        raise exc.CircuitOpen(
+            'Circuit of %s is open after %d failures, not sending requests '
+            'for %.0f more seconds' % (self.endpoint, self.failure_threshold,
+                                       retry_in))
+
+    def available(self):
+        """Tell whether :meth:`enter` would let a request through now."""
+        with self._lock:
+            if self._state == OPEN:
+                return self._expired()
+            return self._state == CLOSED or \
+                self._probes < self.half_open_requests
+
+    def exit(self, failed):
+        """Report the outcome of a request let through by :meth:`enter`.
+
+        :param failed: None when the request ended without telling whether
+                       the endpoint works.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes -= 1
+            if failed is None:
+                return
+            if not failed:
+                self._failures = 0
+                self._set_state(CLOSED)
+                return
+            self._failures += 1
+            if self._state == HALF_OPEN or \
+                    self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                self._set_state(OPEN)
+
+
+class CircuitBreakers(object):
+    """The circuit breakers of a client, one per endpoint.
+
+    The keyword arguments are the options of every :class:`CircuitBreaker`.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint):
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(
+                    endpoint, **self.options)
+            return breaker
+
+    def available(self, endpoint):
+        """Tell whether the circuit of ``endpoint`` lets requests through."""
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+        return breaker is None or breaker.available()
+
+
+def get_circuit_breakers(circuit_breaker):
+    """Return :class:`CircuitBreakers` from their keyword arguments.
+
+    ``circuit_breaker`` may also be breakers, shared between clients, or
+    None.
+    """
+    if circuit_breaker is None or \
+            isinstance(circuit_breaker, CircuitBreakers):
+        return circuit_breaker
+    return CircuitBreakers(**circuit_breaker)
@@ -0,0 +1,224 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Adaptive concurrency of bulk operations.
+
+Bulk operations, such as deleting many checkpoints, run their API calls
+concurrently. The number of calls in flight is bounded by an AIMD (additive
+increase, multiplicative decrease) controller: the limit grows by about one
+per round of calls while latency stays stable, and is cut in half when the
+API answers 429 or 503 or when latency rises.
+"""
+
+import collections
+from concurrent import futures
+import threading
+import time
+
+from oslo_log import log as logging
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import deadline
+
+LOG = logging.getLogger(__name__)
+
+# Errors telling that karbor-api is overloaded.
+OVERLOAD_ERRORS = (exc.TooManyRequests, exc.ServiceUnavailable)
+
+BulkResult = collections.namedtuple('BulkResult', ['item', 'result', 'error'])
+
+
+class AIMDController(object):
+    """Adaptive limit of the operations in flight.
+
+    :param initial: limit to start with.
+    :param min_limit: the limit never goes below.
+    :param max_limit: the limit never goes above.
+    :param increase: added to the limit for each round of successful
+                     operations, a round being ``limit`` operations.
+    :param decrease: factor applied to the limit on overload.
+    :param latency_tolerance: an operation slower than the fastest one seen
+                              by this factor counts as an overload.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=32, increase=1.0,
+                 decrease=0.5, latency_tolerance=3.0, clock=time.monotonic):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self._clock = clock
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._inflight = 0
+        self._min_latency = None
+        self._last_decrease = None
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        """Current number of operations allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def inflight(self):
+        return self._inflight
+
+    def acquire(self):
+        """Wait for a free slot.
+
+        :returns: the start time to give back to :meth:`release`.
+        """
+        with self._cond:
+            while self._inflight >= self.limit:
+                self._cond.wait()
+            self._inflight += 1
+        return self._clock()
+
+    def release(self, started_at, overloaded=False):
+        """Free a slot and adapt the limit to the operation outcome.
+
+        :param started_at: value returned by :meth:`acquire`.
+        :param overloaded: True if the API reported it is overloaded.
+        """
+        latency = self._clock() - started_at
+        with self._cond:
+            self._inflight -= 1
+            if overloaded:
+                self._cut(started_at, 'API overloaded')
+            elif (self._min_latency is not None and
+                    latency > self._min_latency * self.latency_tolerance):
+                self._cut(started_at, 'latency %.3fs, fastest %.3fs'
+                          % (latency, self._min_latency))
+            else:
+                self._grow(latency)
+            if not overloaded and (self._min_latency is None or
+                                   latency < self._min_latency):
+                self._min_latency = latency
+            self._cond.notify_all()
+
+    def _cut(self, started_at, reason):
+        if self._last_decrease is not None and \
+                started_at < self._last_decrease:
+            # Started before the last cut, which already accounted for it.
+            return
+        old = self.limit
+        self._limit = max(float(self.min_limit), self._limit * self.decrease)
+        self._last_decrease = self._clock()
+        LOG.debug('Concurrency limit %d -> %d: %s', old, self.limit, reason)
+
+    def _grow(self, latency):
+        old = self.limit
+        self._limit = min(float(self.max_limit),
+                          self._limit + self.increase / self._limit)
+        if self.limit != old:
+            LOG.debug('Concurrency limit %d -> %d: latency stable at %.3fs',
+                      old, self.limit, latency)
+
+
+def get_controller(concurrency=None):
+    """Return an :class:`AIMDController` from its keyword arguments.
+
+    ``concurrency`` may also be a controller, or None for the defaults.
+    """
+    if isinstance(concurrency, AIMDController):
+        return concurrency
+    return AIMDController(**(concurrency or {}))
+
+
+def client_controller(client):
+    """Return the controller shared by the bulk operations of a client."""
+    controller = getattr(getattr(client, 'http_client', None),
+                         'concurrency', None)
+    if isinstance(controller, AIMDController):
+        return controller
+    return AIMDController()
+
+
+def _with_deadline(func, client):
+    """Wrap ``func`` to run under the deadline ``client`` has in this thread.
+
+    The deadline of a client is kept per thread; the calls of bulk
+    operations run in threads of their own.
+    """
+    http_client = getattr(client, 'http_client', client)
+    active = getattr(http_client, 'active_deadline', None)
+    if not isinstance(active, deadline.Deadline):
+        return func
+
+    def call(*args):
+        with http_client.attach_deadline(active):
+            return func(*args)
+    return call
+
+
+def run_bulk(func, items, controller=None, client=None):
+    """Call ``func(item)`` for every item within the controller's limit.
+
+    :param client: client the calls use, whose deadline in the calling
+                   thread bounds them.
+    :returns: list of :class:`BulkResult`, in the order of ``items``; the
+              errors of the calls are returned, not raised.
+    """
+    items = list(items)
+    if controller is None:
+        controller = AIMDController()
+    func = _with_deadline(func, client)
+
+    def call(item):
+        started_at = controller.acquire()
+        overloaded = False
+        try:
+            return BulkResult(item, func(item), None)
+        except Exception as e:
+            overloaded = isinstance(e, OVERLOAD_ERRORS)
+            return BulkResult(item, None, e)
+        finally:
+            controller.release(started_at, overloaded)
+
+    if len(items) <= 1:
+        return [call(item) for item in items]
+    LOG.debug('Running %d operations, concurrency limit %d', len(items),
+              controller.limit)
+    workers = min(len(items), controller.max_limit)
+    with futures.ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(call, items))
+
+
+def run_parallel(calls, client=None):
+    """Call a few different functions at once, without a controller.
+
+    Meant for the handful of independent queries of a composite command,
+    which take about as long as the slowest of them this way.
+
+    :param calls: dict mapping names to functions without arguments.
+    :param client: client the calls use, whose deadline in the calling
+                   thread bounds them.
+    :returns: dict mapping the names to :class:`BulkResult`; the errors of
+              the calls are returned, not raised.
+    """
+    def call(item):
+        name, func = item
+        try:
+            return BulkResult(name, func(), None)
+        except Exception as e:
+            return BulkResult(name, None, e)
+
+    # Wrapped here, the workers have no deadline of their own.
+    items = [(name, _with_deadline(func, client))
+             for name, func in calls.items()]
+    if len(items) <= 1:
+        return {name: call((name, func)) for name, func in items}
+    with futures.ThreadPoolExecutor(len(items)) as executor:
+        return {result.item: result
+                for result in executor.map(call, items)}
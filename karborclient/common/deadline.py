@@ -0,0 +1,71 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Deadlines bounding whole operations made of several requests.
+
+Within ``client.deadline(seconds)``, every request, including those of
+pages, bulk operations and hedges, gets the time left as its timeout, and
+no request is sent once the deadline expired. The deadline is kept per
+thread: threads working for the operation are given it explicitly.
+"""
+
+import time
+
+from karborclient.common.apiclient import exceptions as exc
+
+
+class Deadline(object):
+    """A point in time by which an operation must be done.
+
+    :param seconds: time given to the operation from now.
+    """
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.seconds = seconds
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        """Return the seconds left, negative once expired."""
+        return self.expires_at - self._clock()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        """Return the seconds left.
+
+        :raises DeadlineExceeded: if the deadline expired.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise exc.DeadlineExceeded(
+                'Deadline of %s seconds exceeded' % self.seconds)
+        return remaining
+
+    def timeout(self, timeout=None):
+        """Return the timeout of a request, shortened to the time left."""
+        remaining = self.check()
+        if timeout is None:
+            return remaining
+        return min(float(timeout), remaining)
+
+
+def earliest(first, second):
+    """Return the deadline expiring first, either may be None."""
+    if first is None:
+        return second
+    if second is None or first.expires_at <= second.expires_at:
+        return first
+    return second
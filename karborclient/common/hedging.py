@@ -0,0 +1,185 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Hedged requests: cut the tail latency of idempotent GET requests.
+
+When a GET request gets no response within a high percentile of the recent
+response times, a second identical request is sent, to another endpoint
+when several are balanced between, and the first response wins. Hedges are
+paid from a budget earning a fraction of a token per request, so that they
+never add more than that fraction of extra load once the initial burst is
+spent.
+"""
+
+import collections
+import threading
+import time
+
+from oslo_log import log as logging
+
+from karborclient.common import metrics
+
+LOG = logging.getLogger(__name__)
+
+
+def _discard(resp):
+    # The request of the losing attempt can not be aborted once sent; its
+    # response is closed to give the connection back.
+    close = getattr(resp, 'close', None)
+    if close is not None:
+        close()
+
+
+class _Race(object):
+    """Attempts of a request running in threads, the first response wins."""
+
+    def __init__(self, observe):
+        self._observe = observe
+        self._cond = threading.Condition()
+        self._started = 0
+        self._errors = {}
+        self._result = None
+        self._done = False
+
+    def start(self, func):
+        with self._cond:
+            attempt = self._started
+            self._started += 1
+        thread = threading.Thread(target=self._run, args=(func, attempt))
+        thread.daemon = True
+        thread.start()
+
+    def _run(self, func, attempt):
+        started_at = time.monotonic()
+        try:
+            result = func()
+        except Exception as e:
+            with self._cond:
+                self._errors[attempt] = e
+                self._cond.notify_all()
+            return
+        # Losing attempts are measured as well, they are the tail latency.
+        self._observe(time.monotonic() - started_at)
+        with self._cond:
+            if not self._done:
+                self._done = True
+                self._result = result
+                self._cond.notify_all()
+                return
+        _discard(result)
+
+    def _decided(self):
+        return self._done or len(self._errors) == self._started
+
+    def wait(self, timeout=None):
+        """Wait for a response or for every attempt to fail.
+
+        :returns: False if still undecided after ``timeout`` seconds.
+        """
+        with self._cond:
+            return self._cond.wait_for(self._decided, timeout)
+
+    def outcome(self):
+        with self._cond:
+            if self._done:
+                return self._result
+            # Every attempt failed, report the error of the original one.
+            raise self._errors[0]
+
+
+class Hedger(object):
+    """Send a second attempt of slow requests.
+
+    :param percentile: hedge requests slower than this percentile of the
+                       recent response times.
+    :param initial_delay: seconds to wait before hedging until
+                          ``min_samples`` response times are known.
+    :param min_delay: never hedge sooner than this.
+    :param budget: tokens earned per request; a hedge costs one token, so
+                   this is the fraction of requests hedged at most.
+    :param burst: tokens available at first, and at most.
+    :param window: number of recent response times kept.
+    :param min_samples: response times needed to use the percentile.
+    """
+
+    def __init__(self, percentile=95.0, initial_delay=1.0, min_delay=0.01,
+                 budget=0.05, burst=5.0, window=200, min_samples=20):
+        if not 0 < percentile < 100:
+            raise ValueError('percentile must be between 0 and 100')
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.budget = budget
+        self.burst = burst
+        self.min_samples = min_samples
+        self._latencies = collections.deque(maxlen=window)
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed):
+        """Record the response time of an attempt."""
+        with self._lock:
+            self._latencies.append(elapsed)
+
+    def delay(self):
+        """Return the seconds to wait for a response before hedging."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            latencies = sorted(self._latencies)
+        index = int(round(self.percentile / 100.0 * (len(latencies) - 1)))
+        return max(self.min_delay, latencies[index])
+
+    def _earn(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def _spend(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def run(self, func, resource=''):
+        """Return the first result of ``func()``, called once or twice.
+
+        :param func: sends one attempt of the request; it is called from
+                     other threads.
+        :raises: the error of the first attempt when every attempt failed.
+        """
+        self._earn()
+        delay = self.delay()
+        race = _Race(self.observe)
+        race.start(func)
+        if not race.wait(delay):
+            if self._spend():
+                LOG.debug('No response after %.3fs, hedging the request',
+                          delay)
+                metrics.inc(metrics.HTTP_HEDGES, {'resource': resource})
+                race.start(func)
+            else:
+                LOG.debug('No response after %.3fs, hedge budget spent',
+                          delay)
+            race.wait()
+        return race.outcome()
+
+
+def get_hedger(hedge):
+    """Return a :class:`Hedger` from its keyword arguments.
+
+    ``hedge`` may also be a hedger, shared between clients, or None.
+    """
+    if hedge is None or isinstance(hedge, Hedger):
+        return hedge
+    return Hedger(**hedge)
@@ -13,23 +13,43 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import contextlib
 import copy
+import gzip
 import hashlib
 import os
+import re
 import socket
+import threading
+import time
 
 import keystoneauth1.adapter as keystone_adapter
+from keystoneauth1 import exceptions as ks_exc
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import encodeutils
+from oslo_utils import importutils
 import requests
 import six
 from six.moves import urllib
 
 from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import circuitbreaker
+from karborclient.common import concurrency
+from karborclient.common import deadline
+from karborclient.common import hedging
+from karborclient.common import jsonstream
+from karborclient.common import loadbalancer
+from karborclient.common import metrics
+from karborclient.common import ratelimit
+from karborclient.common import recording
+from karborclient.common import spool
+from karborclient.common import tracing
 
 LOG = logging.getLogger(__name__)
 USER_AGENT = 'python-karborclient'
+GLOBAL_REQUEST_ID_HEADER = 'X-OpenStack-Request-ID'
 CHUNKSIZE = 1024 * 64  # 64kB
 
 
@@ -51,9 +71,554 @@ def get_system_ca_file():
     LOG.warning("System ca file could not be found.")
 
 
-class HTTPClient(object):
+class JSONCodec(object):
+    """JSON codec built on oslo.serialization; always available."""
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return jsonutils.dumps(obj)
+
+    def loads(self, data):
+        """Decode a JSON document given as ``bytes``, ``str`` or a buffer.
+
+        The json module only parses text, so a buffer, such as the memory
+        map of a spilled body, is first decoded to a ``str`` as large as the
+        document; only ``orjson`` parses buffers in place.
+        """
+        if isinstance(data, memoryview):
+            data = six.text_type(data, 'utf-8')
+        return jsonutils.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec using the optional ``orjson`` library.
+
+    ``dumps`` returns UTF-8 encoded ``bytes``, which requests sends as is.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        self._orjson = importutils.import_module('orjson')
+        self._dumps_option = self._orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj, default=jsonutils.to_primitive,
+                                  option=self._dumps_option)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+JSON_CODECS = {
+    JSONCodec.name: JSONCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+
+def get_json_codec(codec=None):
+    """Return a JSON codec instance.
+
+    :param codec: a codec instance, the name of a codec in ``JSON_CODECS``,
+                  ``'auto'`` to use the fastest installed codec, or None for
+                  the default ``'json'`` codec.
+    """
+    if codec is None:
+        codec = JSONCodec.name
+    if not isinstance(codec, six.string_types):
+        return codec
+    if codec == 'auto':
+        try:
+            return OrjsonCodec()
+        except ImportError:
+            return JSONCodec()
+    try:
+        codec_class = JSON_CODECS[codec]
+    except KeyError:
+        raise ValueError('json_codec must be one of the following: %s.'
+                         % ', '.join(sorted(JSON_CODECS) + ['auto']))
+    return codec_class()
+
+
+class _InflightCall(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """Coalesce concurrent calls that share the same key.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still in flight wait for it and receive the same result (or error).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """Run ``func`` once per in-flight ``key``.
+
+        :returns: tuple of (result, shared), where ``shared`` is True if the
+                  result was produced by another caller's in-flight call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InflightCall()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters:
+                LOG.debug('Shared the result of %s with %d waiting callers',
+                          key, call.waiters)
+            call.event.set()
+        return call.result, False
+
+
+def _coalesce_key(method, url, kwargs):
+    """Build a hashable key for a request, or None if it can't be shared.
+
+    Only body-less GET requests are idempotent enough to be coalesced.
+    """
+    if method != 'GET' or 'data' in kwargs or 'body' in kwargs:
+        return None
+    key = [method, url]
+    for name, value in sorted(kwargs.items()):
+        if name == 'headers':
+            value = tuple(sorted((value or {}).items()))
+        key.append((name, value))
+    key = tuple(key)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _close_streamed(resp, kwargs):
+    """Release the connection of a ``stream=True`` response."""
+    if kwargs.get('stream'):
+        resp.close()
+
+
+_ID_SEGMENT_RE = re.compile(
+    r'^([0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?'
+    r'[0-9a-fA-F]{12}|[0-9]+)$')
+
+
+def url_template(url):
+    """Turn a request URL into a template for aggregation.
+
+    The query string is dropped and ID-like path segments are replaced by
+    ``{id}``, e.g. ``/providers/<uuid>/checkpoints?limit=5`` becomes
+    ``/providers/{id}/checkpoints``.
+    """
+    path = urllib.parse.urlsplit(url).path
+    return '/'.join('{id}' if _ID_SEGMENT_RE.match(segment) else segment
+                    for segment in path.split('/'))
+
+
+def resource_name(url):
+    """Return the name of the collection a request URL addresses.
+
+    ``/providers/<id>/checkpoints/<id>`` is a ``checkpoints`` request and
+    ``/protectables/OS::Nova::Server/instances`` a ``protectables`` one.
+    """
+    name = None
+    previous = None
+    for segment in url_template(url).split('/'):
+        if not segment:
+            continue
+        if previous is None or previous == '{id}':
+            if segment != '{id}':
+                name = segment
+        previous = segment
+    return name or ''
+
+
+# response_bytes is the size of the decoded body and wire_bytes its size as
+# received, smaller when the response is compressed.
+RequestTiming = collections.namedtuple(
+    'RequestTiming', ['method', 'url', 'url_template', 'status',
+                      'request_bytes', 'response_bytes', 'started_at',
+                      'elapsed', 'wire_bytes'])
+
+ApiStat = collections.namedtuple(
+    'ApiStat', ['method', 'url_template', 'count', 'errors', 'total',
+                'mean', 'max', 'response_bytes', 'wire_bytes'])
+
+
+def _body_size(body):
+    if isinstance(body, (six.binary_type, six.text_type)):
+        return len(body)
+    return 0
+
+
+def _content_encoding(resp):
+    encoding = resp.headers.get('Content-Encoding')
+    return encoding if isinstance(encoding, six.string_types) else None
+
+
+def _wire_size(resp, content):
+    """Return the bytes of a response body as received."""
+    if _content_encoding(resp):
+        # Bytes read from the socket by urllib3, before decoding.
+        tell = getattr(resp.raw, 'tell', None)
+        if tell is not None:
+            size = tell()
+            if isinstance(size, int):
+                return size
+    return _body_size(content)
+
+
+def compress_body(kwargs, threshold):
+    """Gzip the body of a request when it has at least ``threshold`` bytes.
+
+    :returns: True if the body was compressed.
+    """
+    data = kwargs.get('data')
+    if isinstance(data, six.text_type):
+        data = data.encode('utf-8')
+    if not isinstance(data, six.binary_type) or len(data) < threshold:
+        return False
+    headers = kwargs.get('headers') or {}
+    if headers.get('Content-Encoding'):
+        return False
+    kwargs['data'] = gzip.compress(data)
+    # A copy, the headers are sent again with the raw body on redirects.
+    kwargs['headers'] = dict(headers, **{'Content-Encoding': 'gzip'})
+    LOG.debug('Request body gzipped from %d to %d bytes', len(data),
+              len(kwargs['data']))
+    return True
+
+
+def summarize_timings(timings):
+    """Aggregate RequestTiming records per method and URL template.
+
+    :returns: list of :class:`ApiStat`, slowest total first.
+    """
+    groups = collections.OrderedDict()
+    for timing in timings:
+        key = (timing.method, timing.url_template)
+        groups.setdefault(key, []).append(timing)
+    stats = []
+    for (method, template), group in groups.items():
+        elapsed = [t.elapsed for t in group]
+        stats.append(ApiStat(
+            method=method,
+            url_template=template,
+            count=len(group),
+            errors=sum(1 for t in group
+                       if t.status is None or t.status >= 400),
+            total=sum(elapsed),
+            mean=sum(elapsed) / len(group),
+            max=max(elapsed),
+            response_bytes=sum(t.response_bytes for t in group),
+            wire_bytes=sum(t.wire_bytes for t in group)))
+    return sorted(stats, key=lambda s: s.total, reverse=True)
+
+
+def _request_span(method, url):
+    if not tracing.enabled():
+        return tracing.NOOP_SPAN
+    return tracing.span('HTTP %s %s' % (method, url_template(url)),
+                        **{'http.method': method, 'http.url': url})
+
+
+def _tag_request_span(span, resp, global_request_id=None):
+    if resp is None:
+        return
+    span.set_attribute('http.status_code', resp.status_code)
+    request_id = tracing.request_id(resp)
+    if request_id:
+        span.set_attribute('karbor.request_id', request_id)
+    if global_request_id:
+        span.set_attribute('karbor.global_request_id', global_request_id)
+
+
+class TimingsMixin(object):
+    """Record a :class:`RequestTiming` for every request sent.
+
+    Recording is enabled by the ``timings`` attribute. Request counters and
+    latencies are also sent to the registered metrics exporters, and the
+    exchanges to the ``recorder`` when one is set. Requests wait for the
+    ``rate_limiter``, when one is set, before being timed. Bulk operations
+    share the ``concurrency`` controller of the client. With an
+    ``endpoint_pool``, each request goes to the endpoint it selects. With a
+    ``hedger``, slow GET requests are sent a second time. With
+    ``circuit_breakers``, requests to an endpoint which keeps failing fail
+    fast. Within :meth:`deadline`, requests share the time left; the
+    ``active_deadline`` is kept per thread, and given to the threads of
+    hedges and bulk operations with :meth:`attach_deadline`. Request
+    bodies of at least ``compress_threshold`` bytes are gzipped. JSON
+    response bodies of more than ``spill_threshold`` bytes are spilled to a
+    temporary file to be decoded.
+    """
+
+    timings = False
+    recorder = None
+    player = None
+    rate_limiter = None
+    concurrency = None
+    endpoint_pool = None
+    hedger = None
+    circuit_breakers = None
+    compress_threshold = None
+    spill_threshold = None
+
+    def get_timings(self):
+        return list(self.__dict__.get('times', []))
+
+    def reset_timings(self):
+        self.times = []
+
+    def _record_timing(self, method, url, kwargs, resp, started_at):
+        if metrics.enabled():
+            self._emit_metrics(method, url, resp, started_at)
+        if resp is not None and not kwargs.get('stream') and \
+                _content_encoding(resp):
+            LOG.debug('%s %s: %s encoded response of %d bytes, %d decoded',
+                      method, url, _content_encoding(resp),
+                      _wire_size(resp, resp.content),
+                      _body_size(resp.content))
+        if not self.timings:
+            return
+        content = None
+        if resp is not None and not kwargs.get('stream'):
+            content = getattr(resp, 'content', None)
+        self.__dict__.setdefault('times', []).append(RequestTiming(
+            method=method,
+            url=url,
+            url_template=url_template(url),
+            status=resp.status_code if resp is not None else None,
+            request_bytes=_body_size(kwargs.get('data')),
+            response_bytes=_body_size(content),
+            started_at=started_at,
+            elapsed=time.time() - started_at,
+            wire_bytes=_wire_size(resp, content) if resp is not None
+            else 0))
+
+    def _acquire_endpoint(self, tried=None):
+        if self.endpoint_pool is None:
+            return None
+        available = None
+        if self.circuit_breakers is not None:
+            available = self.circuit_breakers.available
+        endpoint = self.endpoint_pool.acquire(tried or (), available)
+        if tried is not None:
+            tried.append(endpoint)
+        return endpoint
+
+    def _release_endpoint(self, endpoint, started_at, failed):
+        if endpoint is not None:
+            self.endpoint_pool.release(endpoint, time.time() - started_at,
+                                       failed)
+
+    def _deadline_local(self):
+        local = self.__dict__.get('_deadlines')
+        if local is None:
+            local = self.__dict__.setdefault('_deadlines', threading.local())
+        return local
+
+    @property
+    def active_deadline(self):
+        """The deadline of the requests sent by the current thread."""
+        return getattr(self._deadline_local(), 'deadline', None)
+
+    @active_deadline.setter
+    def active_deadline(self, value):
+        self._deadline_local().deadline = value
+
+    @contextlib.contextmanager
+    def attach_deadline(self, active):
+        """Use ``active``, the deadline of another thread, in the block."""
+        previous = self.active_deadline
+        self.active_deadline = active
+        try:
+            yield active
+        finally:
+            self.active_deadline = previous
+
+    def deadline(self, seconds):
+        """Bound the requests sent within the block to ``seconds`` in total.
+
+        The deadline applies to the requests of the current thread. A nested
+        deadline can only shorten the enclosing one; None adds no deadline.
+        """
+        active = self.active_deadline
+        if seconds is not None:
+            active = deadline.earliest(active, deadline.Deadline(seconds))
+        return self.attach_deadline(active)
+
+    def _check_deadline(self):
+        if self.active_deadline is not None:
+            self.active_deadline.check()
+
+    def _apply_deadline(self, kwargs, timeout=None):
+        if self.active_deadline is not None:
+            kwargs['timeout'] = self.active_deadline.timeout(
+                kwargs.get('timeout', timeout))
+
+    def _enter_circuit(self, endpoint, node):
+        if self.circuit_breakers is None:
+            return None
+        breaker = self.circuit_breakers.get(endpoint)
+        try:
+            breaker.enter()
+        except exc.CircuitOpen:
+            if node is not None:
+                # No request was sent, which tells nothing of its health.
+                self.endpoint_pool.cancel(node)
+            raise
+        return breaker
+
+    @staticmethod
+    def _exit_circuit(breaker, resp, failed):
+        if breaker is None:
+            return
+        if resp is None and not failed:
+            # Ended before any verdict on the endpoint, e.g. by the deadline.
+            breaker.exit(None)
+        else:
+            breaker.exit(failed or resp.status_code in
+                         circuitbreaker.FAILURE_STATUSES)
+
+    def _acquire_rate_limit(self, method, url):
+        if self.rate_limiter is not None:
+            remaining = None
+            if self.active_deadline is not None:
+                remaining = self.active_deadline.remaining()
+            self.rate_limiter.acquire(method, resource_name(url), remaining)
+
+    def json_stream(self, url, response_key, **kwargs):
+        """Yield the items of a list response as they are received.
+
+        :param response_key: member of the response holding the list.
+        """
+        resp = self.raw_request('GET', url, stream=True, **kwargs)
+        try:
+            for item in jsonstream.iter_items(resp.iter_content(CHUNKSIZE),
+                                              response_key):
+                yield item
+        finally:
+            resp.close()
+
+    def _hedgeable(self, method, kwargs):
+        return (self.hedger is not None and self.player is None and
+                method == 'GET' and not kwargs.get('data'))
+
+    def _read_content(self, resp):
+        """Return the body of a JSON response.
+
+        Without a ``spill_threshold`` this is ``resp.content``. Otherwise the
+        response was streamed and its body is read here, as bytes, or as a
+        :class:`spool.SpilledBody` when larger than the threshold;
+        ``resp.content`` is not available afterwards.
+        """
+        if self.spill_threshold is None:
+            return resp.content
+        content = spool.read_body(resp.iter_content(CHUNKSIZE),
+                                  self.spill_threshold)
+        if isinstance(content, spool.SpilledBody):
+            LOG.debug('Spilled a response body of %d bytes to disk',
+                      content.size)
+        return content
+
+    def _content_text(self, resp, content):
+        """Return a body read by :meth:`_read_content` as text."""
+        if self.spill_threshold is None:
+            return resp.text
+        return content.decode(resp.encoding or 'utf-8', 'replace')
+
+    def _decode_json(self, content):
+        if isinstance(content, spool.SpilledBody):
+            with content, content.view() as view:
+                return self.json_codec.loads(view)
+        return self.json_codec.loads(content)
+
+    def _send_request(self, url, method, **kwargs):
+        self._check_deadline()
+        if self.compress_threshold is not None:
+            compress_body(kwargs, self.compress_threshold)
+        self._acquire_rate_limit(method, url)
+        if not self._hedgeable(method, kwargs):
+            return self._send_attempt(url, method, kwargs)
+        # Endpoints of the attempts, a hedge goes to another one.
+        tried = []
+        # Attempts run in other threads, under the span and deadline of
+        # this one.
+        context = tracing.current_context()
+        active = self.active_deadline
+
+        def attempt():
+            with tracing.attach(context), self.attach_deadline(active):
+                return self._send_attempt(
+                    url, method,
+                    dict(kwargs, headers=dict(kwargs.get('headers') or {})),
+                    tried)
+
+        return self.hedger.run(attempt, resource_name(url))
+
+    def _record_exchange(self, method, url, kwargs, resp, started_at):
+        if self.recorder is None or resp is None:
+            return
+        self.recorder.record(method, url, kwargs, resp, started_at,
+                             time.time() - started_at)
+
+    @staticmethod
+    def _emit_metrics(method, url, resp, started_at):
+        labels = {'resource': resource_name(url), 'operation': method}
+        metrics.observe(metrics.HTTP_REQUEST_DURATION, labels,
+                        time.time() - started_at)
+        labels['status'] = str(resp.status_code) if resp is not None \
+            else 'error'
+        metrics.inc(metrics.HTTP_REQUESTS, labels)
+
+
+def safe_header(name, value):
+    """Return a header as it can be logged, with credentials hashed."""
+    if name in ['X-Auth-Token', 'X-Subject-Token', 'X-Auth-Key',
+                'Authorization']:
+        # because in python3 byte string handling is ... ug
+        v = value.encode('utf-8')
+        h = hashlib.sha1(v)
+        d = h.hexdigest()
+        return encodeutils.safe_decode(name), "{SHA1}%s" % d
+    else:
+        return (encodeutils.safe_decode(name),
+                encodeutils.safe_decode(value))
+
+
+class HTTPClient(TimingsMixin):
 
     def __init__(self, endpoint, **kwargs):
+        if isinstance(endpoint, (list, tuple)):
+            # Several endpoints of the same API to balance requests between.
+            self.endpoint_pool = loadbalancer.get_endpoint_pool(
+                endpoint, kwargs.get('endpoint_selection'),
+                kwargs.get('readmit_after'))
+            endpoint = endpoint[0]
         self.endpoint = endpoint
         self.auth_url = kwargs.get('auth_url')
         self.auth_token = kwargs.get('token')
@@ -67,6 +632,25 @@ class HTTPClient(object):
         self.cert_file = kwargs.get('cert_file')
         self.key_file = kwargs.get('key_file')
         self.timeout = kwargs.get('timeout')
+        self.coalesce_requests = kwargs.get('coalesce_requests', False)
+        self._inflight = SingleFlight()
+        self.json_codec = get_json_codec(kwargs.get('json_codec'))
+        self.timings = kwargs.get('timings', False)
+        self.times = []
+        self.global_request_id = kwargs.get('global_request_id')
+        self.recorder = recording.get_recorder(kwargs.get('record_file'),
+                                               safe_header)
+        self.player = recording.get_player(kwargs.get('replay_file'),
+                                           kwargs.get('replay_speed', 1.0))
+        self.rate_limiter = ratelimit.get_rate_limiter(
+            kwargs.get('rate_limit'))
+        self.concurrency = concurrency.get_controller(
+            kwargs.get('concurrency'))
+        self.hedger = hedging.get_hedger(kwargs.get('hedge'))
+        self.circuit_breakers = circuitbreaker.get_circuit_breakers(
+            kwargs.get('circuit_breaker'))
+        self.compress_threshold = kwargs.get('compress_threshold')
+        self.spill_threshold = kwargs.get('spill_threshold')
 
         self.ssl_connection_params = {
             'cacert': kwargs.get('cacert'),
@@ -83,17 +667,14 @@ class HTTPClient(object):
                 self.verify_cert = kwargs.get('cacert', get_system_ca_file())
 
     def _safe_header(self, name, value):
-        if name in ['X-Auth-Token', 'X-Subject-Token']:
-            # because in python3 byte string handling is ... ug
-            v = value.encode('utf-8')
-            h = hashlib.sha1(v)
-            d = h.hexdigest()
-            return encodeutils.safe_decode(name), "{SHA1}%s" % d
-        else:
-            return (encodeutils.safe_decode(name),
-                    encodeutils.safe_decode(value))
+        return safe_header(name, value)
+
+    def log_curl_request(self, method, url, kwargs, endpoint=None):
+        """Log a request as a curl command.
 
-    def log_curl_request(self, method, url, kwargs):
+        :param endpoint: endpoint the request is sent to, the first one by
+                         default.
+        """
         curl = ['curl -i -X %s' % method]
 
         for (key, value) in kwargs['headers'].items():
@@ -114,18 +695,28 @@ class HTTPClient(object):
             curl.append('-k')
 
         if 'data' in kwargs:
-            curl.append('-d \'%s\'' % kwargs['data'])
+            data = kwargs['data']
+            encoding = kwargs['headers'].get('Content-Encoding')
+            if encoding and isinstance(data, six.binary_type):
+                data = '<%s body of %d bytes>' % (encoding, len(data))
+            elif isinstance(data, six.binary_type):
+                data = encodeutils.safe_decode(data, errors='replace')
+            curl.append('-d \'%s\'' % data)
 
-        curl.append('%s%s' % (self.endpoint, url))
+        curl.append('%s%s' % (endpoint or self.endpoint_url, url))
         LOG.debug(' '.join(curl))
 
     @staticmethod
-    def log_http_response(resp):
+    def log_http_response(resp, body=True):
+        if not LOG.isEnabledFor(logging.DEBUG):
+            # Don't build a text copy of the body which is never logged.
+            return
         status = (resp.raw.version / 10.0, resp.status_code, resp.reason)
         dump = ['\nHTTP/%.1f %s %s' % status]
         dump.extend(['%s: %s' % (k, v) for k, v in resp.headers.items()])
         dump.append('')
-        if resp.content:
+        # Reading the body of a streamed response would load all of it.
+        if body and resp.content:
             content = resp.content
             if isinstance(content, six.binary_type):
                 try:
@@ -153,8 +744,9 @@ class HTTPClient(object):
             kwargs['headers'].setdefault('X-Auth-Url', self.auth_url)
         if self.region_name:
             kwargs['headers'].setdefault('X-Region-Name', self.region_name)
-
-        self.log_curl_request(method, url, kwargs)
+        if self.global_request_id:
+            kwargs['headers'].setdefault(GLOBAL_REQUEST_ID_HEADER,
+                                         self.global_request_id)
 
         if self.cert_file and self.key_file:
             kwargs['cert'] = (self.cert_file, self.key_file)
@@ -178,55 +770,90 @@ class HTTPClient(object):
         # See issue: https://github.com/kennethreitz/requests/issues/1704
         allow_redirects = False
 
+        resp = self._send_request(url, method,
+                                  allow_redirects=allow_redirects, **kwargs)
+        self.log_http_response(resp, body=not kwargs.get('stream') or
+                               resp.status_code >= 300)
+
         try:
-            resp = requests.request(
-                method,
-                self.endpoint_url + url,
-                allow_redirects=allow_redirects,
-                **kwargs)
-        except socket.gaierror as e:
-            message = ("Error finding address for %(url)s: %(e)s" %
-                       {'url': self.endpoint_url + url, 'e': e})
-            raise exc.EndpointException(message)
-        except (socket.error,
-                socket.timeout,
-                requests.exceptions.ConnectionError) as e:
-            endpoint = self.endpoint
-            message = ("Error communicating with %(endpoint)s %(e)s" %
-                       {'endpoint': endpoint, 'e': e})
-            raise exc.ConnectionRefused(message)
-
-        self.log_http_response(resp)
-
-        if 'X-Auth-Key' not in kwargs['headers'] and \
-                (resp.status_code == 401 or
-                 (resp.status_code == 500 and "(HTTP 401)" in resp.content)):
-            raise exc.AuthorizationFailure("Authentication failed. Please try"
-                                           " again.\n%s"
-                                           % resp.content)
-        elif 400 <= resp.status_code < 600:
-            raise exc.from_response(resp, method, url)
-        elif resp.status_code in (301, 302, 305):
-            # Redirected. Reissue the request to the new location,
-            # unless caller specified follow_redirects=False
-            if follow_redirects:
-                location = resp.headers.get('location')
-                path = self.strip_endpoint(location)
-                resp = self._http_request(path, method, **kwargs)
-        elif resp.status_code == 300:
-            raise exc.from_response(resp, method, url)
+            if 'X-Auth-Key' not in kwargs['headers'] and \
+                    (resp.status_code == 401 or
+                     (resp.status_code == 500 and
+                      "(HTTP 401)" in resp.content)):
+                raise exc.AuthorizationFailure("Authentication failed. "
+                                               "Please try again.\n%s"
+                                               % resp.content)
+            elif 400 <= resp.status_code < 600:
+                raise exc.from_response(resp, method, url)
+            elif resp.status_code in (301, 302, 305):
+                # Redirected. Reissue the request to the new location,
+                # unless caller specified follow_redirects=False
+                if follow_redirects:
+                    location = resp.headers.get('location')
+                    path = self.strip_endpoint(location)
+                    _close_streamed(resp, kwargs)
+                    resp = self._http_request(path, method, **kwargs)
+            elif resp.status_code == 300:
+                raise exc.from_response(resp, method, url)
+        except Exception:
+            # The caller never sees this response, release its connection.
+            _close_streamed(resp, kwargs)
+            raise
+
+        return resp
 
+    def _send_attempt(self, url, method, kwargs, tried=None):
+        self._apply_deadline(kwargs)
+        node = self._acquire_endpoint(tried)
+        endpoint = self.endpoint_url if node is None else node.url
+        breaker = self._enter_circuit(endpoint, node)
+        self.log_curl_request(method, url, kwargs, endpoint)
+        started_at = time.time()
+        resp = None
+        failed = False
+        with _request_span(method, url) as span:
+            try:
+                if self.player is not None:
+                    resp = self.player.respond(method, url, kwargs)
+                else:
+                    resp = requests.request(method, endpoint + url, **kwargs)
+            except socket.gaierror as e:
+                failed = True
+                message = ("Error finding address for %(url)s: %(e)s" %
+                           {'url': endpoint + url, 'e': e})
+                raise exc.EndpointException(message)
+            except (socket.error,
+                    socket.timeout,
+                    requests.exceptions.ConnectionError) as e:
+                self._check_deadline()
+                failed = True
+                message = ("Error communicating with %(endpoint)s %(e)s" %
+                           {'endpoint': endpoint, 'e': e})
+                raise exc.ConnectionRefused(message)
+            except requests.exceptions.Timeout:
+                self._check_deadline()
+                failed = True
+                raise
+            finally:
+                self._release_endpoint(node, started_at, failed)
+                self._exit_circuit(breaker, resp, failed)
+                self._record_timing(method, url, kwargs, resp, started_at)
+                self._record_exchange(method, url, kwargs, resp, started_at)
+                _tag_request_span(span, resp, self.global_request_id)
         return resp
 
     def strip_endpoint(self, location):
         if location is None:
             message = "Location not returned with 302"
             raise exc.EndpointException(message)
-        elif location.startswith(self.endpoint):
-            return location[len(self.endpoint):]
-        else:
-            message = "Prohibited endpoint redirect %s" % location
-            raise exc.EndpointException(message)
+        endpoints = [self.endpoint]
+        if self.endpoint_pool is not None:
+            endpoints = self.endpoint_pool.urls
+        for endpoint in endpoints:
+            if location.startswith(endpoint):
+                return location[len(endpoint):]
+        message = "Prohibited endpoint redirect %s" % location
+        raise exc.EndpointException(message)
 
     def credentials_headers(self):
         creds = {}
@@ -238,6 +865,22 @@ class HTTPClient(object):
 
     def json_request(self, method, url, content_type='application/json',
                      **kwargs):
+        key = None
+        if self.coalesce_requests:
+            key = _coalesce_key(method, url,
+                                dict(kwargs, content_type=content_type))
+        if key is None:
+            return self._json_request(method, url, content_type, **kwargs)
+        (resp, body), shared = self._inflight.do(
+            key, self._json_request, method, url, content_type, **kwargs)
+        if shared:
+            # Callers may mutate the decoded body, never hand out the
+            # same object twice.
+            body = copy.deepcopy(body)
+        return resp, body
+
+    def _json_request(self, method, url, content_type='application/json',
+                      **kwargs):
         kwargs.setdefault('headers', {})
         kwargs['headers'].setdefault('Content-Type', content_type)
         # Don't set Accept because we aren't always dealing in JSON
@@ -249,16 +892,28 @@ class HTTPClient(object):
             LOG.warning("Use of 'body' is deprecated; use 'data' instead")
             kwargs['data'] = kwargs.pop('body')
         if 'data' in kwargs:
-            kwargs['data'] = jsonutils.dumps(kwargs['data'])
+            kwargs['data'] = self.json_codec.dumps(kwargs['data'])
 
+        if self.spill_threshold is not None:
+            kwargs['stream'] = True
         resp = self._http_request(url, method, **kwargs)
-        body = resp.content
 
-        if body and 'application/json' in resp.headers['content-type']:
+        body = None
+        try:
+            if 'application/json' in resp.headers.get('content-type', ''):
+                body = self._read_content(resp)
+        finally:
+            # A streamed body that is not JSON is never read.
+            _close_streamed(resp, kwargs)
+        if body:
             try:
-                body = resp.json()
+                # Hand the raw bytes to the codec, orjson decodes them
+                # without an intermediate text copy.
+                body = self._decode_json(body)
             except ValueError:
                 LOG.error('Could not decode response body as JSON')
+                if isinstance(body, spool.SpilledBody):
+                    body = None
         else:
             body = None
 
@@ -298,27 +953,69 @@ class HTTPClient(object):
         return self.client_request("PATCH", url, **kwargs)
 
 
-class SessionClient(keystone_adapter.Adapter):
+class SessionClient(TimingsMixin, keystone_adapter.Adapter):
     """karbor specific keystoneauth Adapter.
 
     """
 
+    def __init__(self, *args, **kwargs):
+        self.coalesce_requests = kwargs.pop('coalesce_requests', False)
+        self.json_codec = get_json_codec(kwargs.pop('json_codec', None))
+        self.timings = kwargs.pop('timings', False)
+        self.times = []
+        self.recorder = recording.get_recorder(
+            kwargs.pop('record_file', None), safe_header)
+        self.player = recording.get_player(kwargs.pop('replay_file', None),
+                                           kwargs.pop('replay_speed', 1.0))
+        self.rate_limiter = ratelimit.get_rate_limiter(
+            kwargs.pop('rate_limit', None))
+        self.concurrency = concurrency.get_controller(
+            kwargs.pop('concurrency', None))
+        self.hedger = hedging.get_hedger(kwargs.pop('hedge', None))
+        self.circuit_breakers = circuitbreaker.get_circuit_breakers(
+            kwargs.pop('circuit_breaker', None))
+        self.compress_threshold = kwargs.pop('compress_threshold', None)
+        self.spill_threshold = kwargs.pop('spill_threshold', None)
+        self.endpoint_pool = loadbalancer.get_endpoint_pool(
+            kwargs.pop('endpoints', None),
+            kwargs.pop('endpoint_selection', None),
+            kwargs.pop('readmit_after', None))
+        # Balance between all the catalog endpoints of the service in the
+        # region, looked up with the first request.
+        self.all_endpoints = kwargs.pop('all_endpoints', False)
+        super(SessionClient, self).__init__(*args, **kwargs)
+        self._inflight = SingleFlight()
+
     def request(self, url, method, **kwargs):
+        resp = self._request(url, method, **kwargs)
+        return resp, resp.text
+
+    def _request(self, url, method, **kwargs):
         raise_exc = kwargs.pop('raise_exc', True)
-        resp = super(SessionClient, self).request(url,
-                                                  method,
-                                                  raise_exc=False,
-                                                  **kwargs)
+        resp = self._send_request(url, method, **kwargs)
 
         if raise_exc and resp.status_code >= 400:
+            error = exc.from_response(resp, method, url)
+            _close_streamed(resp, kwargs)
             LOG.trace("Error communicating with {url}: {exc}"
-                      .format(url=url,
-                              exc=exc.from_response(resp, method, url)))
-            raise exc.from_response(resp, method, url)
+                      .format(url=url, exc=error))
+            raise error
 
-        return resp, resp.text
+        return resp
 
     def json_request(self, method, url, **kwargs):
+        key = None
+        if self.coalesce_requests:
+            key = _coalesce_key(method, url, kwargs)
+        if key is None:
+            return self._json_request(method, url, **kwargs)
+        (resp, body), shared = self._inflight.do(
+            key, self._json_request, method, url, **kwargs)
+        if shared:
+            body = copy.deepcopy(body)
+        return resp, body
+
+    def _json_request(self, method, url, **kwargs):
         headers = kwargs.setdefault('headers', {})
         headers['Content-Type'] = kwargs.pop('content_type',
                                              'application/json')
@@ -329,17 +1026,28 @@ class SessionClient(keystone_adapter.Adapter):
             LOG.warning("Use of 'body' is deprecated; use 'data' instead")
             kwargs['data'] = kwargs.pop('body')
         if 'data' in kwargs:
-            kwargs['data'] = jsonutils.dumps(kwargs['data'])
+            kwargs['data'] = self.json_codec.dumps(kwargs['data'])
             # NOTE(starodubcevna): We need to prove that json field is empty,
             # or it will be modified by keystone adapter.
             kwargs['json'] = None
 
-        resp, body = self.request(url, method, **kwargs)
-        if body:
-            try:
-                body = jsonutils.loads(body)
-            except ValueError:
-                pass
+        if self.spill_threshold is not None:
+            kwargs['stream'] = True
+        resp = self._request(url, method, **kwargs)
+        try:
+            content = self._read_content(resp)
+        finally:
+            _close_streamed(resp, kwargs)
+        if not content:
+            return resp, self._content_text(resp, b'')
+        # Decode from the raw bytes instead of resp.text to avoid keeping a
+        # second, decoded copy of large bodies around.
+        try:
+            body = self._decode_json(content)
+        except ValueError:
+            if isinstance(content, spool.SpilledBody):
+                raise
+            body = self._content_text(resp, content)
         return resp, body
 
     def raw_request(self, method, url, **kwargs):
@@ -353,11 +1061,7 @@ class SessionClient(keystone_adapter.Adapter):
                                  "'body' to a request")
             LOG.warning("Use of 'body' is deprecated; use 'data' instead")
             kwargs['data'] = kwargs.pop('body')
-        resp = keystone_adapter.Adapter.request(self,
-                                                url,
-                                                method,
-                                                raise_exc=False,
-                                                **kwargs)
+        resp = self._send_request(url, method, **kwargs)
 
         if raise_exc and resp.status_code >= 400:
             LOG.trace("Error communicating with {url}: {exc}"
@@ -367,6 +1071,55 @@ class SessionClient(keystone_adapter.Adapter):
 
         return resp
 
+    def _catalog_endpoint_pool(self):
+        self.all_endpoints = False
+        auth = self.auth or self.session.auth
+        catalog = auth.get_access(self.session).service_catalog
+        urls = catalog.get_urls(service_type=self.service_type,
+                                interface=self.interface,
+                                region_name=self.region_name,
+                                service_name=self.service_name)
+        LOG.debug('Balancing requests between %s', ', '.join(urls))
+        return loadbalancer.get_endpoint_pool(list(urls))
+
+    def _acquire_endpoint(self, tried=None):
+        if self.all_endpoints and self.player is None:
+            self.endpoint_pool = self._catalog_endpoint_pool()
+        return super(SessionClient, self)._acquire_endpoint(tried)
+
+    def _send_attempt(self, url, method, kwargs, tried=None):
+        self._apply_deadline(kwargs, self.session.timeout)
+        node = self._acquire_endpoint(tried)
+        if node is not None:
+            kwargs['endpoint_override'] = node.url
+        breaker = self._enter_circuit(
+            node.url if node is not None else
+            self.endpoint_override or self.service_type, node)
+        started_at = time.time()
+        resp = None
+        failed = False
+        with _request_span(method, url) as span:
+            try:
+                if self.player is not None:
+                    resp = self.player.respond(method, url, kwargs)
+                else:
+                    resp = keystone_adapter.Adapter.request(self,
+                                                            url,
+                                                            method,
+                                                            raise_exc=False,
+                                                            **kwargs)
+            except ks_exc.ConnectionError:
+                self._check_deadline()
+                failed = True
+                raise
+            finally:
+                self._release_endpoint(node, started_at, failed)
+                self._exit_circuit(breaker, resp, failed)
+                self._record_timing(method, url, kwargs, resp, started_at)
+                self._record_exchange(method, url, kwargs, resp, started_at)
+                _tag_request_span(span, resp, self.global_request_id)
+        return resp
+
 
 def _construct_http_client(*args, **kwargs):
     session = kwargs.pop('session', None)
@@ -378,6 +1131,9 @@ def _construct_http_client(*args, **kwargs):
         endpoint_type = kwargs.pop('endpoint_type', None)
         region_name = kwargs.pop('region_name', None)
         service_name = kwargs.pop('service_name', None)
+        if isinstance(endpoint, (list, tuple)):
+            kwargs['endpoints'] = endpoint
+            endpoint = endpoint[0]
         parameters = {
             'endpoint_override': endpoint,
             'session': session,
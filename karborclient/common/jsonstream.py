@@ -0,0 +1,123 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Incremental decoding of JSON list responses.
+
+List responses look like ``{"checkpoints": [{...}, {...}], ...}``.
+:func:`iter_items` decodes the items of the list one at a time as the body
+is received, so that only the item being decoded and the unread part of
+the last chunk are held in memory, however long the list is.
+"""
+
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _Reader(object):
+    """Text buffer refilled from an iterator of byte chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read one more chunk; return False at the end of the body."""
+        if self.eof:
+            return False
+        if self.pos:
+            # Drop what was decoded already.
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self.buffer += self._decoder.decode(chunk)
+                return True
+        self.buffer += self._decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        """Return the next character which is not whitespace, or ''."""
+        while True:
+            while self.pos < len(self.buffer) and \
+                    self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError('Expecting one of %r at character %d of the '
+                             'response, found %r' % (chars, self.pos, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+            if end == len(self.buffer) and not self.eof:
+                # A number or literal may go on in the next chunk.
+                if self.fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_items(chunks, key):
+    """Yield the items of the ``key`` list of a JSON object.
+
+    :param chunks: iterable of the bytes of the response body, such as
+                   ``response.iter_content(chunk_size)``.
+    :param key: member of the object holding the list; nothing is yielded
+                when it is missing or null.
+    :raises ValueError: if the body is not a JSON object or the member is
+                        not a list.
+    """
+    reader = _Reader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        name = reader.value()
+        reader.expect(':')
+        if name == key and reader.peek() == '[':
+            reader.pos += 1
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            value = reader.value()
+            if name == key and value is not None:
+                raise ValueError('%s is not a list' % key)
+        if reader.expect(',}') == '}':
+            return
@@ -0,0 +1,164 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client side load balancing across several karbor API endpoints.
+
+Each request goes to the endpoint with the fewest requests in flight
+(``least_outstanding``) or with the lowest latency moving average weighted
+by its requests in flight (``ewma``). An endpoint failing to connect is
+left out for ``readmit_after`` seconds, then tried again.
+"""
+
+import threading
+import time
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+STRATEGIES = ('least_outstanding', 'ewma')
+
+
+class Endpoint(object):
+    """State of one endpoint of a :class:`EndpointPool`."""
+
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.ewma = None
+        self.down_until = None
+
+    def __repr__(self):
+        return '<Endpoint %s>' % self.url
+
+
+class EndpointPool(object):
+    """Select the endpoint of each request.
+
+    :param urls: base URLs of the endpoints.
+    :param strategy: one of ``STRATEGIES``.
+    :param readmit_after: seconds an endpoint which failed to connect is
+                          left out before being tried again.
+    :param decay: weight of the last response time in the moving average.
+    """
+
+    def __init__(self, urls, strategy='least_outstanding', readmit_after=30.0,
+                 decay=0.3, clock=time.monotonic):
+        if strategy not in STRATEGIES:
+            raise ValueError('endpoint selection must be one of the '
+                             'following: %s.' % ', '.join(STRATEGIES))
+        if not urls:
+            raise ValueError('At least one endpoint is required.')
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.strategy = strategy
+        self.readmit_after = readmit_after
+        self.decay = decay
+        self._clock = clock
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def _score(self, endpoint):
+        if self.strategy == 'ewma':
+            # Endpoints without a measure yet come first, so that all of
+            # them get measured.
+            return ((endpoint.ewma or 0.0) * (endpoint.outstanding + 1),
+                    endpoint.outstanding)
+        return endpoint.outstanding, endpoint.ewma or 0.0
+
+    def acquire(self, exclude=(), available=None):
+        """Return the endpoint to send a request to.
+
+        The request must be reported with :meth:`release`, or :meth:`cancel`
+        if it is not sent.
+
+        :param exclude: endpoints to avoid when others are healthy, such as
+                        the endpoint of a request being hedged.
+        :param available: function telling from the URL of an endpoint
+                          whether it takes requests, such as when its
+                          circuit is closed; others are avoided while any
+                          healthy endpoint does.
+        """
+        with self._lock:
+            now = self._clock()
+            healthy = [endpoint for endpoint in self.endpoints
+                       if endpoint.down_until is None or
+                       endpoint.down_until <= now]
+            if available is not None:
+                healthy = [endpoint for endpoint in healthy
+                           if available(endpoint.url)] or healthy
+            others = [endpoint for endpoint in healthy
+                      if endpoint not in exclude]
+            healthy = others or healthy
+            if healthy:
+                # Rotate the candidates so that ties are spread evenly.
+                start = self._next % len(healthy)
+                self._next += 1
+                endpoint = min(healthy[start:] + healthy[:start],
+                               key=self._score)
+            else:
+                endpoint = min(self.endpoints,
+                               key=lambda endpoint: endpoint.down_until)
+            endpoint.outstanding += 1
+            return endpoint
+
+    def cancel(self, endpoint):
+        """Give back an endpoint no request was sent to.
+
+        Its health and response times are left as they are.
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+
+    def release(self, endpoint, elapsed, failed=False):
+        """Report the outcome of a request sent to ``endpoint``.
+
+        :param elapsed: response time in seconds.
+        :param failed: True if the endpoint could not be reached.
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if failed:
+                now = self._clock()
+                if endpoint.down_until is None or endpoint.down_until <= now:
+                    LOG.warning('Endpoint %s is unreachable, not using it '
+                                'for %s seconds', endpoint.url,
+                                self.readmit_after)
+                endpoint.down_until = now + self.readmit_after
+                return
+            endpoint.down_until = None
+            if endpoint.ewma is None:
+                endpoint.ewma = elapsed
+            else:
+                endpoint.ewma += self.decay * (elapsed - endpoint.ewma)
+
+
+def get_endpoint_pool(endpoints, strategy=None, readmit_after=None):
+    """Return an :class:`EndpointPool` for a list of endpoints.
+
+    ``endpoints`` may also be a pool, shared between clients. Returns None
+    when there are less than two endpoints to balance between.
+    """
+    if endpoints is None or isinstance(endpoints, EndpointPool):
+        return endpoints
+    if len(endpoints) < 2:
+        return None
+    kwargs = {}
+    if strategy:
+        kwargs['strategy'] = strategy
+    if readmit_after is not None:
+        kwargs['readmit_after'] = readmit_after
+    return EndpointPool(endpoints, **kwargs)
@@ -0,0 +1,260 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client side metrics: counters and fixed-bucket latency histograms.
+
+Exporters are registered process wide with :func:`register_exporter`. When
+none is registered, emitting a metric costs a single list truth test.
+"""
+
+import abc
+import atexit
+import bisect
+import os
+import tempfile
+import threading
+
+import six
+
+# Metric names emitted by karborclient.
+HTTP_REQUESTS = 'karborclient_http_requests_total'
+HTTP_REQUEST_DURATION = 'karborclient_http_request_duration_seconds'
+HTTP_HEDGES = 'karborclient_http_hedges_total'
+RATE_LIMIT_WAIT = 'karborclient_rate_limit_wait_seconds'
+RATE_LIMIT_REJECTED = 'karborclient_rate_limit_rejected_total'
+OPERATIONS = 'karborclient_operations_total'
+OPERATION_DURATION = 'karborclient_operation_duration_seconds'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0, 30.0, 60.0)
+
+_exporters = []
+
+
+def register_exporter(exporter):
+    """Start sending metrics to ``exporter``."""
+    if exporter not in _exporters:
+        _exporters.append(exporter)
+
+
+def unregister_exporter(exporter):
+    """Stop sending metrics to ``exporter``."""
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+
+def enabled():
+    """Return True if at least one exporter is registered."""
+    return bool(_exporters)
+
+
+def inc(name, labels, value=1):
+    """Increment counter ``name`` for the given ``labels`` dict."""
+    for exporter in _exporters:
+        exporter.inc(name, labels, value)
+
+
+def observe(name, labels, value):
+    """Record ``value`` (in seconds) in the histogram ``name``."""
+    for exporter in _exporters:
+        exporter.observe(name, labels, value)
+
+
+@six.add_metaclass(abc.ABCMeta)
+class MetricsExporter(object):
+    """Interface of a metrics exporter.
+
+    Implementations must be thread safe; ``labels`` is a dict of strings.
+    """
+
+    @abc.abstractmethod
+    def inc(self, name, labels, value=1):
+        pass
+
+    @abc.abstractmethod
+    def observe(self, name, labels, value):
+        pass
+
+
+class Histogram(object):
+    """Cumulative fixed-bucket histogram."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """Return a list of (upper bound, cumulative count) pairs."""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),),
+                                self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class InMemoryExporter(MetricsExporter):
+    """Keep metrics in memory, mostly useful in tests."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels, value=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def get_counter(self, name, **labels):
+        return self.counters.get((name, _label_key(labels)), 0)
+
+    def get_histogram(self, name, **labels):
+        return self.histograms.get((name, _label_key(labels)))
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"')
+                     .replace('\n', '\\n'))
+        for k, v in pairs)
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class PrometheusTextfileExporter(InMemoryExporter):
+    """Write metrics in the Prometheus text exposition format.
+
+    The file is meant for the node_exporter textfile collector; it is
+    rewritten atomically on every :meth:`flush`.
+
+    :param path: file to write, usually ending in ``.prom``
+    :param flush_interval: if set, flush automatically at most every that
+                           many seconds while metrics are being recorded,
+                           and at exit.
+    """
+
+    def __init__(self, path, buckets=DEFAULT_BUCKETS, flush_interval=None):
+        super(PrometheusTextfileExporter, self).__init__(buckets)
+        self.path = path
+        self.flush_interval = flush_interval
+        self._flush_timer = None
+        self._unflushed = False
+        if flush_interval is not None:
+            # The timer thread is a daemon, killed at exit before it
+            # flushes the last metrics.
+            atexit.register(self._flush_at_exit)
+
+    def inc(self, name, labels, value=1):
+        super(PrometheusTextfileExporter, self).inc(name, labels, value)
+        self._schedule_flush()
+
+    def observe(self, name, labels, value):
+        super(PrometheusTextfileExporter, self).observe(name, labels, value)
+        self._schedule_flush()
+
+    def _flush_at_exit(self):
+        if self._unflushed:
+            self.flush()
+
+    def _schedule_flush(self):
+        self._unflushed = True
+        if self.flush_interval is None or self._flush_timer is not None:
+            return
+        with self._lock:
+            if self._flush_timer is not None:
+                return
+            self._flush_timer = threading.Timer(self.flush_interval,
+                                                self._timed_flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _timed_flush(self):
+        self._flush_timer = None
+        self.flush()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(),
+                                key=lambda item: item[0])
+            current = None
+            for (name, labels), value in counters:
+                if name != current:
+                    lines.append('# TYPE %s counter' % name)
+                    current = name
+                lines.append('%s%s %s' % (name, _format_labels(labels),
+                                          value))
+            current = None
+            for (name, labels), histogram in histograms:
+                if name != current:
+                    lines.append('# TYPE %s histogram' % name)
+                    current = name
+                for bound, count in histogram.cumulative_counts():
+                    lines.append('%s_bucket%s %d' % (
+                        name,
+                        _format_labels(labels, [('le', _format_bound(bound))]),
+                        count))
+                lines.append('%s_sum%s %r' % (name, _format_labels(labels),
+                                              histogram.sum))
+                lines.append('%s_count%s %d' % (name, _format_labels(labels),
+                                                histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        """Atomically rewrite the metrics file."""
+        self._unflushed = False
+        content = self.render()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.karbor-',
+                                        suffix='.prom.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            os.chmod(tmp_path, 0o644)
+            os.rename(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
@@ -0,0 +1,162 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Profile a command with cProfile and, optionally, tracemalloc.
+
+Time and memory are attributed to the phases of a command (authentication,
+HTTP, JSON, rendering, imports) according to the module a function or an
+allocation belongs to.
+"""
+
+from __future__ import print_function
+
+import collections
+import cProfile
+import pstats
+import sys
+import tracemalloc
+
+PHASES = ('auth', 'http', 'json', 'render', 'import', 'other')
+
+# Ordered: the first matching phase wins. Network time spent while
+# authenticating is reported as http.
+_PHASE_PATTERNS = (
+    ('auth', ('keystoneauth1/identity', 'keystoneauth1/access',
+              'keystoneauth1/discover', 'keystoneauth1/loading',
+              'keystoneauth1/plugin')),
+    ('http', ('requests/', 'urllib3/', 'http/client', 'socket', 'ssl',
+              'keystoneauth1/session', 'keystoneauth1/adapter',
+              'karborclient/common/http', 'select', 'recv', 'sendall',
+              'connect')),
+    ('json', ('json', 'oslo_serialization')),
+    ('render', ('prettytable', 'cliff/', 'osc_lib/', 'karborclient/common/'
+                'utils', 'karborclient/osc/v1/', 'karborclient/v1/shell',
+                'built-in method builtins.print', "method 'write'")),
+    ('import', ('importlib', 'zipimport', 'pkg_resources',
+                'importlib_metadata', 'stevedore')),
+)
+
+PhaseTotal = collections.namedtuple('PhaseTotal', ['phase', 'value',
+                                                   'percent'])
+
+
+def classify(location):
+    """Return the phase of a ``filename`` or ``filename:function`` string."""
+    location = location.replace('\\', '/')
+    for phase, patterns in _PHASE_PATTERNS:
+        if any(p in location for p in patterns):
+            return phase
+    return 'other'
+
+
+def _totals(values):
+    grand_total = sum(values.values()) or 1
+    return [PhaseTotal(phase, values.get(phase, 0),
+                       100.0 * values.get(phase, 0) / grand_total)
+            for phase in PHASES]
+
+
+def phase_times(stats):
+    """Split the own time of every profiled function into phases.
+
+    :param stats: a :class:`pstats.Stats`
+    :returns: list of :class:`PhaseTotal` in seconds
+    """
+    values = collections.defaultdict(float)
+    for (filename, lineno, name), entry in stats.stats.items():
+        values[classify('%s:%s' % (filename, name))] += entry[2]
+    return _totals(values)
+
+
+def phase_memory(snapshot):
+    """Split the memory still allocated in ``snapshot`` into phases.
+
+    :returns: list of :class:`PhaseTotal` in bytes
+    """
+    values = collections.defaultdict(int)
+    for stat in snapshot.statistics('filename'):
+        filename = stat.traceback[0].filename
+        values[classify(filename)] += stat.size
+    return _totals(values)
+
+
+class Profiler(object):
+    """Context manager profiling the code it wraps.
+
+    :param path: file the pstats data is written to; with ``memory`` the
+                 top allocation sites are written to ``<path>.memory``.
+    :param memory: also trace memory allocations with tracemalloc.
+    :param top: number of hot spots printed in the summary.
+    :param stream: where the summary is printed, stderr by default.
+    """
+
+    def __init__(self, path, memory=False, top=10, stream=None):
+        self.path = path
+        self.memory = memory
+        self.top = top
+        self.stream = stream
+        self.profile = cProfile.Profile()
+        self.snapshot = None
+        self.peak_memory = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+        self.report()
+        return False
+
+    def start(self):
+        if self.memory:
+            tracemalloc.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        if self.memory:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def report(self):
+        """Write the stats files and print a summary of the hot spots."""
+        stream = self.stream or sys.stderr
+        self.profile.dump_stats(self.path)
+        stats = pstats.Stats(self.profile, stream=stream)
+
+        print('Profile written to %s' % self.path, file=stream)
+        print('Time by phase (own time):', file=stream)
+        for total in phase_times(stats):
+            print('  %-8s %9.3fs %5.1f%%' % total, file=stream)
+        print('Top %d functions by cumulative time:' % self.top,
+              file=stream)
+        stats.sort_stats('cumulative').print_stats(self.top)
+
+        if self.snapshot is not None:
+            memory_path = '%s.memory' % self.path
+            top_stats = self.snapshot.statistics('lineno')
+            with open(memory_path, 'w') as f:
+                for stat in top_stats[:100]:
+                    f.write('%s\n' % stat)
+            print('Peak traced memory: %.1f MiB, allocation sites written '
+                  'to %s' % (self.peak_memory / 1048576.0, memory_path),
+                  file=stream)
+            print('Memory still allocated by phase:', file=stream)
+            for phase, size, percent in phase_memory(self.snapshot):
+                print('  %-8s %9.1f KiB %5.1f%%'
+                      % (phase, size / 1024.0, percent), file=stream)
+            print('Top %d allocation sites:' % self.top, file=stream)
+            for stat in top_stats[:self.top]:
+                print('  %s' % stat, file=stream)
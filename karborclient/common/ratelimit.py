@@ -0,0 +1,140 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client side rate limiting of API requests with token buckets.
+
+Requests are split in reads (GET and HEAD) and writes (everything else),
+each class having its own rate, optionally with one bucket per resource
+collection so that a burst of checkpoint creates does not delay restores.
+"""
+
+import threading
+import time
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import metrics
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class TokenBucket(object):
+    """Allow ``rate`` operations per second, in bursts of up to ``burst``.
+
+    Tokens are handed out in order: a caller which has to wait reserves its
+    token, so later callers wait behind it.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, self.rate))
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """Take a token.
+
+        :param max_wait: do not take the token when it is not available
+                         within ``max_wait`` seconds.
+        :returns: seconds to wait before using the token, or None when it
+                  was not taken.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+
+class RateLimiter(object):
+    """Token bucket rate limits for the requests of a client.
+
+    :param read_rate: GET and HEAD requests per second, None for no limit.
+    :param write_rate: other requests per second, None for no limit.
+    :param burst: requests allowed at once after an idle period, by default
+                  one second worth of requests.
+    :param per_resource: keep one bucket per resource collection instead of
+                         one per class of requests.
+    :param block: wait for the request to be allowed; when False, raise
+                  :class:`RateLimitExceeded` instead.
+    :param max_wait: when blocking, raise instead of waiting for longer.
+    """
+
+    def __init__(self, read_rate=None, write_rate=None, burst=None,
+                 per_resource=False, block=True, max_wait=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.rates = {'read': read_rate, 'write': write_rate}
+        self.burst = burst
+        self.per_resource = per_resource
+        self.block = block
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, operation, resource):
+        key = (operation, resource if self.per_resource else None)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(
+                    self.rates[operation], self.burst, self._clock)
+        return bucket
+
+    def acquire(self, method, resource='', deadline=None):
+        """Wait until a request is allowed.
+
+        :param deadline: seconds left before the deadline of the operation,
+                         never waited past.
+        :returns: the seconds waited.
+        :raises RateLimitExceeded: if the request is not allowed now and
+                                   the limiter does not block, or not
+                                   within ``max_wait`` seconds.
+        """
+        operation = 'read' if method in READ_METHODS else 'write'
+        if not self.rates[operation]:
+            return 0.0
+        max_wait = self.max_wait if self.block else 0.0
+        if deadline is not None:
+            max_wait = deadline if max_wait is None else min(max_wait,
+                                                             deadline)
+        wait = self._bucket(operation, resource).reserve(max_wait)
+        labels = {'resource': resource, 'operation': operation}
+        if wait is None:
+            metrics.inc(metrics.RATE_LIMIT_REJECTED, labels)
+            raise exc.RateLimitExceeded(
+                'Client side %s rate limit of %s requests per second '
+                'exceeded' % (operation, self.rates[operation]))
+        if wait:
+            self._sleep(wait)
+        metrics.observe(metrics.RATE_LIMIT_WAIT, labels, wait)
+        return wait
+
+
+def get_rate_limiter(rate_limit):
+    """Return a :class:`RateLimiter` from its keyword arguments.
+
+    ``rate_limit`` may also be a limiter, shared between clients, or None.
+    """
+    if rate_limit is None or isinstance(rate_limit, RateLimiter):
+        return rate_limit
+    return RateLimiter(**rate_limit)
@@ -0,0 +1,218 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Record HTTP exchanges and replay them without a karbor API.
+
+Exchanges are stored one per line as JSON objects shaped like HAR entries
+(``startedDateTime``, ``time``, ``request`` and ``response``). Tokens and
+passwords are redacted before anything is written.
+"""
+
+import base64
+import collections
+import datetime
+import threading
+import time
+
+from oslo_serialization import jsonutils
+from oslo_utils import encodeutils
+import requests
+from requests import structures
+import six
+
+from karborclient.common.apiclient import exceptions as exc
+
+REDACTED = '***'
+# Keys of JSON bodies whose values are never recorded.
+SECRET_KEYS = ('password', 'token', 'auth_token', 'secret')
+# Headers carrying credentials, never recorded; compared in lower case.
+SECRET_HEADERS = ('authorization', 'x-auth-key', 'x-auth-token',
+                  'x-service-token', 'x-subject-token')
+
+
+def _redact(value):
+    if isinstance(value, dict):
+        return dict((k, REDACTED if k in SECRET_KEYS else _redact(v))
+                    for k, v in value.items())
+    if isinstance(value, list):
+        return [_redact(v) for v in value]
+    return value
+
+
+def _encode_body(body):
+    """Return the HAR ``content`` of a body, with secrets redacted."""
+    if body is None or body == b'' or body == '':
+        return None
+    if isinstance(body, six.text_type):
+        body = body.encode('utf-8')
+    if not isinstance(body, six.binary_type):
+        # File-like bodies are streamed and can not be recorded.
+        return {'text': None, 'size': None}
+    try:
+        text = body.decode('utf-8')
+    except UnicodeDecodeError:
+        return {'text': base64.b64encode(body).decode('ascii'),
+                'encoding': 'base64', 'size': len(body)}
+    try:
+        text = jsonutils.dumps(_redact(jsonutils.loads(text)))
+    except ValueError:
+        pass
+    return {'text': text, 'size': len(body)}
+
+
+def _decode_body(content):
+    if not content or content.get('text') is None:
+        return b''
+    if content.get('encoding') == 'base64':
+        return base64.b64decode(content['text'])
+    return content['text'].encode('utf-8')
+
+
+class Recorder(object):
+    """Append the HTTP exchanges of a client to ``path``.
+
+    :param path: JSON lines file, appended to.
+    :param safe_header: function returning the (name, value) of a header as
+                        it can be written, used to hash tokens.
+    """
+
+    def __init__(self, path, safe_header=None):
+        self.path = path
+        self.safe_header = safe_header or (lambda name, value: (name, value))
+        self._lock = threading.Lock()
+
+    def _headers(self, headers):
+        recorded = {}
+        for name, value in (headers or {}).items():
+            name = encodeutils.safe_decode(name)
+            if name.lower() in SECRET_HEADERS:
+                recorded[name] = REDACTED
+            else:
+                name, value = self.safe_header(
+                    name, encodeutils.safe_decode(value))
+                recorded[name] = value
+        return recorded
+
+    def record(self, method, url, kwargs, resp, started_at, elapsed):
+        """Record one exchange; ``url`` is relative to the endpoint."""
+        request = getattr(resp, 'request', None)
+        headers = getattr(request, 'headers', None) or kwargs.get('headers')
+        entry = {
+            'startedDateTime': datetime.datetime.fromtimestamp(
+                started_at, datetime.timezone.utc).isoformat(),
+            'time': round(elapsed * 1000, 3),
+            'request': {
+                'method': method,
+                'url': url,
+                'headers': self._headers(headers),
+                'postData': _encode_body(kwargs.get('data')),
+            },
+            'response': {
+                'status': resp.status_code,
+                'statusText': resp.reason,
+                'headers': self._headers(resp.headers),
+                'content': _encode_body(resp.content),
+            },
+        }
+        line = jsonutils.dumps(entry) + '\n'
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+
+
+def load(path):
+    """Return the list of entries recorded in ``path``."""
+    entries = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(jsonutils.loads(line))
+    return entries
+
+
+class _ReplayedRaw(object):
+    """Stands for the urllib3 response of a replayed exchange."""
+
+    version = 11
+
+
+class Player(object):
+    """Serve recorded responses instead of sending requests.
+
+    Requests are matched on their method and URL, in the recorded order;
+    the last response of a request is served again once the others were
+    used, which suits status polling.
+
+    :param path: file written by :class:`Recorder`.
+    :param speed: replay the recorded response times divided by ``speed``;
+                  1 keeps the original timing, 0 answers immediately.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+        self._entries = collections.defaultdict(collections.deque)
+        for entry in load(path):
+            request = entry['request']
+            self._entries[(request['method'], request['url'])].append(entry)
+        self._lock = threading.Lock()
+
+    def _next(self, method, url):
+        with self._lock:
+            entries = self._entries.get((method, url))
+            if not entries:
+                return None
+            if len(entries) > 1:
+                return entries.popleft()
+            return entries[0]
+
+    def respond(self, method, url, kwargs=None):
+        """Return the recorded :class:`requests.Response` for a request.
+
+        :raises ConnectionRefused: if the request was not recorded.
+        """
+        entry = self._next(method, url)
+        if entry is None:
+            raise exc.ConnectionRefused(
+                'No recorded response for %s %s in %s'
+                % (method, url, self.path))
+        if self.speed:
+            time.sleep(entry['time'] / 1000.0 / self.speed)
+
+        recorded = entry['response']
+        resp = requests.Response()
+        resp.status_code = recorded['status']
+        resp.reason = recorded.get('statusText')
+        resp.headers = structures.CaseInsensitiveDict(
+            recorded.get('headers') or {})
+        resp._content = _decode_body(recorded.get('content'))
+        resp._content_consumed = True
+        resp.url = url
+        resp.encoding = 'utf-8'
+        resp.raw = _ReplayedRaw()
+        return resp
+
+
+def get_recorder(record_file, safe_header=None):
+    """Return a :class:`Recorder` for a path, or the recorder itself."""
+    if record_file is None or isinstance(record_file, Recorder):
+        return record_file
+    return Recorder(record_file, safe_header)
+
+
+def get_player(replay_file, speed=1.0):
+    """Return a :class:`Player` for a path, or the player itself."""
+    if replay_file is None or isinstance(replay_file, Player):
+        return replay_file
+    return Player(replay_file, speed)
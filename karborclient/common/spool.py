@@ -0,0 +1,86 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Spill large response bodies to disk.
+
+Bodies up to a threshold are read in memory. Larger ones are written to an
+anonymous temporary file as they are received and memory-mapped to be
+decoded, so that the pages of the raw body are backed by the file instead
+of the process memory.
+"""
+
+import mmap
+import tempfile
+
+
+class SpilledBody(object):
+    """A response body held in a temporary file, mapped in memory.
+
+    Use as a context manager, or call :meth:`close`, to remove the file.
+    """
+
+    def __init__(self, fileobj, size):
+        self.size = size
+        self._file = fileobj
+        self._mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.size
+
+    def view(self):
+        """Return a memoryview of the body, to release before closing."""
+        return memoryview(self._mmap)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def read_body(chunks, threshold):
+    """Read a body from an iterable of byte chunks.
+
+    :returns: the body as bytes when it has at most ``threshold`` bytes,
+              a :class:`SpilledBody` otherwise.
+    """
+    buffered = []
+    size = 0
+    chunks = iter(chunks)
+    for chunk in chunks:
+        buffered.append(chunk)
+        size += len(chunk)
+        if size > threshold:
+            break
+    else:
+        return b''.join(buffered)
+
+    fileobj = tempfile.TemporaryFile()
+    try:
+        for chunk in buffered:
+            fileobj.write(chunk)
+        del buffered
+        for chunk in chunks:
+            fileobj.write(chunk)
+            size += len(chunk)
+        fileobj.flush()
+        return SpilledBody(fileobj, size)
+    except Exception:
+        fileobj.close()
+        raise
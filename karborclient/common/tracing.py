@@ -0,0 +1,284 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Optional tracing of client operations.
+
+Spans are opened for shell commands, manager operations and HTTP requests,
+nested by thread. Tracing is off until :func:`configure` or :func:`setup`
+is called; spans are then sent to OpenTelemetry when its API is installed,
+or written as JSON lines otherwise.
+"""
+
+import binascii
+import contextlib
+import os
+import sys
+import threading
+import time
+
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+
+REQUEST_ID_HEADERS = ('x-openstack-request-id', 'x-compute-request-id')
+
+_tracer = None
+
+
+def configure(tracer):
+    """Send spans to ``tracer``; None disables tracing."""
+    global _tracer
+    _tracer = tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def get_tracer():
+    return _tracer
+
+
+def setup(path=None):
+    """Enable tracing with the best available backend.
+
+    Uses OpenTelemetry when its API is installed and ``path`` is not given,
+    otherwise writes JSON lines to ``path`` (or stderr).
+    """
+    tracer = None
+    if path is None:
+        try:
+            tracer = OpenTelemetryTracer()
+        except ImportError:
+            pass
+    if tracer is None:
+        tracer = JsonLinesTracer(path)
+    configure(tracer)
+    return tracer
+
+
+def span(name, **attributes):
+    """Return a context manager tracing ``name``, or a no-op one."""
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.start_span(name, attributes)
+
+
+def current_context():
+    """Return the active span of this thread, for spans of other threads.
+
+    Pass it to :func:`attach` in a thread started for the same operation.
+    """
+    if _tracer is None:
+        return None
+    return _tracer.current_context()
+
+
+@contextlib.contextmanager
+def attach(context):
+    """Parent the spans started in the block with ``context``.
+
+    :param context: value of :func:`current_context` in another thread.
+    """
+    if _tracer is None or context is None:
+        yield
+        return
+    with _tracer.attach(context):
+        yield
+
+
+def request_id(resp):
+    """Return the request ID the server attached to a response."""
+    headers = getattr(resp, 'headers', None) or {}
+    for header in REQUEST_ID_HEADERS:
+        value = headers.get(header)
+        if value:
+            return value
+    return None
+
+
+def _new_id(nbytes):
+    return binascii.hexlify(os.urandom(nbytes)).decode('ascii')
+
+
+class _NoopSpan(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span(object):
+    """A timed operation; use it as a context manager."""
+
+    def __init__(self, tracer, name, attributes, parent=None):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else _new_id(16)
+        self.span_id = _new_id(8)
+        self.status = 'ok'
+        self.start_time = None
+        self.end_time = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_time = time.time()
+        self.tracer._push(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.end_time = time.time()
+        if exc_type is not None:
+            self.status = 'error'
+            self.attributes['error.type'] = exc_type.__name__
+        self.tracer._pop(self)
+        self.tracer.export(self)
+        return False
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start_time,
+            'end': self.end_time,
+            'duration': self.end_time - self.start_time,
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class Tracer(object):
+    """Base tracer keeping a stack of active spans per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self, span):
+        self._stack().append(span)
+
+    def _pop(self, span):
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+
+    def current_span(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def start_span(self, name, attributes=None):
+        return Span(self, name, attributes, parent=self.current_span())
+
+    def current_context(self):
+        return self.current_span()
+
+    @contextlib.contextmanager
+    def attach(self, span):
+        self._push(span)
+        try:
+            yield
+        finally:
+            self._pop(span)
+
+    def export(self, span):
+        pass
+
+
+class JsonLinesTracer(Tracer):
+    """Write one JSON object per finished span.
+
+    :param path: file to append to; stderr is used when None.
+    """
+
+    def __init__(self, path=None):
+        super(JsonLinesTracer, self).__init__()
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = jsonutils.dumps(span.to_dict()) + '\n'
+        with self._lock:
+            if self.path is None:
+                sys.stderr.write(line)
+            else:
+                with open(self.path, 'a') as f:
+                    f.write(line)
+
+
+class _OpenTelemetrySpan(object):
+
+    def __init__(self, tracer, name, attributes):
+        self._tracer = tracer
+        self._name = name
+        self._attributes = attributes
+        self._span = None
+        self._context = None
+
+    def set_attribute(self, key, value):
+        self._span.set_attribute(key, value)
+
+    def __enter__(self):
+        self._context = self._tracer.start_as_current_span(
+            self._name, attributes=self._attributes)
+        self._span = self._context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return self._context.__exit__(exc_type, exc_value, tb)
+
+
+class OpenTelemetryTracer(object):
+    """Forward spans to the OpenTelemetry API.
+
+    :raises ImportError: if ``opentelemetry`` is not installed.
+    """
+
+    def __init__(self, tracer_provider=None):
+        trace = importutils.import_module('opentelemetry.trace')
+        self._tracer = trace.get_tracer('karborclient',
+                                        tracer_provider=tracer_provider)
+        self._context = importutils.import_module('opentelemetry.context')
+
+    def start_span(self, name, attributes=None):
+        attributes = dict((k, v) for k, v in (attributes or {}).items()
+                          if v is not None)
+        return _OpenTelemetrySpan(self._tracer, name, attributes)
+
+    def current_context(self):
+        return self._context.get_current()
+
+    @contextlib.contextmanager
+    def attach(self, context):
+        token = self._context.attach(context)
+        try:
+            yield
+        finally:
+            self._context.detach(token)
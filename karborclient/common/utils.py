@@ -24,6 +24,7 @@ from oslo_utils import encodeutils
 import prettytable
 
 from karborclient.common.apiclient import exceptions
+from karborclient.common import http
 
 
 # Decorator for cli-args
@@ -132,6 +133,36 @@ def print_dict(d, property="Property", dict_format_list=None,
     _print(pt, property)
 
 
+def print_timings(timings):
+    """Prints one row per API request recorded by the http client.
+
+    :param timings: list of :class:`karborclient.common.http.RequestTiming`
+    """
+    fields = ['Method', 'URL', 'Status', 'Response bytes', 'Wire bytes',
+              'Elapsed']
+    formatters = {'Elapsed': lambda t: '%.3f' % t.elapsed}
+    print_list(timings, fields, formatters=formatters, sortby_index=None)
+    print('Total: %d requests, %.3f seconds'
+          % (len(timings), sum(t.elapsed for t in timings)))
+
+
+def print_api_stats(command, timings):
+    """Prints API request statistics aggregated per URL template.
+
+    :param command: name of the command the requests were made for
+    :param timings: list of :class:`karborclient.common.http.RequestTiming`
+    """
+    stats = http.summarize_timings(timings)
+    fields = ['Method', 'URL template', 'Count', 'Errors', 'Total', 'Mean',
+              'Max', 'Response bytes', 'Wire bytes']
+    formatters = dict((f, lambda s, a=f.lower(): '%.3f' % getattr(s, a))
+                      for f in ('Total', 'Mean', 'Max'))
+    print("API statistics for '%s': %d requests, %.3f seconds"
+          % (command, sum(s.count for s in stats),
+             sum(s.total for s in stats)))
+    print_list(stats, fields, formatters=formatters, sortby_index=None)
+
+
 def dict_prettyprint(val):
     """dict pretty print formatter.
 
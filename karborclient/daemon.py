@@ -0,0 +1,307 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Local daemon running karbor commands for the command-line interface.
+
+``karbor daemon`` listens on a Unix socket and runs the commands it receives
+with a :class:`karborclient.shell.KarborShell` which keeps its API clients,
+so authentication, endpoint discovery and connections are reused. The
+``karbor`` entry point is :func:`main`: it sends its arguments and the
+environment variables read by the shell to the daemon when one answers and
+runs the command in-process otherwise.
+
+The socket must be in a directory private to the user, and the client only
+talks to a daemon of the same user, since the environment it sends holds
+credentials.
+
+This module is imported on every ``karbor`` run and only uses the standard
+library at import time, so forwarding a command stays cheap.
+"""
+
+from __future__ import print_function
+
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import traceback
+
+DEFAULT_IDLE_TIMEOUT = 900
+# Disables the forwarding of commands to the daemon when set.
+NO_DAEMON_ENV = 'KARBORCLIENT_NO_DAEMON'
+SOCKET_ENV = 'KARBORCLIENT_DAEMON_SOCKET'
+# Environment variables read by the shell, the only ones sent to the daemon.
+SHELL_ENV_PREFIXES = ('OS_', 'KARBOR')
+SHELL_ENV = ('ALL_TENANTS',)
+
+
+def socket_path():
+    """Return the path of the daemon socket of the current user.
+
+    A path set in the environment must also be in a directory private to
+    the user.
+    """
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        directory = os.path.join(runtime_dir, 'karborclient')
+    else:
+        directory = os.path.join(tempfile.gettempdir(),
+                                 'karborclient-%d' % os.getuid())
+    return os.path.join(directory, 'daemon.sock')
+
+
+def _shell_env(environ):
+    return {name: value for name, value in environ.items()
+            if name.startswith(SHELL_ENV_PREFIXES) or name in SHELL_ENV}
+
+
+def check_directory(directory):
+    """Make sure only the current user can use the sockets of a directory.
+
+    :raises RuntimeError: if the directory is not owned by the user or is
+                          accessible to others.
+    """
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or \
+            stat.S_IMODE(info.st_mode) != 0o700:
+        raise RuntimeError('The karbor daemon socket directory %s must be '
+                           'owned by the user with mode 0700' % directory)
+
+
+def _read(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+def _connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except (IOError, OSError):
+        sock.close()
+        return None
+    return sock
+
+
+def _peer_uid(conn):
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                            struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+
+def forward(argv, path=None):
+    """Run a command in the daemon.
+
+    :returns: tuple of the exit code, output and error output of the
+              command, or None when no daemon is listening on ``path``.
+    """
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        check_directory(os.path.dirname(path))
+    except RuntimeError as e:
+        print('%s; not using the daemon.' % e, file=sys.stderr)
+        return None
+    sock = _connect(path)
+    if sock is None:
+        # Stale socket of a daemon which did not stop cleanly.
+        return None
+    with contextlib.closing(sock):
+        uid = _peer_uid(sock)
+        if uid is not None and uid != os.getuid():
+            print('The karbor daemon socket %s belongs to another user; '
+                  'not using the daemon.' % path, file=sys.stderr)
+            return None
+        request = {'argv': list(argv), 'env': _shell_env(os.environ),
+                   'cwd': os.getcwd()}
+        sock.sendall(json.dumps(request).encode('utf-8'))
+        sock.shutdown(socket.SHUT_WR)
+        reply = _read(sock)
+    if not reply:
+        return 1, '', 'The karbor daemon closed the connection.\n'
+    reply = json.loads(reply.decode('utf-8'))
+    return reply['code'], reply['stdout'], reply['stderr']
+
+
+class Daemon(object):
+    """Serve the commands sent by :func:`forward` until idle.
+
+    :param path: Unix socket to listen on, :func:`socket_path` by default.
+    :param idle_timeout: seconds without any command after which the daemon
+                         stops; 0 or None never stops.
+    """
+
+    def __init__(self, path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.path = path or socket_path()
+        self.idle_timeout = idle_timeout
+        # API clients kept by the shell between commands.
+        self.clients = {}
+        self._socket = None
+        self._stopped = False
+
+    def bind(self):
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        check_directory(directory)
+        if os.path.exists(self.path):
+            sock = _connect(self.path)
+            if sock is not None:
+                sock.close()
+                raise RuntimeError('A karbor daemon is already listening '
+                                   'on %s' % self.path)
+            os.unlink(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            self._socket.bind(self.path)
+        finally:
+            os.umask(umask)
+        self._socket.listen(16)
+        self._socket.settimeout(self.idle_timeout or None)
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def serve(self):
+        """Serve commands one at a time until the idle timeout expires."""
+        if self._socket is None:
+            self.bind()
+        try:
+            while True:
+                try:
+                    conn, _address = self._socket.accept()
+                except socket.timeout:
+                    return
+                with contextlib.closing(conn):
+                    if self._stopped:
+                        return
+                    self._handle(conn)
+        finally:
+            self.close()
+
+    def stop(self):
+        """Make :meth:`serve` return, from another thread."""
+        self._stopped = True
+        sock = _connect(self.path)
+        if sock is not None:
+            sock.close()
+
+    def _handle(self, conn):
+        conn.settimeout(None)
+        uid = _peer_uid(conn)
+        if uid is not None and uid != os.getuid():
+            return
+        request = _read(conn)
+        if not request:
+            return
+        request = json.loads(request.decode('utf-8'))
+        code, stdout, stderr = self.run(request['argv'],
+                                        request.get('env', {}),
+                                        request.get('cwd'))
+        reply = {'code': code, 'stdout': stdout, 'stderr': stderr}
+        conn.sendall(json.dumps(reply).encode('utf-8'))
+
+    def run(self, argv, env, cwd=None):
+        """Run a command with the shell environment and directory of a caller.
+
+        :returns: tuple of the exit code, output and error output.
+        """
+        from karborclient.common import tracing
+        from karborclient import shell
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        environ = dict(os.environ)
+        workdir = os.getcwd()
+        root_handlers = list(logging.getLogger().handlers)
+        tracer = tracing.get_tracer()
+        # The shell variables of the daemon must not leak into the command.
+        os.environ.clear()
+        daemon_env = _shell_env(environ)
+        os.environ.update((name, value) for name, value in environ.items()
+                          if name not in daemon_env)
+        os.environ.update(_shell_env(env))
+        try:
+            if cwd:
+                os.chdir(cwd)
+            with contextlib.redirect_stdout(stdout), \
+                    contextlib.redirect_stderr(stderr):
+                code = self._run_shell(shell, argv)
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+            os.chdir(workdir)
+            # Every run of the shell adds its log handler.
+            logging.getLogger().handlers[:] = root_handlers
+            tracing.configure(tracer)
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def _run_shell(self, shell, argv):
+        try:
+            shell.KarborShell(clients=self.clients).main(list(argv))
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            print(e.code, file=sys.stderr)
+            return 1
+        except Exception as e:
+            if '--debug' in argv or '-d' in argv:
+                traceback.print_exc()
+            else:
+                print(e, file=sys.stderr)
+            return 1
+        return 0
+
+
+def _forwardable(argv):
+    # Commands reading the standard input and the daemon itself run
+    # in-process.
+    return (not os.environ.get(NO_DAEMON_ENV) and 'daemon' not in argv and
+            '-' not in argv)
+
+
+def main(args=None):
+    """Entry point of ``karbor``."""
+    if args is None:
+        args = sys.argv[1:]
+    if _forwardable(args):
+        result = forward(args)
+        if result is not None:
+            code, stdout, stderr = result
+            sys.stdout.write(stdout)
+            sys.stderr.write(stderr)
+            sys.exit(code)
+
+    from karborclient import shell
+    shell.main(args)
@@ -0,0 +1,975 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+In-process fake of the karbor v1 API.
+
+:class:`FakeKarborAPI` is a WSGI application serving the endpoints used by
+``karborclient.v1`` from a deterministic :class:`Dataset`, with marker,
+limit, sort and filter semantics, status progression of checkpoints,
+restores and verifications, and configurable latency, jitter and error
+injection. :class:`FakeServer` serves it on an ephemeral local port with
+HTTP/1.1 keep-alive::
+
+    with fake_server.FakeServer(checkpoints=100000) as server:
+        client = karbor_client.Client('1', server.endpoint,
+                                      token='token',
+                                      project_id=server.project_id)
+        client.checkpoints.list(fake_server.PROVIDER_ID, limit=1000)
+
+It can also be started from the command line for manual or CLI testing::
+
+    python -m karborclient.fake_server --port 8799
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import datetime
+import gzip
+import io
+import random
+import threading
+import time
+import uuid
+
+from oslo_serialization import jsonutils
+from six.moves import BaseHTTPServer
+from six.moves import http_client
+from six.moves import socketserver
+from six.moves.urllib import parse
+
+PROJECT_ID = '3e4f7f2cbb3f4d1c8d3cbd3b0e3c5a3a'
+PROVIDER_ID = 'cf56bd3e-97a7-4078-b6d5-f36246333fd9'
+NOOP_PROVIDER_ID = 'b766f37c-d011-4026-8228-28730d734a3f'
+
+PROTECTABLE_TYPES = {
+    'OS::Keystone::Project': ['OS::Nova::Server', 'OS::Cinder::Volume',
+                              'OS::Glance::Image'],
+    'OS::Nova::Server': ['OS::Cinder::Volume', 'OS::Glance::Image'],
+    'OS::Cinder::Volume': [],
+    'OS::Glance::Image': [],
+}
+
+DEFAULT_QUOTA = {'plans': 50, 'checkpoints': -1}
+
+# Statuses a created resource goes through, one step per show request.
+STATUS_PROGRESSION = {
+    'checkpoints': ('protecting', 'available'),
+    'restores': ('in_progress', 'success'),
+    'verifications': ('in_progress', 'success'),
+}
+
+ERROR_NAMES = {
+    400: 'badRequest',
+    404: 'itemNotFound',
+    409: 'conflict',
+    413: 'overLimit',
+    429: 'overLimit',
+    500: 'computeFault',
+    503: 'serviceUnavailable',
+}
+
+_EPOCH = datetime.datetime(2020, 1, 1)
+
+# URL path -> (collection key, member key) of the top-level collections.
+_COLLECTIONS = {
+    'plans': ('plans', 'plan'),
+    'restores': ('restores', 'restore'),
+    'verifications': ('verifications', 'verification'),
+    'triggers': ('triggers', 'trigger_info'),
+    'scheduled_operations': ('operations', 'scheduled_operation'),
+    'operation_logs': ('operation_logs', 'operation_log'),
+    'providers': ('providers', 'provider'),
+    'os-services': ('services', 'service'),
+}
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message, headers=None):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Collection(object):
+    """Records of one collection, kept in insertion order."""
+
+    def __init__(self):
+        self.records = collections.OrderedDict()
+        self.version = 0
+        self._sorted = {}
+
+    def add(self, record):
+        self.records[record['id']] = record
+        self.version += 1
+        return record
+
+    def get(self, record_id):
+        try:
+            return self.records[record_id]
+        except KeyError:
+            raise HTTPError(404, 'Resource %s could not be found.'
+                            % record_id)
+
+    def delete(self, record_id):
+        self.get(record_id)
+        del self.records[record_id]
+        self.version += 1
+
+    def changed(self):
+        self.version += 1
+
+    def sorted(self, sort):
+        """Return the records ordered by ``sort``, a list of (key, dir)."""
+        key = tuple(sort)
+        cached = self._sorted.get(key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        records = list(self.records.values())
+        # Stable sorts applied from the least significant key.
+        for sort_key, sort_dir in reversed(sort):
+            records.sort(key=lambda r: (r.get(sort_key) is not None,
+                                        r.get(sort_key)),
+                         reverse=sort_dir == 'desc')
+        self._sorted[key] = (self.version, records)
+        return records
+
+
+class Dataset(object):
+    """Deterministic karbor resources.
+
+    The same arguments always produce the same IDs, names and timestamps.
+
+    :param seed: seed of the ID and timestamp generator.
+    :param checkpoints: number of checkpoints of the default provider.
+    :param instances: number of instances of each protectable type.
+    """
+
+    def __init__(self, seed=0, plans=10, checkpoints=100, restores=10,
+                 verifications=10, triggers=10, scheduled_operations=10,
+                 operation_logs=10, instances=10, project_id=PROJECT_ID):
+        self.project_id = project_id
+        self._random = random.Random(seed)
+        self._clock = 0
+        self.collections = collections.defaultdict(Collection)
+        self.quotas = {}
+        self.quota_classes = {'default': dict(DEFAULT_QUOTA)}
+
+        self._add_providers()
+        self._add_services()
+        for protectable_type in PROTECTABLE_TYPES:
+            for i in range(instances):
+                self.add_instance(protectable_type, i)
+        plan_records = [self.add_plan(i) for i in range(plans)]
+        trigger_records = [self.add_trigger(i) for i in range(triggers)]
+        for i in range(checkpoints):
+            plan = plan_records[i % len(plan_records)] if plan_records \
+                else None
+            self.add_checkpoint(PROVIDER_ID, plan, i)
+        checkpoint_ids = list(self.checkpoints(PROVIDER_ID).records)
+        for i in range(restores):
+            self.add_restore(checkpoint_ids[i % len(checkpoint_ids)]
+                             if checkpoint_ids else None, i)
+        for i in range(verifications):
+            self.add_verification(checkpoint_ids[i % len(checkpoint_ids)]
+                                  if checkpoint_ids else None, i)
+        for i in range(scheduled_operations):
+            self.add_scheduled_operation(
+                trigger_records[i % len(trigger_records)]['id']
+                if trigger_records else None,
+                plan_records[i % len(plan_records)]['id']
+                if plan_records else None, i)
+        for i in range(operation_logs):
+            self.add_operation_log(i)
+
+    def new_id(self):
+        return str(uuid.UUID(int=self._random.getrandbits(128), version=4))
+
+    def now(self):
+        self._clock += 1
+        return (_EPOCH + datetime.timedelta(seconds=self._clock)).isoformat()
+
+    def collection(self, name):
+        return self.collections[name]
+
+    def checkpoints(self, provider_id):
+        return self.collections['providers/%s/checkpoints' % provider_id]
+
+    def instances(self, protectable_type):
+        return self.collections['protectables/%s/instances'
+                                % protectable_type]
+
+    def _add_providers(self):
+        providers = self.collection('providers')
+        providers.add({
+            'id': PROVIDER_ID,
+            'name': 'OS Infra Provider',
+            'description': 'This provider uses OpenStack\'s own services '
+                           '(swift, cinder) as storage',
+            'extended_info_schema': {
+                'options_schema': {},
+                'restore_schema': {},
+                'saved_info_schema': {},
+            },
+        })
+        providers.add({
+            'id': NOOP_PROVIDER_ID,
+            'name': 'No-Op Provider',
+            'description': 'This provider does nothing for each '
+                           'protect and restore operation.',
+            'extended_info_schema': {},
+        })
+
+    def _add_services(self):
+        services = self.collection('os-services')
+        for i, binary in enumerate(('karbor-operationengine',
+                                    'karbor-protection')):
+            services.add({
+                'id': i + 1,
+                'binary': binary,
+                'host': 'karbor-host',
+                'zone': 'nova',
+                'status': 'enabled',
+                'state': 'up',
+                'updated_at': self.now(),
+                'disabled_reason': None,
+            })
+
+    def add_instance(self, protectable_type, i):
+        return self.instances(protectable_type).add({
+            'id': self.new_id(),
+            'type': protectable_type,
+            'name': '%s-%d' % (protectable_type.split('::')[-1].lower(), i),
+            'dependent_resources': [],
+            'extra_info': None,
+        })
+
+    def add_plan(self, i, **values):
+        plan = {
+            'id': self.new_id(),
+            'name': 'plan-%d' % i,
+            'description': None,
+            'status': 'suspended',
+            'provider_id': PROVIDER_ID,
+            'project_id': self.project_id,
+            'resources': [],
+            'parameters': {},
+            'created_at': self.now(),
+        }
+        plan.update(values)
+        return self.collection('plans').add(plan)
+
+    def add_trigger(self, i, **values):
+        trigger = {
+            'id': self.new_id(),
+            'name': 'trigger-%d' % i,
+            'type': 'time',
+            'properties': {'format': 'calendar',
+                           'pattern': 'BEGIN:VEVENT\nRRULE:FREQ=HOURLY;\n'
+                                      'END:VEVENT',
+                           'window': 1800},
+            'project_id': self.project_id,
+            'created_at': self.now(),
+        }
+        trigger.update(values)
+        return self.collection('triggers').add(trigger)
+
+    def add_checkpoint(self, provider_id, plan, i, **values):
+        checkpoint = {
+            'id': self.new_id(),
+            'project_id': self.project_id,
+            'status': 'available',
+            'protection_plan': None,
+            'resource_graph': None,
+            'extra_info': {'created_by': 'manual'},
+            'created_at': self.now(),
+        }
+        if plan is not None:
+            checkpoint['protection_plan'] = {
+                'id': plan['id'],
+                'name': plan['name'],
+                'provider_id': provider_id,
+                'resources': plan['resources'],
+            }
+        checkpoint.update(values)
+        return self.checkpoints(provider_id).add(checkpoint)
+
+    def add_restore(self, checkpoint_id, i, **values):
+        restore = {
+            'id': self.new_id(),
+            'project_id': self.project_id,
+            'provider_id': PROVIDER_ID,
+            'checkpoint_id': checkpoint_id,
+            'restore_target': None,
+            'parameters': {},
+            'status': 'success',
+            'resources_status': {},
+            'resources_reason': {},
+            'created_at': self.now(),
+        }
+        restore.update(values)
+        return self.collection('restores').add(restore)
+
+    def add_verification(self, checkpoint_id, i, **values):
+        verification = {
+            'id': self.new_id(),
+            'project_id': self.project_id,
+            'provider_id': PROVIDER_ID,
+            'checkpoint_id': checkpoint_id,
+            'parameters': {},
+            'status': 'success',
+            'resources_status': {},
+            'resources_reason': {},
+            'created_at': self.now(),
+        }
+        verification.update(values)
+        return self.collection('verifications').add(verification)
+
+    def add_scheduled_operation(self, trigger_id, plan_id, i, **values):
+        operation = {
+            'id': self.new_id(),
+            'name': 'operation-%d' % i,
+            'description': None,
+            'operation_type': 'protect',
+            'trigger_id': trigger_id,
+            'operation_definition': {'plan_id': plan_id,
+                                     'provider_id': PROVIDER_ID},
+            'enabled': True,
+            'project_id': self.project_id,
+            'created_at': self.now(),
+        }
+        operation.update(values)
+        return self.collection('scheduled_operations').add(operation)
+
+    def add_operation_log(self, i, **values):
+        log = {
+            'id': self.new_id(),
+            'project_id': self.project_id,
+            'operation_type': 'protect',
+            'checkpoint_id': None,
+            'plan_id': None,
+            'provider_id': PROVIDER_ID,
+            'restore_id': None,
+            'scheduled_operation_id': None,
+            'status': 'success',
+            'started_at': self.now(),
+            'ended_at': None,
+            'error_info': None,
+            'extra_info': None,
+            'created_at': self.now(),
+        }
+        log.update(values)
+        return self.collection('operation_logs').add(log)
+
+
+def _parse_sort(query):
+    """Return the requested sort as a list of (key, direction)."""
+    sort = []
+    if 'sort' in query:
+        for item in query['sort'].split(','):
+            key, _sep, direction = item.partition(':')
+            sort.append((key.strip(), direction.strip() or 'desc'))
+    elif 'sort_key' in query:
+        keys = query['sort_key'].split(',')
+        dirs = query.get('sort_dir', 'desc').split(',')
+        for i, key in enumerate(keys):
+            sort.append((key, dirs[min(i, len(dirs) - 1)]))
+    for direction in (d for _k, d in sort):
+        if direction not in ('asc', 'desc'):
+            raise HTTPError(400, 'Invalid sort direction %s' % direction)
+    keys = [k for k, _d in sort]
+    # Default order of the karbor API, made total with the ID.
+    if 'created_at' not in keys:
+        sort.append(('created_at', 'desc'))
+    if 'id' not in keys:
+        sort.append(('id', 'desc'))
+    return sort
+
+
+def _matches(record, filters):
+    for key, value in filters.items():
+        if key == 'plan_id' and 'protection_plan' in record:
+            # Checkpoints are filtered by the plan they protect.
+            plan = record['protection_plan'] or {}
+            if plan.get('id') != value:
+                return False
+            continue
+        if key not in record:
+            continue
+        if str(record[key]) != value:
+            return False
+    return True
+
+
+class FakeKarborAPI(object):
+    """WSGI application emulating karbor-api v1.
+
+    :param dataset: the :class:`Dataset` served; extra keyword arguments
+                    create one.
+    :param latency: seconds added to every response.
+    :param jitter: random extra delay, uniform between 0 and ``jitter``.
+    :param error_rates: dict of HTTP status to the probability a request
+                        fails with it, e.g. ``{429: 0.1, 503: 0.01}``.
+    :param retry_after: Retry-After header of injected 429 and 503
+                        responses.
+    :param max_limit: maximum page size, like osapi_max_limit; None for
+                      no limit.
+    :param polls_per_status: number of show requests after which a created
+                             checkpoint, restore or verification moves to
+                             its next status.
+    :param seed: seed of the latency and error injection.
+    :param gzip_min_size: gzip the responses of at least this many bytes to
+                          clients accepting it; None never compresses.
+                          Gzipped request bodies are always accepted.
+    """
+
+    def __init__(self, dataset=None, latency=0, jitter=0, error_rates=None,
+                 retry_after=1, max_limit=1000, polls_per_status=1, seed=0,
+                 gzip_min_size=None, **dataset_kwargs):
+        self.dataset = dataset or Dataset(seed=seed, **dataset_kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rates = dict(error_rates or {})
+        self.retry_after = retry_after
+        self.max_limit = max_limit
+        self.polls_per_status = polls_per_status
+        self.gzip_min_size = gzip_min_size
+        self.requests = []
+        self._random = random.Random(seed)
+        self._failures = collections.deque()
+        self._progress = {}
+        self._lock = threading.RLock()
+
+    @property
+    def project_id(self):
+        return self.dataset.project_id
+
+    def fail_next(self, status, count=1, retry_after=None):
+        """Make the next ``count`` requests fail with ``status``."""
+        with self._lock:
+            for _ in range(count):
+                self._failures.append((status, retry_after))
+
+    def reset_requests(self):
+        with self._lock:
+            del self.requests[:]
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        path = environ.get('PATH_INFO', '')
+        query = dict(parse.parse_qsl(environ.get('QUERY_STRING', '')))
+        with self._lock:
+            self.requests.append((method, path, query))
+            delay, failure = self._faults()
+        if delay:
+            time.sleep(delay)
+
+        headers = [('Content-Type', 'application/json'),
+                   ('X-OpenStack-Request-ID', 'req-%s' % uuid.uuid4())]
+        try:
+            if failure is not None:
+                status, retry_after = failure
+                if retry_after is None:
+                    retry_after = self.retry_after
+                raise HTTPError(status, 'Injected failure',
+                                {'Retry-After': str(retry_after)})
+            body = self._read_body(environ)
+            with self._lock:
+                status, result = self._dispatch(method, path, query, body)
+        except HTTPError as e:
+            status = e.status
+            result = {ERROR_NAMES.get(e.status, 'error'): {
+                'message': e.message, 'code': e.status}}
+            headers.extend(e.headers.items())
+
+        content = b'' if result is None else jsonutils.dump_as_bytes(result)
+        if self.gzip_min_size is not None and \
+                len(content) >= self.gzip_min_size and \
+                'gzip' in environ.get('HTTP_ACCEPT_ENCODING', ''):
+            content = gzip.compress(content)
+            headers.append(('Content-Encoding', 'gzip'))
+        headers.append(('Content-Length', str(len(content))))
+        start_response('%d %s' % (status, http_client.responses.get(
+            status, '')), headers)
+        return [content]
+
+    def _faults(self):
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if self._failures:
+            return delay, self._failures.popleft()
+        for status, rate in sorted(self.error_rates.items()):
+            if self._random.random() < rate:
+                return delay, (status, None)
+        return delay, None
+
+    @staticmethod
+    def _read_body(environ):
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        if not length:
+            return None
+        body = environ['wsgi.input'].read(length)
+        try:
+            if environ.get('HTTP_CONTENT_ENCODING') == 'gzip':
+                body = gzip.decompress(body)
+            return jsonutils.loads(body)
+        except (IOError, ValueError):
+            raise HTTPError(400, 'Malformed request body')
+
+    def _dispatch(self, method, path, query, body):
+        parts = [p for p in path.split('/') if p]
+        # Endpoints look like http://host:8799/v1/<project_id>
+        if parts[:1] == ['v1']:
+            parts = parts[2:]
+        if not parts:
+            raise HTTPError(404, 'Not found')
+        name = parts[0]
+        handler = getattr(self, '_%s_%s' % (
+            method.lower(), name.replace('-', '_')), None)
+        if handler is not None:
+            return handler(parts[1:], query, body)
+        if name in _COLLECTIONS:
+            return self._generic(method, name, parts[1:], query, body)
+        raise HTTPError(404, 'Not found')
+
+    def _generic(self, method, name, parts, query, body):
+        collection_key, member_key = _COLLECTIONS[name]
+        collection = self.dataset.collection(name)
+        if not parts or parts == ['detail']:
+            if method == 'GET':
+                return self._list(collection, collection_key, name, query)
+            if method == 'POST' and not parts:
+                values = self._member(body, member_key)
+                return 200, {member_key: self._create(name, values)}
+        elif len(parts) == 1:
+            record_id = parts[0]
+            if method == 'GET':
+                return 200, {member_key: self._show(name, collection,
+                                                    record_id)}
+            if method == 'PUT':
+                values = self._member(body, member_key)
+                record = collection.get(record_id)
+                record.update(values)
+                collection.changed()
+                return 200, {member_key: record}
+            if method == 'DELETE':
+                collection.delete(record_id)
+                return 202, None
+        raise HTTPError(405, 'Method not allowed')
+
+    @staticmethod
+    def _member(body, key):
+        if not isinstance(body, dict) or not isinstance(body.get(key),
+                                                        dict):
+            raise HTTPError(400, 'Missing %s in request body' % key)
+        return body[key]
+
+    def _list(self, collection, collection_key, path, query):
+        query = dict(query)
+        query.pop('all_tenants', None)
+        try:
+            limit = int(query.pop('limit', 0)) or None
+        except ValueError:
+            raise HTTPError(400, 'limit param must be an integer')
+        if limit is not None and limit < 0:
+            raise HTTPError(400, 'limit param must be positive')
+        if self.max_limit is not None:
+            limit = min(limit or self.max_limit, self.max_limit)
+        marker = query.pop('marker', None)
+        sort = _parse_sort(query)
+        for key in ('sort', 'sort_key', 'sort_dir'):
+            query.pop(key, None)
+
+        records = collection.sorted(sort)
+        start = 0
+        if marker is not None:
+            if marker not in collection.records:
+                raise HTTPError(400, 'Marker %s could not be found.'
+                                % marker)
+            marker_record = collection.records[marker]
+            start = next(i for i, r in enumerate(records)
+                         if r is marker_record) + 1
+        page = []
+        for record in records[start:] if query else \
+                records[start:start + limit if limit else None]:
+            if query and not _matches(record, query):
+                continue
+            page.append(record)
+            if limit and len(page) == limit:
+                break
+
+        result = {collection_key: page}
+        if limit and len(page) == limit:
+            next_query = dict(query, limit=limit, marker=page[-1]['id'])
+            result['%s_links' % collection_key] = [{
+                'rel': 'next',
+                'href': '/v1/%s/%s?%s' % (self.project_id, path,
+                                          parse.urlencode(
+                                              sorted(next_query.items()))),
+            }]
+        return 200, result
+
+    def _show(self, name, collection, record_id):
+        record = collection.get(record_id)
+        progress = self._progress.get((name, record_id))
+        if progress:
+            progress['polls'] += 1
+            if progress['polls'] >= self.polls_per_status:
+                progress['polls'] = 0
+                record['status'] = progress['statuses'].pop(0)
+                collection.changed()
+                if not progress['statuses']:
+                    del self._progress[(name, record_id)]
+        return record
+
+    def _track(self, name, record):
+        statuses = list(STATUS_PROGRESSION.get(name.split('/')[-1], ()))
+        if statuses:
+            record['status'] = statuses.pop(0)
+            if statuses:
+                self._progress[(name, record['id'])] = {
+                    'statuses': statuses, 'polls': 0}
+        return record
+
+    def _create(self, name, values):
+        dataset = self.dataset
+        if name == 'plans':
+            provider_id = values.get('provider_id')
+            dataset.collection('providers').get(provider_id)
+            record = dataset.add_plan(
+                len(dataset.collection('plans').records),
+                name=values.get('name'),
+                description=values.get('description'),
+                provider_id=provider_id,
+                resources=values.get('resources') or [],
+                parameters=values.get('parameters') or {})
+        elif name == 'triggers':
+            record = dataset.add_trigger(
+                0, name=values.get('name'), type=values.get('type'),
+                properties=values.get('properties') or {})
+        elif name == 'scheduled_operations':
+            dataset.collection('triggers').get(values.get('trigger_id'))
+            record = dataset.add_scheduled_operation(
+                values.get('trigger_id'), None, 0,
+                name=values.get('name'),
+                operation_type=values.get('operation_type'),
+                operation_definition=values.get('operation_definition'))
+        elif name in ('restores', 'verifications'):
+            dataset.checkpoints(values.get('provider_id')).get(
+                values.get('checkpoint_id'))
+            add = (dataset.add_restore if name == 'restores'
+                   else dataset.add_verification)
+            record = add(values.get('checkpoint_id'), 0,
+                         provider_id=values.get('provider_id'),
+                         parameters=values.get('parameters') or {})
+            if name == 'restores':
+                record['restore_target'] = values.get('restore_target')
+        else:
+            raise HTTPError(405, 'Method not allowed')
+        return self._track(name, record)
+
+    def _get_protectables(self, parts, query, body):
+        if not parts:
+            return 200, {'protectable_type': sorted(PROTECTABLE_TYPES)}
+        protectable_type = parts[0]
+        if protectable_type not in PROTECTABLE_TYPES:
+            raise HTTPError(404, 'Protectable type %s could not be found.'
+                            % protectable_type)
+        if len(parts) == 1:
+            return 200, {'protectable_type': {
+                'name': protectable_type,
+                'dependent_types': PROTECTABLE_TYPES[protectable_type]}}
+        instances = self.dataset.instances(protectable_type)
+        if len(parts) == 2 and parts[1] == 'instances':
+            return self._list(instances, 'instances',
+                              'protectables/%s/instances' % protectable_type,
+                              query)
+        if len(parts) == 3 and parts[1] == 'instances':
+            return 200, {'instance': instances.get(parts[2])}
+        raise HTTPError(404, 'Not found')
+
+    def _providers(self, method, parts, query, body):
+        if len(parts) < 2 or parts[1] != 'checkpoints':
+            return self._generic(method, 'providers', parts, query, body)
+        provider_id = parts[0]
+        self.dataset.collection('providers').get(provider_id)
+        name = 'providers/%s/checkpoints' % provider_id
+        checkpoints = self.dataset.checkpoints(provider_id)
+        if len(parts) == 2:
+            if method == 'GET':
+                return self._list(checkpoints, 'checkpoints', name, query)
+            if method == 'POST':
+                values = self._member(body, 'checkpoint')
+                plan = self.dataset.collection('plans').get(
+                    values.get('plan_id'))
+                record = self.dataset.add_checkpoint(
+                    provider_id, plan, 0,
+                    extra_info=values.get('extra-info') or {})
+                return 200, {'checkpoint': self._track(name, record)}
+        elif len(parts) == 3:
+            checkpoint_id = parts[2]
+            if method == 'GET':
+                return 200, {'checkpoint': self._show(name, checkpoints,
+                                                      checkpoint_id)}
+            if method == 'PUT':
+                checkpoint = checkpoints.get(checkpoint_id)
+                state = (body or {}).get('os-resetState', {}).get('state')
+                if state not in ('available', 'error'):
+                    raise HTTPError(400, 'Invalid state %s' % state)
+                checkpoint['status'] = state
+                checkpoints.changed()
+                return 202, None
+            if method == 'DELETE':
+                checkpoints.delete(checkpoint_id)
+                return 202, None
+        raise HTTPError(405, 'Method not allowed')
+
+    def _get_providers(self, parts, query, body):
+        return self._providers('GET', parts, query, body)
+
+    def _post_providers(self, parts, query, body):
+        return self._providers('POST', parts, query, body)
+
+    def _put_providers(self, parts, query, body):
+        return self._providers('PUT', parts, query, body)
+
+    def _delete_providers(self, parts, query, body):
+        return self._providers('DELETE', parts, query, body)
+
+    def _put_os_services(self, parts, query, body):
+        if len(parts) != 1:
+            raise HTTPError(405, 'Method not allowed')
+        services = self.dataset.collection('os-services')
+        try:
+            service = services.get(int(parts[0]))
+        except ValueError:
+            raise HTTPError(400, 'Invalid service id %s' % parts[0])
+        body = body or {}
+        if body.get('status') not in ('enabled', 'disabled'):
+            raise HTTPError(400, 'Invalid status')
+        service['status'] = body['status']
+        service['disabled_reason'] = body.get('disabled_reason')
+        services.changed()
+        return 200, {'service': service}
+
+    def _get_quotas(self, parts, query, body):
+        if not parts:
+            raise HTTPError(404, 'Not found')
+        if parts[1:] == ['defaults']:
+            quota = dict(self.dataset.quota_classes['default'])
+        else:
+            quota = dict(self.dataset.quota_classes['default'])
+            quota.update(self.dataset.quotas.get(parts[0], {}))
+            if parts[1:] == ['detail']:
+                quota = dict((k, {'limit': v, 'in_use': 0, 'reserved': 0})
+                             for k, v in quota.items())
+        quota['id'] = parts[0]
+        return 200, {'quota': quota}
+
+    def _put_quotas(self, parts, query, body):
+        values = self._member(body, 'quota')
+        self.dataset.quotas.setdefault(parts[0], {}).update(values)
+        return self._get_quotas(parts[:1], query, None)
+
+    def _get_quota_classes(self, parts, query, body):
+        quota_class = dict(self.dataset.quota_classes.get(
+            parts[0], self.dataset.quota_classes['default']))
+        quota_class['id'] = parts[0]
+        return 200, {'quota_class': quota_class}
+
+    def _put_quota_classes(self, parts, query, body):
+        values = self._member(body, 'quota_class')
+        self.dataset.quota_classes.setdefault(
+            parts[0], dict(DEFAULT_QUOTA)).update(values)
+        return self._get_quota_classes(parts, query, None)
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serve the WSGI application of the server with keep-alive."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.count_connection()
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        path, _sep, query = self.path.partition('?')
+        environ = {
+            'REQUEST_METHOD': self.command,
+            'PATH_INFO': parse.unquote(path),
+            'QUERY_STRING': query,
+            'CONTENT_LENGTH': str(length),
+            'CONTENT_TYPE': self.headers.get('Content-Type', ''),
+            'SERVER_NAME': self.server.server_address[0],
+            'SERVER_PORT': str(self.server.server_address[1]),
+            'SERVER_PROTOCOL': self.request_version,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in self.headers.items():
+            key = 'HTTP_%s' % name.upper().replace('-', '_')
+            environ.setdefault(key, value)
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = status
+            response['headers'] = headers
+
+        content = b''.join(self.server.app(environ, start_response))
+        code, _sep, reason = response['status'].partition(' ')
+        self.send_response(int(code), reason)
+        for name, value in response['headers']:
+            if name.lower() != 'content-length':
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, app):
+        BaseHTTPServer.HTTPServer.__init__(self, address, _RequestHandler)
+        self.app = app
+        self.connections = 0
+        self._connections_lock = threading.Lock()
+
+    def count_connection(self):
+        with self._connections_lock:
+            self.connections += 1
+
+
+class FakeServer(object):
+    """Serve a :class:`FakeKarborAPI` from a background thread.
+
+    :param app: the application to serve; extra keyword arguments create a
+                :class:`FakeKarborAPI`.
+    :param port: port to listen on, an ephemeral port by default.
+    """
+
+    def __init__(self, app=None, host='127.0.0.1', port=0, **app_kwargs):
+        self.app = app or FakeKarborAPI(**app_kwargs)
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def project_id(self):
+        return self.app.project_id
+
+    @property
+    def url(self):
+        return 'http://%s:%d' % (self.host, self.port)
+
+    @property
+    def endpoint(self):
+        """Karbor endpoint URL, including the project ID."""
+        return '%s/v1/%s' % (self.url, self.project_id)
+
+    @property
+    def connections(self):
+        """Number of TCP connections accepted so far."""
+        return self._server.connections if self._server else 0
+
+    def start(self):
+        self._server = _HTTPServer((self.host, self.port), self.app)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05},
+                                        name='karbor-fake-server')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serve a fake karbor v1 API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--seed', type=int, default=0)
+    for name, default in (('plans', 10), ('checkpoints', 100),
+                          ('restores', 10), ('verifications', 10),
+                          ('triggers', 10), ('scheduled-operations', 10),
+                          ('operation-logs', 10), ('instances', 10)):
+        parser.add_argument('--%s' % name, type=int, default=default,
+                            help='Number of generated %s.'
+                                 % name.replace('-', ' '))
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--jitter', type=float, default=0)
+    parser.add_argument('--error-rate', metavar='<status>=<rate>',
+                        action='append', default=[],
+                        help='Fail this fraction of the requests with '
+                             '<status>, e.g. 503=0.01. May be repeated.')
+    parser.add_argument('--max-limit', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    error_rates = {}
+    for item in args.error_rate:
+        status, _sep, rate = item.partition('=')
+        error_rates[int(status)] = float(rate)
+    server = FakeServer(
+        host=args.host, port=args.port, seed=args.seed,
+        latency=args.latency, jitter=args.jitter, error_rates=error_rates,
+        max_limit=args.max_limit or None, plans=args.plans,
+        checkpoints=args.checkpoints, restores=args.restores,
+        verifications=args.verifications, triggers=args.triggers,
+        scheduled_operations=args.scheduled_operations,
+        operation_logs=args.operation_logs, instances=args.instances)
+    server.start()
+    print('Serving the fake karbor API on %s' % server.endpoint)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,7 +11,9 @@
 #   under the License.
 #
 
+import atexit
 import logging
+import sys
 
 from osc_lib import utils
 
@@ -33,15 +35,98 @@ def make_client(instance):
         API_VERSIONS)
     LOG.debug('Instantiating data protection client: %s',
               data_protection_client)
+    api_stats = bool(utils.env('KARBORCLIENT_API_STATS'))
+    read_rate = utils.env('KARBORCLIENT_READ_RATE_LIMIT')
+    write_rate = utils.env('KARBORCLIENT_WRITE_RATE_LIMIT')
+    rate_limit = None
+    if read_rate or write_rate:
+        rate_limit = {'read_rate': float(read_rate) if read_rate else None,
+                      'write_rate': float(write_rate) if write_rate else None}
+    hedge_percentile = utils.env('KARBORCLIENT_HEDGE_PERCENTILE')
+    hedge = None
+    if hedge_percentile:
+        hedge = {'percentile': float(hedge_percentile),
+                 'budget': float(utils.env('KARBORCLIENT_HEDGE_BUDGET',
+                                           default=0.05))}
+    breaker_threshold = utils.env('KARBORCLIENT_CIRCUIT_BREAKER_THRESHOLD')
+    circuit_breaker = None
+    if breaker_threshold:
+        circuit_breaker = {
+            'failure_threshold': int(breaker_threshold),
+            'reset_timeout': float(utils.env(
+                'KARBORCLIENT_CIRCUIT_BREAKER_RESET', default=30.0))}
+    compress_threshold = utils.env('KARBORCLIENT_COMPRESS_THRESHOLD')
+    spill_threshold = utils.env('KARBORCLIENT_SPILL_THRESHOLD')
     client = data_protection_client(
         auth=instance.auth,
         session=instance.session,
-        service_type="data-protect"
+        service_type="data-protect",
+        json_codec=utils.env('KARBORCLIENT_JSON_CODEC', default='auto'),
+        timings=api_stats or bool(getattr(instance, 'timing', False)),
+        record_file=utils.env('KARBORCLIENT_RECORD_FILE', default=None),
+        replay_file=utils.env('KARBORCLIENT_REPLAY_FILE', default=None),
+        replay_speed=float(utils.env('KARBORCLIENT_REPLAY_SPEED',
+                                     default=1.0)),
+        rate_limit=rate_limit,
+        all_endpoints=bool(utils.env('KARBORCLIENT_ALL_ENDPOINTS')),
+        endpoint_selection=utils.env('KARBORCLIENT_ENDPOINT_SELECTION',
+                                     default=None),
+        hedge=hedge,
+        circuit_breaker=circuit_breaker,
+        compress_threshold=int(compress_threshold) if compress_threshold
+        else None,
+        spill_threshold=int(spill_threshold) if spill_threshold else None,
     )
+    seconds = utils.env('KARBORCLIENT_DEADLINE')
+    if seconds:
+        from karborclient.common import deadline
+
+        # The client lives for a single command.
+        client.http_client.active_deadline = deadline.Deadline(float(seconds))
+    if api_stats:
+        atexit.register(report_api_stats, client)
+    profile = utils.env('KARBORCLIENT_PROFILE')
+    if profile:
+        start_profiler(profile,
+                       bool(utils.env('KARBORCLIENT_PROFILE_MEMORY')))
 
     return client
 
 
+def start_profiler(path, memory=False):
+    """Profile the rest of the command and report when it exits.
+
+    The client is created lazily by the first data protection command, so
+    this covers authentication, the API calls and the output rendering.
+    """
+    from karborclient.common import profiling
+
+    profiler = profiling.Profiler(path, memory=memory)
+    profiler.start()
+
+    def _report():
+        profiler.stop()
+        profiler.report()
+    atexit.register(_report)
+    return profiler
+
+
+def report_api_stats(client, stream=None):
+    """Write the API statistics recorded by a client to stderr."""
+    # Imported here to keep the plugin cheap to load.
+    from karborclient.common import utils as karbor_utils
+
+    timings = client.http_client.get_timings()
+    if not timings:
+        return
+    stdout = sys.stdout
+    sys.stdout = stream or sys.stderr
+    try:
+        karbor_utils.print_api_stats('openstack', timings)
+    finally:
+        sys.stdout = stdout
+
+
 def build_option_parser(parser):
     """Hook to add global options"""
     parser.add_argument(
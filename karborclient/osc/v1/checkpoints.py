@@ -18,6 +18,7 @@ from oslo_log import log as logging
 from oslo_serialization import jsonutils
 
 from karborclient.common.apiclient import exceptions
+from karborclient.common import concurrency
 from karborclient.i18n import _
 from karborclient import utils
 
@@ -113,7 +114,7 @@ class ListCheckpoints(command.Lister):
         data = data_protection_client.checkpoints.list(
             provider_id=parsed_args.provider_id, search_opts=search_opts,
             marker=parsed_args.marker, limit=parsed_args.limit,
-            sort=parsed_args.sort)
+            sort=parsed_args.sort, stream=True)
 
         column_headers = ['Id', 'Project id', 'Status', 'Protection plan',
                           'Metadata', 'Created at']
@@ -212,16 +213,21 @@ class DeleteCheckpoint(command.Command):
 
     def take_action(self, parsed_args):
         client = self.app.client_manager.data_protection
+
+        def delete(checkpoint_id):
+            client.checkpoints.delete(parsed_args.provider_id, checkpoint_id)
+
         failure_count = 0
-        for checkpoint_id in parsed_args.checkpoint:
-            try:
-                client.checkpoints.delete(parsed_args.provider_id,
-                                          checkpoint_id)
-            except exceptions.NotFound:
+        for result in concurrency.run_bulk(
+                delete, parsed_args.checkpoint,
+                concurrency.client_controller(client), client):
+            if isinstance(result.error, exceptions.NotFound):
                 failure_count += 1
                 self.log.error(
                     "Failed to delete '{0}'; checkpoint not found".
-                    format(checkpoint_id))
+                    format(result.item))
+            elif result.error is not None:
+                raise result.error
         if failure_count == len(parsed_args.checkpoint):
             raise exceptions.CommandError(
                 "Unable to find and delete any of the "
@@ -257,26 +263,32 @@ class ResetCheckpointState(command.Command):
 
     def take_action(self, parsed_args):
         client = self.app.client_manager.data_protection
+
+        def reset_state(checkpoint_id):
+            client.checkpoints.reset_state(
+                parsed_args.provider_id, checkpoint_id, parsed_args.state)
+
         failure_count = 0
-        for checkpoint_id in parsed_args.checkpoint:
-            try:
-                client.checkpoints.reset_state(
-                    parsed_args.provider_id, checkpoint_id, parsed_args.state)
-            except exceptions.NotFound:
+        for result in concurrency.run_bulk(
+                reset_state, parsed_args.checkpoint,
+                concurrency.client_controller(client), client):
+            if isinstance(result.error, exceptions.NotFound):
                 failure_count += 1
                 self.log.error(
                     "Failed to reset state of '{0}'; checkpoint "
-                    "not found".format(checkpoint_id))
-            except exceptions.Forbidden:
+                    "not found".format(result.item))
+            elif isinstance(result.error, exceptions.Forbidden):
                 failure_count += 1
                 self.log.error(
                     "Failed to reset state of '{0}'; not "
-                    "allowed".format(checkpoint_id))
-            except exceptions.BadRequest:
+                    "allowed".format(result.item))
+            elif isinstance(result.error, exceptions.BadRequest):
                 failure_count += 1
                 self.log.error(
                     "Failed to reset state of '{0}'; invalid input or "
-                    "current checkpoint state".format(checkpoint_id))
+                    "current checkpoint state".format(result.item))
+            elif result.error is not None:
+                raise result.error
         if failure_count == len(parsed_args.checkpoint):
             raise exceptions.CommandError(
                 "Unable to find or reset any of the specified "
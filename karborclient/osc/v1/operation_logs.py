@@ -76,7 +76,7 @@ class ListOperationLogs(command.Lister):
 
         data = data_protection_client.operation_logs.list(
             search_opts=search_opts, marker=parsed_args.marker,
-            limit=parsed_args.limit, sort=parsed_args.sort)
+            limit=parsed_args.limit, sort=parsed_args.sort, stream=True)
 
         column_headers = ['Id', 'Operation Type', 'Checkpoint id',
                           'Plan Id', 'Provider id', 'Restore Id',
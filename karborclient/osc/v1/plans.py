@@ -12,6 +12,8 @@
 
 """Data protection V1 plan action implementations"""
 
+import functools
+
 from oslo_serialization import jsonutils
 from oslo_utils import uuidutils
 
@@ -20,8 +22,10 @@ from osc_lib import utils as osc_utils
 from oslo_log import log as logging
 
 from karborclient.common.apiclient import exceptions
+from karborclient.common import concurrency
 from karborclient.i18n import _
 from karborclient import utils
+from karborclient.v1 import overview
 
 
 def format_plan(plan_info):
@@ -122,14 +126,40 @@ class ShowPlan(command.ShowOne):
             metavar="<plan>",
             help=_('The UUID of the plan.')
         )
+        parser.add_argument(
+            '--with-related',
+            action='store_true',
+            default=False,
+            help=_('Also show the provider, the latest checkpoints and the '
+                   'scheduled operations of the plan, fetched '
+                   'concurrently.')
+        )
+        parser.add_argument(
+            '--checkpoint-limit',
+            metavar='<limit>',
+            type=int,
+            default=5,
+            help=_('Number of checkpoints shown with --with-related. '
+                   'Default=5.')
+        )
         return parser
 
     def take_action(self, parsed_args):
         client = self.app.client_manager.data_protection
-        plan = osc_utils.find_resource(client.plans, parsed_args.plan)
+        if not parsed_args.with_related:
+            plan = osc_utils.find_resource(client.plans, parsed_args.plan)
+            format_plan(plan._info)
+            return zip(*sorted(plan._info.items()))
 
-        format_plan(plan._info)
-        return zip(*sorted(plan._info.items()))
+        details = overview.get_plan_details(
+            client,
+            functools.partial(osc_utils.find_resource, client.plans,
+                              parsed_args.plan),
+            parsed_args.checkpoint_limit)
+        plan_info = dict(details.plan._info)
+        format_plan(plan_info)
+        plan_info.update(overview.related_summary(details))
+        return zip(*sorted(plan_info.items()))
 
 
 class CreatePlan(command.ShowOne):
@@ -267,15 +297,21 @@ class DeletePlan(command.Command):
 
     def take_action(self, parsed_args):
         client = self.app.client_manager.data_protection
+
+        def delete(plan_id):
+            plan = osc_utils.find_resource(client.plans, plan_id)
+            client.plans.delete(plan.id)
+
         failure_count = 0
-        for plan_id in parsed_args.plan:
-            try:
-                plan = osc_utils.find_resource(client.plans, plan_id)
-                client.plans.delete(plan.id)
-            except exceptions.NotFound:
+        for result in concurrency.run_bulk(
+                delete, parsed_args.plan,
+                concurrency.client_controller(client), client):
+            if isinstance(result.error, exceptions.NotFound):
                 failure_count += 1
                 print("Failed to delete '{0}'; plan not "
-                      "found".format(plan_id))
+                      "found".format(result.item))
+            elif result.error is not None:
+                raise result.error
         if failure_count == len(parsed_args.plan):
             raise exceptions.CommandError(
                 "Unable to find and delete any of the "
@@ -13,6 +13,7 @@
 """Data protection V1 scheduled_operations action implementations"""
 
 import functools
+import itertools
 import six
 
 from oslo_serialization import jsonutils
@@ -23,6 +24,7 @@ from osc_lib import utils as osc_utils
 from oslo_log import log as logging
 
 from karborclient.common.apiclient import exceptions
+from karborclient.common import concurrency
 from karborclient.i18n import _
 
 
@@ -95,6 +97,15 @@ class ListScheduledOperations(command.Lister):
             metavar='<project>',
             help=_('Filter results by a project(admin only)')
         )
+        parser.add_argument(
+            '--with-triggers',
+            action='store_true',
+            default=False,
+            help=_('Also show the name and type of the trigger of each '
+                   'scheduled_operation, listing every page of the triggers '
+                   'and scheduled_operations once. Operations whose trigger '
+                   'does not exist are flagged.')
+        )
         return parser
 
     def take_action(self, parsed_args):
@@ -111,10 +122,6 @@ class ListScheduledOperations(command.Lister):
             'operation_definition': parsed_args.operation_definition,
         }
 
-        data = data_protection_client.scheduled_operations.list(
-            search_opts=search_opts, marker=parsed_args.marker,
-            limit=parsed_args.limit, sort=parsed_args.sort)
-
         column_headers = ['Id', 'Name', 'Operation Type', 'Trigger Id',
                           'Operation Definition']
 
@@ -124,6 +131,30 @@ class ListScheduledOperations(command.Lister):
         formatters = {
             "Operation Definition": json_dumps,
         }
+        if parsed_args.with_triggers:
+            rows = data_protection_client.scheduled_operations.\
+                list_with_triggers(search_opts=search_opts,
+                                   marker=parsed_args.marker,
+                                   sort=parsed_args.sort)
+            if parsed_args.limit:
+                rows = itertools.islice(rows, parsed_args.limit)
+
+            def format_row(s, trigger):
+                if trigger is None:
+                    trigger_columns = ('(missing)', None)
+                else:
+                    trigger_columns = (trigger.name, trigger.type)
+                return osc_utils.get_item_properties(
+                    s, column_headers, formatters=formatters,
+                ) + trigger_columns
+
+            # The rows are formatted as the pages are received.
+            return (column_headers + ['Trigger Name', 'Trigger Type'],
+                    (format_row(s, trigger) for s, trigger in rows))
+
+        data = data_protection_client.scheduled_operations.list(
+            search_opts=search_opts, marker=parsed_args.marker,
+            limit=parsed_args.limit, sort=parsed_args.sort)
         return (column_headers,
                 list(osc_utils.get_item_properties(
                     s, column_headers, formatters=formatters,
@@ -206,16 +237,21 @@ class DeleteScheduledOperation(command.Command):
 
     def take_action(self, parsed_args):
         client = self.app.client_manager.data_protection
+
+        def delete(so_id):
+            so = osc_utils.find_resource(client.scheduled_operations, so_id)
+            client.scheduled_operations.delete(so.id)
+
         failure_count = 0
-        for so_id in parsed_args.scheduledoperation:
-            try:
-                so = osc_utils.find_resource(client.scheduled_operations,
-                                             so_id)
-                client.scheduled_operations.delete(so.id)
-            except exceptions.NotFound:
+        for result in concurrency.run_bulk(
+                delete, parsed_args.scheduledoperation,
+                concurrency.client_controller(client), client):
+            if isinstance(result.error, exceptions.NotFound):
                 failure_count += 1
                 print("Failed to delete '%s'; scheduled operation "
-                      "not found" % so_id)
+                      "not found" % result.item)
+            elif result.error is not None:
+                raise result.error
         if failure_count == len(parsed_args.scheduledoperation):
             raise exceptions.CommandError(
                 "Unable to find and delete any of the "
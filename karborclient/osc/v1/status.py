@@ -0,0 +1,32 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Data protection V1 status overview action implementations"""
+
+from osc_lib.command import command
+from oslo_log import log as logging
+
+from karborclient.i18n import _
+from karborclient.v1 import overview
+
+
+class ShowStatus(command.ShowOne):
+    _description = _("Shows an overview of the protection state of the "
+                     "project.")
+
+    log = logging.getLogger(__name__ + ".ShowStatus")
+
+    def take_action(self, parsed_args):
+        self.log.debug("take_action(%s)", parsed_args)
+        data_protection_client = self.app.client_manager.data_protection
+        result = overview.get_overview(data_protection_client)
+        return zip(*result.summary().items())
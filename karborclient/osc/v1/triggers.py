@@ -17,6 +17,7 @@ from osc_lib import utils as osc_utils
 from oslo_log import log as logging
 
 from karborclient.common.apiclient import exceptions
+from karborclient.common import concurrency
 from karborclient.i18n import _
 from karborclient import utils
 
@@ -213,16 +214,22 @@ class DeleteTrigger(command.Command):
 
     def take_action(self, parsed_args):
         client = self.app.client_manager.data_protection
+
+        def delete(trigger_id):
+            trigger = osc_utils.find_resource(client.triggers, trigger_id)
+            client.triggers.delete(trigger.id)
+
         failure_count = 0
-        for trigger_id in parsed_args.trigger:
-            try:
-                trigger = osc_utils.find_resource(client.triggers, trigger_id)
-                client.triggers.delete(trigger.id)
-            except exceptions.NotFound:
+        for result in concurrency.run_bulk(
+                delete, parsed_args.trigger,
+                concurrency.client_controller(client), client):
+            if isinstance(result.error, exceptions.NotFound):
                 failure_count += 1
                 self.log.error(
                     "Failed to delete '{0}'; trigger not found".
-                    format(trigger_id))
+                    format(result.item))
+            elif result.error is not None:
+                raise result.error
         if failure_count == len(parsed_args.trigger):
             raise exceptions.CommandError(
                 "Unable to find and delete any of the "
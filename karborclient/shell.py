@@ -17,8 +17,13 @@ Command-line interface to the karbor Project.
 from __future__ import print_function
 
 import argparse
+from concurrent import futures
+import contextlib
 import copy
+import shlex
 import sys
+import threading
+import time
 
 from keystoneauth1 import discover
 from keystoneauth1 import exceptions as ks_exc
@@ -27,6 +32,7 @@ from keystoneauth1.identity.generic import token
 from keystoneauth1 import loading
 from oslo_log import handlers
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import encodeutils
 from oslo_utils import importutils
 
@@ -36,13 +42,30 @@ import six.moves.urllib.parse as urlparse
 import karborclient
 from karborclient import client as karbor_client
 from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import loadbalancer
+from karborclient.common import profiling
+from karborclient.common import tracing
 from karborclient.common import utils
+from karborclient import daemon
 
 
 logger = logging.getLogger(__name__)
 
+# Global options which have no effect on the API client.
+_CLIENT_INDEPENDENT_OPTIONS = ('help', 'debug', 'verbose', 'trace_file',
+                               'profile', 'profile_memory', 'deadline')
+
 
 class KarborShell(object):
+    """The karbor command-line interface.
+
+    :param clients: optional dict in which the API clients are kept to be
+                    reused by the following commands run with the same
+                    global options, as done by ``karbor daemon``.
+    """
+
+    def __init__(self, clients=None):
+        self.clients = clients
 
     def _append_global_identity_args(self, parser, argv):
         loading.register_session_argparse_arguments(parser)
@@ -106,6 +129,191 @@ class KarborShell(object):
                                  'API response, '
                                  'defaults to system socket timeout.')
 
+        parser.add_argument('--deadline',
+                            metavar='<seconds>',
+                            type=float,
+                            default=utils.env('KARBORCLIENT_DEADLINE',
+                                              default=None),
+                            help='Number of seconds the whole command may '
+                                 'take; every API request gets the time '
+                                 'left as its timeout. Defaults to '
+                                 'env[KARBORCLIENT_DEADLINE].')
+
+        parser.add_argument('--compress-threshold',
+                            metavar='<bytes>',
+                            type=int,
+                            default=utils.env(
+                                'KARBORCLIENT_COMPRESS_THRESHOLD',
+                                default=None),
+                            help='Gzip the request bodies of at least '
+                                 '<bytes>; the karbor API must accept gzip '
+                                 'encoded requests. Responses are always '
+                                 'accepted gzip encoded. Defaults to '
+                                 'env[KARBORCLIENT_COMPRESS_THRESHOLD].')
+
+        parser.add_argument('--spill-threshold',
+                            metavar='<bytes>',
+                            type=int,
+                            default=utils.env(
+                                'KARBORCLIENT_SPILL_THRESHOLD',
+                                default=None),
+                            help='Write the JSON response bodies of more '
+                                 'than <bytes> to a temporary file to '
+                                 'decode them, instead of reading them in '
+                                 'memory. Defaults to '
+                                 'env[KARBORCLIENT_SPILL_THRESHOLD].')
+
+        parser.add_argument('--timings',
+                            default=False,
+                            action='store_true',
+                            help='Print a per-call breakdown of the API '
+                                 'requests made by the command.')
+
+        parser.add_argument('--api-stats',
+                            default=bool(utils.env('KARBORCLIENT_API_STATS')),
+                            action='store_true',
+                            help='Print API call statistics aggregated per '
+                                 'URL for the command. Defaults to '
+                                 'env[KARBORCLIENT_API_STATS].')
+
+        parser.add_argument('--trace-file',
+                            metavar='<file>',
+                            default=utils.env('KARBORCLIENT_TRACE_FILE',
+                                              default=None),
+                            help='Append tracing spans of the command, its '
+                                 'API operations and HTTP requests to '
+                                 '<file> as JSON lines. Defaults to '
+                                 'env[KARBORCLIENT_TRACE_FILE].')
+
+        parser.add_argument('--global-request-id',
+                            metavar='<request-id>',
+                            default=utils.env('KARBOR_GLOBAL_REQUEST_ID',
+                                              default=None),
+                            help='Global request ID sent with every API '
+                                 'request so client operations can be '
+                                 'matched with server logs. Defaults to '
+                                 'env[KARBOR_GLOBAL_REQUEST_ID].')
+
+        parser.add_argument('--json-codec',
+                            default=utils.env('KARBORCLIENT_JSON_CODEC',
+                                              default='auto'),
+                            help='JSON library used to encode and decode '
+                                 'API bodies: auto, json or orjson. '
+                                 'Defaults to env[KARBORCLIENT_JSON_CODEC] '
+                                 'or auto.')
+
+        parser.add_argument('--record-file',
+                            metavar='<file>',
+                            default=utils.env('KARBORCLIENT_RECORD_FILE',
+                                              default=None),
+                            help='Append the HTTP exchanges of the command '
+                                 'to <file>, with tokens and passwords '
+                                 'redacted. Defaults to '
+                                 'env[KARBORCLIENT_RECORD_FILE].')
+
+        parser.add_argument('--replay-file',
+                            metavar='<file>',
+                            default=utils.env('KARBORCLIENT_REPLAY_FILE',
+                                              default=None),
+                            help='Answer the API requests from the exchanges '
+                                 'recorded in <file> instead of contacting '
+                                 'the karbor API; no authentication is '
+                                 'done. Defaults to '
+                                 'env[KARBORCLIENT_REPLAY_FILE].')
+
+        parser.add_argument('--replay-speed',
+                            metavar='<factor>',
+                            type=float,
+                            default=1.0,
+                            help='With --replay-file, divide the recorded '
+                                 'response times by <factor>; 0 answers '
+                                 'immediately. Default=1.')
+
+        parser.add_argument('--read-rate-limit',
+                            metavar='<requests/s>',
+                            type=float,
+                            default=utils.env('KARBORCLIENT_READ_RATE_LIMIT',
+                                              default=None),
+                            help='Maximal rate of GET requests sent to the '
+                                 'API; requests over it wait. Defaults to '
+                                 'env[KARBORCLIENT_READ_RATE_LIMIT].')
+
+        parser.add_argument('--write-rate-limit',
+                            metavar='<requests/s>',
+                            type=float,
+                            default=utils.env('KARBORCLIENT_WRITE_RATE_LIMIT',
+                                              default=None),
+                            help='Maximal rate of POST, PUT and DELETE '
+                                 'requests sent to the API; requests over '
+                                 'it wait. Defaults to '
+                                 'env[KARBORCLIENT_WRITE_RATE_LIMIT].')
+
+        parser.add_argument('--hedge-percentile',
+                            metavar='<percentile>',
+                            type=float,
+                            default=utils.env('KARBORCLIENT_HEDGE_PERCENTILE',
+                                              default=None),
+                            help='Send a GET request a second time, to '
+                                 'another endpoint when there are several, '
+                                 'when it gets no response within this '
+                                 'percentile of the recent response times; '
+                                 'the first response wins. Defaults to '
+                                 'env[KARBORCLIENT_HEDGE_PERCENTILE].')
+
+        parser.add_argument('--hedge-budget',
+                            metavar='<fraction>',
+                            type=float,
+                            default=utils.env('KARBORCLIENT_HEDGE_BUDGET',
+                                              default=0.05),
+                            help='With --hedge-percentile, fraction of the '
+                                 'GET requests which may be hedged. '
+                                 'Defaults to env[KARBORCLIENT_HEDGE_BUDGET] '
+                                 'or 0.05.')
+
+        parser.add_argument('--circuit-breaker-threshold',
+                            metavar='<failures>',
+                            type=int,
+                            default=utils.env(
+                                'KARBORCLIENT_CIRCUIT_BREAKER_THRESHOLD',
+                                default=None),
+                            help='Fail the requests to an endpoint at once '
+                                 'after this many consecutive connection '
+                                 'failures, until it answers again. '
+                                 'Defaults to env['
+                                 'KARBORCLIENT_CIRCUIT_BREAKER_THRESHOLD].')
+
+        parser.add_argument('--circuit-breaker-reset',
+                            metavar='<seconds>',
+                            type=float,
+                            default=utils.env(
+                                'KARBORCLIENT_CIRCUIT_BREAKER_RESET',
+                                default=30.0),
+                            help='With --circuit-breaker-threshold, seconds '
+                                 'after which a request probes whether the '
+                                 'endpoint answers again. Defaults to '
+                                 'env[KARBORCLIENT_CIRCUIT_BREAKER_RESET] or '
+                                 '30.')
+
+        parser.add_argument('--profile',
+                            metavar='<file>',
+                            default=utils.env('KARBORCLIENT_PROFILE',
+                                              default=None),
+                            help='Profile the command with cProfile, write '
+                                 'the stats to <file> and print the hot '
+                                 'spots grouped by phase (auth, http, json, '
+                                 'render). Defaults to '
+                                 'env[KARBORCLIENT_PROFILE].')
+
+        parser.add_argument('--profile-memory',
+                            default=bool(utils.env(
+                                'KARBORCLIENT_PROFILE_MEMORY')),
+                            action='store_true',
+                            help='With --profile, also trace memory '
+                                 'allocations with tracemalloc and write '
+                                 'the top allocation sites to '
+                                 '<file>.memory. Defaults to '
+                                 'env[KARBORCLIENT_PROFILE_MEMORY].')
+
         parser.add_argument('--os_tenant_id',
                             default=utils.env('OS_TENANT_ID'),
                             help='Defaults to env[OS_TENANT_ID].')
@@ -129,7 +337,30 @@ class KarborShell(object):
                                  "Defaults to env[OS_NO_CLIENT_AUTH].")
         parser.add_argument('--karbor-url',
                             default=utils.env('KARBOR_URL'),
-                            help='Defaults to env[KARBOR_URL].')
+                            help='Comma separated URLs balance the '
+                                 'requests between several API nodes. '
+                                 'Defaults to env[KARBOR_URL].')
+
+        parser.add_argument('--all-endpoints',
+                            default=bool(utils.env(
+                                'KARBORCLIENT_ALL_ENDPOINTS')),
+                            action='store_true',
+                            help='Balance the requests between all the '
+                                 'endpoints of the service catalog in the '
+                                 'region. Defaults to '
+                                 'env[KARBORCLIENT_ALL_ENDPOINTS].')
+
+        parser.add_argument('--endpoint-selection',
+                            metavar='<strategy>',
+                            choices=loadbalancer.STRATEGIES,
+                            default=utils.env(
+                                'KARBORCLIENT_ENDPOINT_SELECTION',
+                                default='least_outstanding'),
+                            help='How requests are balanced between several '
+                                 'endpoints: least_outstanding or ewma. '
+                                 'Defaults to '
+                                 'env[KARBORCLIENT_ENDPOINT_SELECTION] or '
+                                 'least_outstanding.')
 
         parser.add_argument('--karbor-api-version',
                             default=utils.env(
@@ -290,14 +521,18 @@ class KarborShell(object):
         (options, args) = parser.parse_known_args(base_argv)
         self._setup_logging(options.debug)
 
+        if options.profile:
+            with profiling.Profiler(options.profile,
+                                    memory=options.profile_memory):
+                return self._main(argv, options, args)
+        return self._main(argv, options, args)
+
+    def _main(self, argv, options, args):
         # build available subcommands based on version
         api_version = options.karbor_api_version
         subcommand_parser = self.get_subcommand_parser(api_version, argv)
         self.parser = subcommand_parser
 
-        ks_session = None
-        keystone_auth = None
-
         # Handle top-level --help/-h before attempting to parse
         # a command off the command line.
         if (not args and options.help) or not argv:
@@ -314,6 +549,85 @@ class KarborShell(object):
         elif args.func == self.do_bash_completion:
             self.do_bash_completion(args)
             return 0
+        elif args.func == self.do_daemon:
+            self.do_daemon(args)
+            return 0
+
+        if args.trace_file:
+            tracing.configure(tracing.JsonLinesTracer(args.trace_file))
+
+        self.cs = self._get_client(api_version, args, options)
+
+        command = args.func.__name__[3:].replace('_', '-')
+        try:
+            with tracing.span('karbor %s' % command,
+                              **{'karbor.command': command}), \
+                    self.cs.deadline(args.deadline):
+                args.func(self.cs, args)
+        finally:
+            self._print_timings(args, command)
+
+    def _get_client(self, api_version, args, options):
+        key = None
+        if self.clients is not None:
+            # Reuse the client, and its authenticated session, of a previous
+            # command run with the same global options.
+            key = tuple(sorted((name, repr(value))
+                               for name, value in vars(options).items()
+                               if name not in _CLIENT_INDEPENDENT_OPTIONS))
+            if key in self.clients:
+                cs = self.clients[key]
+                cs.http_client.reset_timings()
+                return cs
+
+        if args.replay_file:
+            # Recorded responses need neither credentials nor Keystone.
+            endpoint = args.karbor_url or 'http://karbor.replay'
+            kwargs = {'project_id': args.os_project_id or args.os_tenant_id}
+        else:
+            endpoint, kwargs = self._get_auth_endpoint_and_kwargs(args)
+
+        if isinstance(endpoint, six.string_types) and ',' in endpoint:
+            endpoint = [url.strip() for url in endpoint.split(',')
+                        if url.strip()]
+        if args.all_endpoints and 'session' in kwargs:
+            kwargs['all_endpoints'] = True
+        kwargs['endpoint_selection'] = args.endpoint_selection
+        if args.api_timeout:
+            kwargs['timeout'] = args.api_timeout
+        kwargs['json_codec'] = args.json_codec
+        if args.record_file:
+            kwargs['record_file'] = args.record_file
+        if args.replay_file:
+            kwargs['replay_file'] = args.replay_file
+            kwargs['replay_speed'] = args.replay_speed
+        if args.read_rate_limit or args.write_rate_limit:
+            kwargs['rate_limit'] = {'read_rate': args.read_rate_limit,
+                                    'write_rate': args.write_rate_limit}
+        if args.hedge_percentile:
+            kwargs['hedge'] = {'percentile': args.hedge_percentile,
+                               'budget': args.hedge_budget}
+        if args.circuit_breaker_threshold:
+            kwargs['circuit_breaker'] = {
+                'failure_threshold': args.circuit_breaker_threshold,
+                'reset_timeout': args.circuit_breaker_reset}
+        if args.compress_threshold is not None:
+            kwargs['compress_threshold'] = args.compress_threshold
+        if args.spill_threshold is not None:
+            kwargs['spill_threshold'] = args.spill_threshold
+        if args.timings or args.api_stats:
+            kwargs['timings'] = True
+        if args.global_request_id:
+            kwargs['global_request_id'] = args.global_request_id
+
+        cs = karbor_client.Client(api_version, endpoint, **kwargs)
+        if key is not None:
+            self.clients[key] = cs
+        return cs
+
+    def _get_auth_endpoint_and_kwargs(self, args):
+        ks_session = None
+        keystone_auth = None
 
         if not args.os_username and not args.os_auth_token:
             raise exc.CommandError("You must provide a username via"
@@ -397,12 +711,16 @@ class KarborShell(object):
                 'region_name': args.os_region_name,
             }
 
-        if args.api_timeout:
-            kwargs['timeout'] = args.api_timeout
+        return endpoint, kwargs
 
-        self.cs = karbor_client.Client(api_version, endpoint, **kwargs)
-
-        args.func(self.cs, args)
+    def _print_timings(self, args, command):
+        if not (args.timings or args.api_stats):
+            return
+        timings = self.cs.http_client.get_timings()
+        if args.timings:
+            utils.print_timings(timings)
+        if args.api_stats:
+            utils.print_api_stats(command, timings)
 
     def do_bash_completion(self, args):
         """Prints all of the commands and options to stdout."""
@@ -416,6 +734,115 @@ class KarborShell(object):
         commands.remove('bash-completion')
         print(' '.join(commands | options))
 
+    @utils.arg('file',
+               metavar='<file>',
+               help='File with one karbor command per line, or - to read '
+                    'them from standard input.')
+    @utils.arg('--parallel',
+               metavar='<count>',
+               type=int,
+               default=1,
+               help='Number of commands run at the same time. Default=1.')
+    def do_batch(self, cs, args):
+        """Run many karbor commands with a single client.
+
+        Each line of <file> holds a subcommand and its arguments as they are
+        given to karbor; empty lines and lines starting with # are skipped.
+        All the commands share the authentication and the API client of the
+        batch, so global options given on a line are ignored.
+
+        One JSON result is printed per command, in the order of the file,
+        with the line number, the command, its status (ok or error), its
+        output, the error message and the elapsed time in seconds.
+        """
+        if args.parallel < 1:
+            raise exc.CommandError("--parallel must be at least 1")
+        if args.file == '-':
+            lines = sys.stdin.readlines()
+        else:
+            with open(args.file) as f:
+                lines = f.readlines()
+        commands = [(number, line.strip())
+                    for number, line in enumerate(lines, 1)
+                    if line.strip() and not line.strip().startswith('#')]
+
+        stdout = _ThreadLocalStream(sys.stdout)
+        stderr = _ThreadLocalStream(sys.stderr)
+        sys.stdout, sys.stderr = stdout, stderr
+        failed = 0
+        # The deadline of the batch bounds the commands of every thread.
+        active = cs.http_client.active_deadline
+        try:
+            with futures.ThreadPoolExecutor(args.parallel) as executor:
+                results = executor.map(
+                    lambda command: self._run_batch_command(
+                        cs, active, stdout, stderr, *command), commands)
+                for result in results:
+                    if result['status'] != 'ok':
+                        failed += 1
+                    print(jsonutils.dumps(result))
+        finally:
+            sys.stdout, sys.stderr = stdout.stream, stderr.stream
+        if failed:
+            raise exc.CommandError("%d of %d commands failed"
+                                   % (failed, len(commands)))
+
+    def _run_batch_command(self, cs, active, stdout, stderr, number, line):
+        result = {'line': number, 'command': line, 'status': 'ok',
+                  'output': '', 'error': None}
+        start = time.time()
+        with stdout.capture() as output, stderr.capture() as error:
+            try:
+                argv = shlex.split(line)
+                if argv[:1] == ['karbor']:
+                    argv = argv[1:]
+                if not argv:
+                    raise exc.CommandError("No subcommand given")
+                args = self.parser.parse_args(argv)
+                if args.func in (self.do_batch, self.do_daemon, self.do_help,
+                                 self.do_bash_completion):
+                    raise exc.CommandError("%s can not be used in a batch"
+                                           % argv[0])
+                command = args.func.__name__[3:].replace('_', '-')
+                with tracing.span('karbor %s' % command,
+                                  **{'karbor.command': command}), \
+                        cs.http_client.attach_deadline(active):
+                    args.func(cs, args)
+            except SystemExit as e:
+                # Raised by argparse on invalid arguments and --help.
+                if e.code:
+                    result['status'] = 'error'
+                    result['error'] = error.getvalue().strip()
+            except Exception as e:
+                result['status'] = 'error'
+                result['error'] = six.text_type(e)
+            result['output'] = output.getvalue()
+        result['elapsed'] = round(time.time() - start, 6)
+        return result
+
+    @utils.arg('--socket',
+               metavar='<path>',
+               default=None,
+               help='Unix socket to listen on. Defaults to '
+                    'env[KARBORCLIENT_DAEMON_SOCKET] or '
+                    '$XDG_RUNTIME_DIR/karborclient/daemon.sock.')
+    @utils.arg('--idle-timeout',
+               metavar='<seconds>',
+               type=int,
+               default=daemon.DEFAULT_IDLE_TIMEOUT,
+               help='Stop after <seconds> without any command; 0 never '
+                    'stops. Default=%d.' % daemon.DEFAULT_IDLE_TIMEOUT)
+    def do_daemon(self, args):
+        """Run karbor commands from a local daemon.
+
+        While the daemon runs, karbor sends its arguments and environment to
+        it instead of running the command itself. The daemon keeps the API
+        clients, their authenticated sessions and connections, between the
+        commands of the same user. Set env[KARBORCLIENT_NO_DAEMON] to run a
+        command in-process.
+        """
+        daemon.Daemon(args.socket, args.idle_timeout).serve()
+
     @utils.arg('command', metavar='<subcommand>', nargs='?',
                help='Display help for <subcommand>')
     def do_help(self, args):
@@ -432,6 +859,26 @@ class KarborShell(object):
             self.parser.print_help()
 
 
+class _ThreadLocalStream(object):
+    """Send the writes of each thread to its own buffer while capturing."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def capture(self):
+        self._local.buffer = six.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+    def __getattr__(self, name):
+        stream = getattr(self._local, 'buffer', None) or self.stream
+        return getattr(stream, name)
+
+
 class HelpFormatter(argparse.HelpFormatter):
     def start_section(self, heading):
         # Title-case the headings
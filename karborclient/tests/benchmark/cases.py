@@ -0,0 +1,254 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmarks of the client hot paths.
+
+Every benchmark is a setup function registered with :func:`benchmark`. It
+builds its input data and returns the callable that is timed.
+"""
+
+import argparse
+import contextlib
+import io
+import subprocess
+import sys
+import uuid
+
+from oslo_serialization import jsonutils
+
+from karborclient.common import http
+from karborclient.common import utils
+from karborclient.osc.v1 import checkpoints as osc_checkpoints
+from karborclient import utils as karbor_utils
+from karborclient.v1 import checkpoints
+from karborclient.v1 import operation_logs
+from karborclient.v1 import plans
+
+LIST_SIZES = (1000, 10000, 100000)
+PROVIDER_ID = 'cf56bd3e-97a7-4078-b6d5-f36246333fd9'
+PROJECT_ID = '3e4f7f2cbb3f4d1c8d3cbd3b0e3c5a3a'
+CREATED_AT = '2026-10-19T12:00:00.000000'
+# With 6 resource graph nodes per checkpoint, a list of 10000 checkpoints
+# is a body of about 15 MB.
+CHECKPOINT_GRAPH_NODES = 6
+CHECKPOINT_LIST_SIZES = (1000, 10000)
+
+# name -> (setup function, keyword arguments, slow)
+BENCHMARKS = {}
+
+
+def benchmark(name, slow=False, **kwargs):
+    """Register the decorated setup function as benchmark ``name``."""
+    def decorator(func):
+        BENCHMARKS[name] = (func, kwargs, slow)
+        return func
+    return decorator
+
+
+def _uuid(i):
+    return str(uuid.UUID(int=i))
+
+
+def _plan(i):
+    return {
+        'id': _uuid(i),
+        'name': 'plan-%d' % i,
+        'description': None,
+        'status': 'suspended' if i % 3 else 'started',
+        'provider_id': PROVIDER_ID,
+        'project_id': PROJECT_ID,
+        'resources': [{'id': _uuid(i * 10 + j), 'type': 'OS::Nova::Server',
+                       'name': 'server-%d' % j, 'extra_info': {}}
+                      for j in range(2)],
+        'parameters': {'OS::Nova::Server': {'backup_mode': 'full'}},
+    }
+
+
+def _resource_graph(nodes):
+    return [{'0x%d' % i: ['OS::Nova::Server', _uuid(i), 'server-%d' % i,
+                          {'availability_zone': 'az1'}]}
+            for i in range(nodes)] + [[['0x%d' % i, ['0x%d' % (i + 1)]]
+                                       for i in range(nodes - 1)]]
+
+
+def _checkpoint(i, resource_graph):
+    plan = _plan(i % 100)
+    return {
+        'id': _uuid(i),
+        'project_id': PROJECT_ID,
+        'status': 'available',
+        'protection_plan': {'id': plan['id'], 'name': plan['name'],
+                            'provider_id': PROVIDER_ID,
+                            'resources': plan['resources']},
+        'resource_graph': resource_graph,
+        'extra_info': {'created_by': 'manual'},
+        'created_at': CREATED_AT,
+    }
+
+
+def _operation_log(i):
+    return {
+        'id': _uuid(i),
+        'project_id': PROJECT_ID,
+        'operation_type': 'protect',
+        'checkpoint_id': _uuid(i + 1),
+        'plan_id': _uuid(i % 100),
+        'provider_id': PROVIDER_ID,
+        'restore_id': None,
+        'scheduled_operation_id': _uuid(i % 10),
+        'status': 'success' if i % 10 else 'error',
+        'started_at': CREATED_AT,
+        'ended_at': CREATED_AT,
+        'error_info': None if i % 10 else 'Protect plan failed',
+        'extra_info': {'created_by': 'operation-engine'},
+        'created_at': CREATED_AT,
+    }
+
+
+class _FakeAPI(object):
+    """Returns a pre-encoded list body, decoded on every request."""
+
+    project_id = 'project_id'
+
+    def __init__(self, body, codec):
+        self.content = jsonutils.dump_as_bytes(body)
+        self.codec = http.get_json_codec(codec)
+
+    def json_request(self, method, url, **kwargs):
+        return None, self.codec.loads(self.content)
+
+
+def _register_list_benchmarks():
+    codecs = ['json']
+    if http.get_json_codec('auto').name != 'json':
+        codecs.append(http.get_json_codec('auto').name)
+    lists = (('manager_list', setup_manager_list, LIST_SIZES),
+             ('checkpoint_list', setup_checkpoint_list,
+              CHECKPOINT_LIST_SIZES),
+             ('operation_log_list', setup_operation_log_list, LIST_SIZES))
+    for name, setup, sizes in lists:
+        for size in sizes:
+            for codec in codecs:
+                benchmark('%s.%s.%d' % (name, codec, size),
+                          slow=size >= 100000, size=size,
+                          codec=codec)(setup)
+
+
+def setup_manager_list(size, codec):
+    manager = plans.PlanManager(
+        _FakeAPI({'plans': [_plan(i) for i in range(size)]}, codec))
+    return lambda: manager.list(limit=size, sort='created_at:desc')
+
+
+def setup_checkpoint_list(size, codec):
+    # Karbor returns the resource graph of a checkpoint as a JSON string.
+    graph = jsonutils.dumps(_resource_graph(CHECKPOINT_GRAPH_NODES))
+    manager = checkpoints.CheckpointManager(_FakeAPI(
+        {'checkpoints': [_checkpoint(i, graph) for i in range(size)]},
+        codec))
+    return lambda: manager.list(PROVIDER_ID, limit=size)
+
+
+def setup_operation_log_list(size, codec):
+    manager = operation_logs.OperationLogManager(_FakeAPI(
+        {'operation_logs': [_operation_log(i) for i in range(size)]},
+        codec))
+    return lambda: manager.list(limit=size, sort='created_at:desc')
+
+
+_register_list_benchmarks()
+
+
+@benchmark('build_list_url')
+def setup_build_list_url():
+    manager = plans.PlanManager(_FakeAPI({}, 'json'))
+    search_opts = {'name': 'plan', 'status': 'started', 'all_tenants': 1,
+                   'provider_id': None}
+
+    def run():
+        manager._build_list_url('plans', detailed=True,
+                                search_opts=search_opts,
+                                marker=_uuid(1), limit=100,
+                                sort='name:asc,created_at:desc')
+    return run
+
+
+@benchmark('format_sort_param')
+def setup_format_sort_param():
+    manager = plans.PlanManager(_FakeAPI({}, 'json'))
+    sort = ['id:asc', ('status', 'desc'), 'name', 'created_at:desc']
+    return lambda: manager._format_sort_param(sort)
+
+
+@benchmark('print_list.1000')
+def setup_print_list():
+    rows = [plans.Plan(None, _plan(i), loaded=True) for i in range(1000)]
+    fields = ['Id', 'Name', 'Description', 'Status']
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            utils.print_list(rows, list(fields))
+    return run
+
+
+@benchmark('print_dict')
+def setup_print_dict():
+    info = dict(_plan(1))
+    info['resource_graph'] = jsonutils.dumps(_resource_graph(100))
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            utils.print_dict(info, dict_format_list=['resources',
+                                                     'parameters'],
+                             json_format_list=['resource_graph'])
+    return run
+
+
+@benchmark('format_checkpoint.1000')
+def setup_format_checkpoint():
+    checkpoint = {
+        'id': _uuid(1),
+        'status': 'available',
+        'protection_plan': {'id': _uuid(2), 'name': 'plan',
+                            'resources': []},
+        'resource_graph': jsonutils.dumps(_resource_graph(1000)),
+        'links': [],
+    }
+    return lambda: osc_checkpoints.format_checkpoint(dict(checkpoint))
+
+
+@benchmark('json_prettyprint.1000')
+def setup_json_prettyprint():
+    graph = jsonutils.dumps(_resource_graph(1000))
+    return lambda: utils.json_prettyprint(graph)
+
+
+@benchmark('extract_resources.10000')
+def setup_extract_resources():
+    args = argparse.Namespace(resources=','.join(
+        '%s=OS::Nova::Server=server-%d' % (_uuid(i), i)
+        for i in range(10000)))
+    return lambda: karbor_utils.extract_resources(args)
+
+
+@benchmark('extract_parameters.1000')
+def setup_extract_parameters():
+    args = argparse.Namespace(parameters_json=None, parameters=[
+        'resource_type=OS::Nova::Server,resource_id=%s,backup_mode=full,'
+        'backup_name=backup-%d' % (_uuid(i), i) for i in range(1000)])
+    return lambda: karbor_utils.extract_parameters(args)
+
+
+@benchmark('cli_startup', slow=True)
+def setup_cli_startup():
+    argv = [sys.executable, '-m', 'karborclient.shell', 'help']
+    return lambda: subprocess.check_call(argv, stdout=subprocess.DEVNULL)
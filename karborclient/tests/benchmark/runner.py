@@ -0,0 +1,184 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Run the benchmarks and compare the results with a baseline.
+
+Usage::
+
+    tox -e bench
+    tox -e bench -- --quick --filter manager_list
+    tox -e bench -- --save-baseline
+
+The results are printed as a table and, with ``--output``, written as JSON.
+The command exits with status 1 when a benchmark is slower than the
+baseline by more than ``--max-regression``.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+
+from oslo_serialization import jsonutils
+
+from karborclient.tests.benchmark import cases
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """Time ``func`` and return the per call timings in seconds.
+
+    The number of calls per sample grows until a sample lasts at least
+    ``min_time`` seconds; ``repeat`` samples are taken.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1000000:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return {'min': min(samples), 'median': statistics.median(samples),
+            'loops': loops, 'repeat': repeat}
+
+
+def run(pattern=None, quick=False, repeat=5, min_time=0.2, stream=None):
+    """Run the selected benchmarks and return the results document."""
+    stream = stream or sys.stderr
+    results = {}
+    for name in sorted(cases.BENCHMARKS):
+        setup, kwargs, slow = cases.BENCHMARKS[name]
+        if pattern and not re.search(pattern, name):
+            continue
+        if quick and slow:
+            continue
+        print('Running %s...' % name, file=stream)
+        results[name] = measure(setup(**kwargs), repeat=repeat,
+                                min_time=min_time)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'benchmarks': results,
+    }
+
+
+def compare(results, baseline, max_regression=0.25):
+    """Compare ``results`` with ``baseline`` on the min timings.
+
+    :returns: list of (name, current, baseline, ratio, regressed) tuples;
+              baseline and ratio are None for new benchmarks.
+    """
+    rows = []
+    old = baseline.get('benchmarks', {}) if baseline else {}
+    for name, result in sorted(results['benchmarks'].items()):
+        if name not in old:
+            rows.append((name, result['min'], None, None, False))
+            continue
+        ratio = result['min'] / old[name]['min']
+        rows.append((name, result['min'], old[name]['min'], ratio,
+                     ratio > 1 + max_regression))
+    return rows
+
+
+def _format_time(seconds):
+    if seconds is None:
+        return '-'
+    for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds * scale >= 1:
+            return '%.2f%s' % (seconds * scale, unit)
+    return '%.0fns' % (seconds * 1e9)
+
+
+def print_comparison(rows, stream=None):
+    stream = stream or sys.stdout
+    width = max([len('Benchmark')] + [len(row[0]) for row in rows])
+    print('%-*s %12s %12s %8s' % (width, 'Benchmark', 'Current',
+                                  'Baseline', 'Ratio'), file=stream)
+    for name, current, old, ratio, regressed in rows:
+        print('%-*s %12s %12s %8s%s' % (
+            width, name, _format_time(current), _format_time(old),
+            '-' if ratio is None else '%.2fx' % ratio,
+            '  REGRESSION' if regressed else ''), file=stream)
+
+
+def _load(path):
+    with open(path) as f:
+        return jsonutils.loads(f.read())
+
+
+def _dump(document, path):
+    with open(path, 'w') as f:
+        f.write(jsonutils.dumps(document, indent=2, sort_keys=True) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='karborclient-bench',
+        description='Benchmark the karborclient hot paths.')
+    parser.add_argument('--filter', metavar='<regex>',
+                        help='Only run the benchmarks matching <regex>.')
+    parser.add_argument('--quick', action='store_true',
+                        help='Skip the slow benchmarks (100k rows, CLI '
+                             'startup).')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of samples per benchmark.')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Minimal duration of a sample in seconds.')
+    parser.add_argument('--output', metavar='<file>',
+                        help='Write the results as JSON to <file>.')
+    parser.add_argument('--baseline', metavar='<file>', default=BASELINE,
+                        help='Baseline to compare with, default: '
+                             'the stored baseline.')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Allowed slowdown against the baseline before '
+                             'failing, as a fraction. Default=0.25.')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store the results as the new baseline.')
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, quick=args.quick, repeat=args.repeat,
+                  min_time=args.min_time)
+    if args.output:
+        _dump(results, args.output)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        baseline = _load(args.baseline)
+    rows = compare(results, baseline, args.max_regression)
+    print_comparison(rows)
+
+    if args.save_baseline:
+        if baseline:
+            baseline['benchmarks'].update(results['benchmarks'])
+            results['benchmarks'] = baseline['benchmarks']
+        _dump(results, args.baseline)
+        return 0
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -133,3 +133,16 @@ class FakeClient(object):
 
     def authenticate(self):
         pass
+
+
+class FakeClock(object):
+    """A clock which only moves when told to, or when slept on."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
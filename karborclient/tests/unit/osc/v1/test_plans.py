@@ -15,7 +15,11 @@ import copy
 
 from karborclient.osc.v1 import plans as osc_plans
 from karborclient.tests.unit.osc.v1 import fakes
+from karborclient.v1 import checkpoints
 from karborclient.v1 import plans
+from karborclient.v1 import providers
+from karborclient.v1 import scheduled_operations
+from karborclient.v1 import triggers
 
 
 PLAN_INFO = {
@@ -181,3 +185,40 @@ class TestShowPlan(TestPlans):
         self.assertEqual(self._plan_info['provider_id'], data[4])
         self.assertEqual(self._plan_info['resources'], data[5])
         self.assertEqual(self._plan_info['status'], data[6])
+
+    def test_plan_show_with_related(self):
+        client = self.app.client_manager.data_protection
+        client.providers.get.return_value = providers.Provider(
+            None, {'id': PLAN_INFO['provider_id'], 'name': 'OS Infra'})
+        client.checkpoints.list.return_value = [checkpoints.Checkpoint(
+            None, {'id': 'c1', 'status': 'available',
+                   'created_at': '2017-10-25T07:06:58.000000'})]
+        client.scheduled_operations.list.return_value = [
+            scheduled_operations.ScheduledOperation(None, {
+                'id': 'o1', 'name': 'op', 'trigger_id': 't1',
+                'operation_definition': {'plan_id': PLAN_INFO['id']}}),
+            scheduled_operations.ScheduledOperation(None, {
+                'id': 'o2', 'name': 'other', 'trigger_id': 't1',
+                'operation_definition': {'plan_id': 'other'}})]
+        client.triggers.list.return_value = [
+            triggers.Trigger(None, {'id': 't1', 'name': 'hourly',
+                                    'type': 'time'})]
+        arglist = ['204c825e-eb2f-4609-95ab-70b3caa43ac8', '--with-related',
+                   '--checkpoint-limit', '3']
+        verifylist = [('plan', '204c825e-eb2f-4609-95ab-70b3caa43ac8'),
+                      ('with_related', True), ('checkpoint_limit', 3)]
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+
+        columns, data = self.cmd.take_action(parsed_args)
+
+        data = dict(zip(columns, data))
+        self.assertEqual('OS Infra (%s)' % PLAN_INFO['provider_id'],
+                         data['provider'])
+        self.assertEqual('c1 available 2017-10-25T07:06:58.000000',
+                         data['latest_checkpoints'])
+        self.assertEqual('op (o1), trigger hourly (time)',
+                         data['scheduled_operations'])
+        self.assertNotIn('related_errors', data)
+        client.checkpoints.list.assert_called_once_with(
+            PLAN_INFO['provider_id'], search_opts={'plan_id': PLAN_INFO['id']},
+            limit=3, sort='created_at:desc')
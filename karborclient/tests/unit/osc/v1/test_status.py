@@ -0,0 +1,58 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from karborclient.osc.v1 import status as osc_status
+from karborclient.tests.unit.osc.v1 import fakes
+from karborclient.v1 import checkpoints
+from karborclient.v1 import plans
+from karborclient.v1 import providers
+
+PLAN_INFO = {
+    "id": "204c825e-eb2f-4609-95ab-70b3caa43ac8",
+    "name": "OS Volume protection plan.",
+    "status": "suspended",
+    "provider_id": "cf56bd3e-97a7-4078-b6d5-f36246333fd9",
+}
+
+CHECKPOINT_INFO = {
+    "id": "dcb20606-ad71-40a3-80e4-ef0fafdad0c3",
+    "status": "error",
+    "protection_plan": {"id": PLAN_INFO["id"], "name": PLAN_INFO["name"]},
+    "created_at": "2017-10-25T07:06:58.000000",
+}
+
+
+class TestShowStatus(fakes.TestDataProtection):
+    def setUp(self):
+        super(TestShowStatus, self).setUp()
+        client = self.app.client_manager.data_protection
+        client.plans.list.return_value = [plans.Plan(None, PLAN_INFO)]
+        client.providers.list.return_value = [
+            providers.Provider(None, {"id": PLAN_INFO["provider_id"]})]
+        client.checkpoints.list.return_value = [
+            checkpoints.Checkpoint(None, CHECKPOINT_INFO)]
+        client.restores.list.return_value = []
+        client.operation_logs.list.return_value = []
+        client.services.list.return_value = []
+        self.cmd = osc_status.ShowStatus(self.app, None)
+
+    def test_status(self):
+        parsed_args = self.check_parser(self.cmd, [], [])
+        columns, data = self.cmd.take_action(parsed_args)
+        self.assertEqual(('plans', 'providers', 'checkpoints', 'restores',
+                          'operation_logs', 'services', 'failing_plans',
+                          'latest_checkpoints'), columns)
+        self.assertEqual(('1 (suspended: 1)', '1', '1 (error: 1)', '0', '0',
+                          '0', PLAN_INFO["name"]), data[:7])
+        self.app.client_manager.data_protection.checkpoints.list.\
+            assert_called_once_with(PLAN_INFO["provider_id"])
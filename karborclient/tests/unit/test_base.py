@@ -0,0 +1,83 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+import testtools
+
+from karborclient.common import base
+
+
+class FakeManager(base.Manager):
+    resource_class = base.Resource
+    shared_fields = ('status', 'protection_plan', 'count')
+
+
+def _fake_rows():
+    # Build rows from decoded JSON so no value is shared up front.
+    return [{'id': ''.join(['id', str(i)]),
+             'status': ''.join(['avail', 'able']),
+             'count': 1 if i % 2 else True,
+             'protection_plan': {'id': ''.join(['plan', '1']),
+                                 'resources': [{'id': 'r1'}]}}
+            for i in range(4)]
+
+
+class SharedValuesTest(testtools.TestCase):
+
+    def test_share_strings(self):
+        share = base.SharedValues(('status',))
+        rows = [share(row) for row in _fake_rows()]
+        self.assertTrue(all(r['status'] is rows[0]['status'] for r in rows))
+        self.assertIsNot(rows[0]['id'], rows[1]['id'])
+
+    def test_share_nested_objects(self):
+        share = base.SharedValues(('protection_plan',))
+        rows = [share(row) for row in _fake_rows()]
+        plans = set(id(r['protection_plan']) for r in rows)
+        self.assertEqual(1, len(plans))
+        self.assertEqual({'id': 'plan1', 'resources': [{'id': 'r1'}]},
+                         rows[3]['protection_plan'])
+
+    def test_share_distinguishes_types(self):
+        share = base.SharedValues(('a',))
+        first = share({'a': {'x': 1}})['a']
+        second = share({'a': {'x': True}})['a']
+        self.assertIsNot(first, second)
+        self.assertIs(True, second['x'])
+        self.assertIsNot(share({'a': [1]})['a'], share({'a': [1.0]})['a'])
+
+
+class ManagerListTest(testtools.TestCase):
+
+    def _manager(self, rows):
+        api = mock.Mock(project_id='project_id')
+        api.json_request.return_value = ({}, {'items': rows})
+        return FakeManager(api)
+
+    def test_list_shares_values(self):
+        manager = self._manager(_fake_rows())
+        items = manager._list('/items', 'items')
+        self.assertEqual(4, len(items))
+        self.assertIs(items[0].protection_plan, items[2].protection_plan)
+        self.assertIs(items[0].status, items[3].status)
+        self.assertEqual(1, items[1].count)
+        self.assertIs(True, items[0].count)
+        # to_dict() still hands out independent copies.
+        self.assertIsNot(items[0].to_dict()['protection_plan'],
+                         items[2].to_dict()['protection_plan'])
+
+    def test_list_return_raw_is_untouched(self):
+        manager = self._manager(_fake_rows())
+        data = manager._list('/items', 'items', return_raw=True)
+        self.assertIsNot(data[0]['protection_plan'],
+                         data[1]['protection_plan'])
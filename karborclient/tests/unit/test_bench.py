@@ -0,0 +1,90 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import requests
+import testtools
+
+from karborclient import bench
+from karborclient.common.apiclient import exceptions as exc
+from karborclient import fake_server
+from karborclient.v1 import client
+
+
+class HelpersTest(testtools.TestCase):
+
+    def test_parse_mix(self):
+        self.assertEqual({'list': 7.0, 'show': 3.0, 'create': 1.0},
+                         bench.parse_mix('list=7,show=3,create'))
+        self.assertRaises(exc.CommandError, bench.parse_mix, 'delete=1')
+        self.assertRaises(exc.CommandError, bench.parse_mix, 'list=0')
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, bench.percentile(values, 50))
+        self.assertEqual(99, bench.percentile(values, 99))
+        self.assertEqual(100, bench.percentile(values, 100))
+        self.assertIsNone(bench.percentile([], 50))
+
+    def test_connection_counter(self):
+        with fake_server.FakeServer() as server:
+            session = requests.Session()
+            with bench.ConnectionCounter() as counter:
+                for _ in range(3):
+                    session.get(server.endpoint + '/plans')
+                requests.get(server.endpoint + '/plans')
+        self.assertEqual(2, counter.count)
+
+
+class RunTest(testtools.TestCase):
+
+    def setUp(self):
+        super(RunTest, self).setUp()
+        self.server = fake_server.FakeServer(checkpoints=20).start()
+        self.addCleanup(self.server.stop)
+        self.cs = client.Client(self.server.endpoint, token='token',
+                                project_id=self.server.project_id,
+                                coalesce_requests=False)
+
+    def test_run_requests(self):
+        workload = bench.Workload(self.cs, 'checkpoints',
+                                  fake_server.PROVIDER_ID, page_size=10)
+        workload.prepare()
+        self.assertEqual(10, len(workload.ids))
+        results = bench.run(workload, {'list': 1, 'show': 1, 'create': 1},
+                            workers=3, requests=30)
+
+        self.assertEqual(30, results['requests'])
+        self.assertEqual(30, sum(s['count']
+                                 for s in results['operations'].values()))
+        self.assertEqual({}, results['errors'])
+        self.assertGreater(results['throughput'], 0)
+        self.assertLessEqual(results['latency']['p50'],
+                             results['latency']['p99'])
+        created = results['operations']['create']['count']
+        self.assertEqual(created, len(workload.created))
+        workload.cleanup()
+        self.assertEqual(20, len(self.server.app.dataset.checkpoints(
+            fake_server.PROVIDER_ID).records))
+
+    def test_run_errors(self):
+        workload = bench.Workload(self.cs, 'plans', fake_server.PROVIDER_ID)
+        workload.prepare()
+        self.server.app.fail_next(503, count=5)
+        results = bench.run(workload, {'list': 1}, workers=1, requests=10)
+        self.assertEqual({'list: ServiceUnavailable (503)': 5},
+                         results['errors'])
+        self.assertEqual(5, results['operations']['list']['errors'])
+
+    def test_main_json(self):
+        self.assertEqual(0, bench.main(['--fake', '--requests', '5',
+                                        '--workers', '2', '--json']))
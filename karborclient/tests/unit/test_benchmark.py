@@ -0,0 +1,64 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import six
+import testtools
+
+from karborclient.tests.benchmark import cases
+from karborclient.tests.benchmark import runner
+
+
+class BenchmarkRunnerTest(testtools.TestCase):
+
+    def test_run(self):
+        results = runner.run('^(format_sort_param|manager_list.json.1000)$',
+                             repeat=2, min_time=0, stream=six.StringIO())
+        self.assertEqual(['format_sort_param', 'manager_list.json.1000'],
+                         sorted(results['benchmarks']))
+        for result in results['benchmarks'].values():
+            self.assertEqual(1, result['loops'])
+            self.assertEqual(2, result['repeat'])
+            self.assertGreater(result['min'], 0)
+
+    def test_list_payloads(self):
+        setup, kwargs, slow = cases.BENCHMARKS['checkpoint_list.json.1000']
+        checkpoints = setup(**kwargs)()
+        self.assertEqual(1000, len(checkpoints))
+        self.assertIsInstance(checkpoints[0].resource_graph,
+                              six.string_types)
+
+        setup, kwargs, slow = cases.BENCHMARKS[
+            'operation_log_list.json.1000']
+        logs = setup(**kwargs)()
+        self.assertEqual(1000, len(logs))
+        self.assertEqual('error', logs[0].status)
+
+    def test_quick_skips_slow(self):
+        self.assertTrue(cases.BENCHMARKS['cli_startup'][2])
+        results = runner.run('cli_startup', quick=True,
+                             stream=six.StringIO())
+        self.assertEqual({}, results['benchmarks'])
+
+    def test_compare(self):
+        baseline = {'benchmarks': {'a': {'min': 1.0}, 'b': {'min': 1.0}}}
+        results = {'benchmarks': {'a': {'min': 1.2}, 'b': {'min': 1.5},
+                                  'c': {'min': 0.1}}}
+        self.assertEqual([('a', 1.2, 1.0, 1.2, False),
+                          ('b', 1.5, 1.0, 1.5, True),
+                          ('c', 0.1, None, None, False)],
+                         runner.compare(results, baseline, 0.25))
+
+    def test_compare_without_baseline(self):
+        results = {'benchmarks': {'a': {'min': 1.0}}}
+        self.assertEqual([('a', 1.0, None, None, False)],
+                         runner.compare(results, None))
@@ -0,0 +1,81 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import testtools
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import circuitbreaker
+from karborclient.tests.unit import fakes
+
+
+class CircuitBreakerTest(testtools.TestCase):
+
+    def setUp(self):
+        super(CircuitBreakerTest, self).setUp()
+        self.clock = fakes.FakeClock()
+        self.breaker = circuitbreaker.CircuitBreaker(
+            'http://karbor:8799', failure_threshold=3, reset_timeout=10,
+            clock=self.clock)
+
+    def _fail(self, count):
+        for _ in range(count):
+            self.breaker.enter()
+            self.breaker.exit(True)
+
+    def test_opens_after_consecutive_failures(self):
+        self._fail(2)
+        self.breaker.enter()
+        self.breaker.exit(False)
+        self._fail(2)
+        self.assertEqual(circuitbreaker.CLOSED, self.breaker.state)
+        self._fail(1)
+        self.assertEqual(circuitbreaker.OPEN, self.breaker.state)
+        e = self.assertRaises(exc.CircuitOpen, self.breaker.enter)
+        self.assertIsInstance(e, exc.ConnectionRefused)
+
+    def test_half_open_probe(self):
+        self._fail(3)
+        self.assertFalse(self.breaker.available())
+        self.clock.now = 10
+        self.assertEqual(circuitbreaker.HALF_OPEN, self.breaker.state)
+        self.assertTrue(self.breaker.available())
+        self.breaker.enter()
+        # A single probe at a time.
+        self.assertFalse(self.breaker.available())
+        self.assertRaises(exc.CircuitOpen, self.breaker.enter)
+        self.breaker.exit(False)
+        self.assertEqual(circuitbreaker.CLOSED, self.breaker.state)
+        self.breaker.enter()
+
+    def test_half_open_failure_reopens(self):
+        self._fail(3)
+        self.clock.now = 10
+        self._fail(1)
+        self.assertEqual(circuitbreaker.OPEN, self.breaker.state)
+        self.clock.now = 19
+        self.assertRaises(exc.CircuitOpen, self.breaker.enter)
+        self.clock.now = 20
+        self.breaker.enter()
+
+    def test_breakers_per_endpoint(self):
+        breakers = circuitbreaker.get_circuit_breakers(
+            {'failure_threshold': 1})
+        first = breakers.get('http://karbor-1')
+        self.assertIs(first, breakers.get('http://karbor-1'))
+        first.enter()
+        first.exit(True)
+        self.assertRaises(exc.CircuitOpen, first.enter)
+        self.assertFalse(breakers.available('http://karbor-1'))
+        self.assertTrue(breakers.available('http://karbor-2'))
+        breakers.get('http://karbor-2').enter()
+        self.assertIs(breakers, circuitbreaker.get_circuit_breakers(breakers))
+        self.assertIsNone(circuitbreaker.get_circuit_breakers(None))
@@ -0,0 +1,169 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+import fixtures
+import mock
+import testtools
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import concurrency
+from karborclient.common import http
+from karborclient.tests.unit import fakes
+
+
+class AIMDControllerTest(testtools.TestCase):
+
+    def setUp(self):
+        super(AIMDControllerTest, self).setUp()
+        self.clock = fakes.FakeClock()
+
+    def _run(self, controller, latency, overloaded=False):
+        started_at = controller.acquire()
+        self.clock.now += latency
+        controller.release(started_at, overloaded)
+
+    def test_additive_increase(self):
+        controller = concurrency.AIMDController(initial=2, max_limit=4,
+                                                clock=self.clock)
+        # About one more per round of ``limit`` operations.
+        self._run(controller, 0.1)
+        self._run(controller, 0.1)
+        self.assertEqual(2, controller.limit)
+        self._run(controller, 0.1)
+        self.assertEqual(3, controller.limit)
+        for _ in range(20):
+            self._run(controller, 0.1)
+        self.assertEqual(4, controller.limit)
+
+    def test_multiplicative_decrease(self):
+        controller = concurrency.AIMDController(initial=16, clock=self.clock)
+        self._run(controller, 0.1, overloaded=True)
+        self.assertEqual(8, controller.limit)
+        for _ in range(10):
+            self._run(controller, 0.1, overloaded=True)
+        self.assertEqual(1, controller.limit)
+
+    def test_decrease_once_per_episode(self):
+        controller = concurrency.AIMDController(initial=16, clock=self.clock)
+        started = [controller.acquire() for _ in range(4)]
+        self.clock.now += 0.1
+        for started_at in started:
+            controller.release(started_at, overloaded=True)
+        self.assertEqual(8, controller.limit)
+
+    def test_rising_latency(self):
+        controller = concurrency.AIMDController(initial=8, clock=self.clock)
+        self._run(controller, 0.1)
+        self._run(controller, 0.2)
+        self.assertEqual(8, controller.limit)
+        self._run(controller, 0.5)
+        self.assertEqual(4, controller.limit)
+
+    def test_acquire_waits_for_limit(self):
+        controller = concurrency.AIMDController(initial=1)
+        started_at = controller.acquire()
+        acquired = threading.Event()
+
+        def acquire():
+            controller.release(controller.acquire())
+            acquired.set()
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.05))
+        controller.release(started_at)
+        thread.join()
+        self.assertTrue(acquired.is_set())
+
+    def test_decisions_logged(self):
+        logger = self.useFixture(fixtures.FakeLogger(level='DEBUG'))
+        controller = concurrency.AIMDController(initial=4, clock=self.clock)
+        self._run(controller, 0.1, overloaded=True)
+        self.assertIn('Concurrency limit 4 -> 2: API overloaded',
+                      logger.output)
+
+    def test_get_controller(self):
+        controller = concurrency.get_controller({'max_limit': 8})
+        self.assertEqual(8, controller.max_limit)
+        self.assertIs(controller, concurrency.get_controller(controller))
+        self.assertEqual(4, concurrency.get_controller().limit)
+
+    def test_client_controller(self):
+        client = mock.Mock()
+        client.http_client.concurrency = concurrency.AIMDController()
+        self.assertIs(client.http_client.concurrency,
+                      concurrency.client_controller(client))
+        self.assertIsInstance(concurrency.client_controller(mock.Mock()),
+                              concurrency.AIMDController)
+
+
+class RunBulkTest(testtools.TestCase):
+
+    def test_results_in_order(self):
+        def func(item):
+            if item == 3:
+                raise exc.NotFound()
+            time.sleep(0.001 * (10 - item))
+            return item * 2
+
+        results = concurrency.run_bulk(func, range(10))
+        self.assertEqual(list(range(10)), [r.item for r in results])
+        self.assertEqual(10, results[5].result)
+        self.assertIsInstance(results[3].error, exc.NotFound)
+
+    def test_bounded_by_limit(self):
+        controller = concurrency.AIMDController(initial=3, max_limit=3)
+        lock = threading.Lock()
+        inflight = []
+        peak = []
+
+        def func(item):
+            with lock:
+                inflight.append(item)
+                peak.append(len(inflight))
+            time.sleep(0.01)
+            with lock:
+                inflight.remove(item)
+
+        concurrency.run_bulk(func, range(12), controller)
+        self.assertEqual(3, max(peak))
+
+    def test_overload_cuts_limit(self):
+        controller = concurrency.AIMDController(initial=8)
+
+        def func(item):
+            raise exc.TooManyRequests()
+
+        results = concurrency.run_bulk(func, ['a'], controller)
+        self.assertIsInstance(results[0].error, exc.TooManyRequests)
+        self.assertEqual(4, controller.limit)
+
+    def test_client_deadline(self):
+        client = http.HTTPClient('http://karbor:8082')
+
+        def func(item):
+            return client.active_deadline
+
+        with client.deadline(30) as active:
+            results = concurrency.run_bulk(func, range(4), client=client)
+            self.assertEqual(4 * [active], [r.result for r in results])
+            results = concurrency.run_parallel(
+                {'plans': lambda: func(None),
+                 'triggers': lambda: func(None)}, client)
+            self.assertEqual({'plans': active, 'triggers': active},
+                             {name: result.result
+                              for name, result in results.items()})
+            # The deadline of a thread is not seen by the others.
+            results = concurrency.run_bulk(func, range(4))
+            self.assertEqual(4 * [None], [r.result for r in results])
@@ -0,0 +1,172 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import socket
+import threading
+
+import fixtures
+import mock
+import six
+import testtools
+
+from karborclient import daemon
+from karborclient import fake_server
+
+
+class DaemonTest(testtools.TestCase):
+
+    def setUp(self):
+        super(DaemonTest, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'daemon.sock')
+        self.server = fake_server.FakeServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        for name, value in (('KARBOR_URL', self.server.endpoint),
+                            ('OS_AUTH_TOKEN', 'token'),
+                            ('OS_NO_CLIENT_AUTH', '1')):
+            self.useFixture(fixtures.EnvironmentVariable(name, value))
+
+    def _start_daemon(self):
+        self.daemon = daemon.Daemon(self.path, idle_timeout=30)
+        self.daemon.bind()
+        thread = threading.Thread(target=self.daemon.serve)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.daemon.stop)
+
+    def test_socket_path(self):
+        self.useFixture(fixtures.EnvironmentVariable('XDG_RUNTIME_DIR',
+                                                     '/run/user/1000'))
+        self.assertEqual('/run/user/1000/karborclient/daemon.sock',
+                         daemon.socket_path())
+        self.useFixture(fixtures.EnvironmentVariable(daemon.SOCKET_ENV,
+                                                     '/tmp/karbor.sock'))
+        self.assertEqual('/tmp/karbor.sock', daemon.socket_path())
+
+    def test_forward(self):
+        self._start_daemon()
+        plan = list(self.server.app.dataset.collection(
+            'plans').records.values())[0]
+        code, stdout, stderr = daemon.forward(['plan-list'], self.path)
+        self.assertEqual(0, code)
+        self.assertIn(plan['id'], stdout)
+        code, stdout, stderr = daemon.forward(['plan-show', plan['id']],
+                                              self.path)
+        self.assertEqual(0, code)
+        self.assertIn(plan['name'], stdout)
+        # Both commands used the same client.
+        self.assertEqual(1, len(self.daemon.clients))
+
+    def test_forward_uses_caller_environment(self):
+        self._start_daemon()
+        self.useFixture(fixtures.EnvironmentVariable('KARBOR_URL'))
+        code, stdout, stderr = daemon.forward(['plan-list'], self.path)
+        self.assertEqual(1, code)
+        self.assertIn('--karbor-url', stderr)
+
+    def test_forward_sends_shell_environment_only(self):
+        self._start_daemon()
+        self.useFixture(fixtures.EnvironmentVariable('UNRELATED_SECRET',
+                                                     'secret'))
+        with mock.patch.object(self.daemon, 'run',
+                               return_value=(0, '', '')) as mock_run:
+            daemon.forward(['plan-list'], self.path)
+        env = mock_run.call_args[0][1]
+        self.assertEqual('token', env['OS_AUTH_TOKEN'])
+        self.assertEqual(self.server.endpoint, env['KARBOR_URL'])
+        self.assertNotIn('UNRELATED_SECRET', env)
+        self.assertNotIn('PATH', env)
+
+    def test_run_hides_daemon_shell_environment(self):
+        environ = {}
+
+        def run_shell(shell, argv):
+            environ.update(os.environ)
+            return 0
+        server = daemon.Daemon(self.path)
+        with mock.patch.object(server, '_run_shell', side_effect=run_shell):
+            server.run(['plan-list'], {'KARBOR_URL': 'http://karbor',
+                                       'PATH': '/caller'})
+        self.assertEqual('http://karbor', environ['KARBOR_URL'])
+        self.assertNotIn('OS_AUTH_TOKEN', environ)
+        self.assertEqual(os.environ['PATH'], environ['PATH'])
+        self.assertEqual('token', os.environ['OS_AUTH_TOKEN'])
+
+    def test_shared_directory_refused(self):
+        self._start_daemon()
+        os.chmod(os.path.dirname(self.path), 0o755)
+        stderr = six.StringIO()
+        self.useFixture(fixtures.MonkeyPatch('sys.stderr', stderr))
+        self.assertIsNone(daemon.forward(['plan-list'], self.path))
+        self.assertIn('mode 0700', stderr.getvalue())
+        self.assertRaises(RuntimeError,
+                          daemon.Daemon(self.path + '.other').bind)
+
+    def test_daemon_of_other_user_refused(self):
+        self._start_daemon()
+        stderr = six.StringIO()
+        self.useFixture(fixtures.MonkeyPatch('sys.stderr', stderr))
+        with mock.patch.object(daemon, '_peer_uid',
+                               return_value=os.getuid() + 1):
+            self.assertIsNone(daemon.forward(['plan-list'], self.path))
+        self.assertIn('another user', stderr.getvalue())
+
+    def test_forward_error(self):
+        self._start_daemon()
+        code, stdout, stderr = daemon.forward(['plan-show'], self.path)
+        self.assertEqual(2, code)
+        self.assertIn('required', stderr)
+
+    def test_forward_without_daemon(self):
+        self.assertIsNone(daemon.forward(['plan-list'], self.path))
+        # Socket left by a daemon which was killed.
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        sock.close()
+        self.assertIsNone(daemon.forward(['plan-list'], self.path))
+
+    def test_bind_running(self):
+        self._start_daemon()
+        self.assertRaises(RuntimeError, daemon.Daemon(self.path).bind)
+
+    def test_idle_timeout(self):
+        server = daemon.Daemon(self.path, idle_timeout=0.01)
+        server.serve()
+        self.assertFalse(os.path.exists(self.path))
+
+    @mock.patch('karborclient.shell.main')
+    @mock.patch.object(daemon, 'forward', return_value=None)
+    def test_main_runs_in_process(self, mock_forward, mock_main):
+        daemon.main(['plan-list'])
+        mock_forward.assert_called_once_with(['plan-list'])
+        mock_main.assert_called_once_with(['plan-list'])
+
+    @mock.patch('karborclient.shell.main')
+    @mock.patch.object(daemon, 'forward')
+    def test_main_not_forwarded(self, mock_forward, mock_main):
+        daemon.main(['batch', '-'])
+        self.useFixture(fixtures.EnvironmentVariable(daemon.NO_DAEMON_ENV,
+                                                     '1'))
+        daemon.main(['plan-list'])
+        self.assertFalse(mock_forward.called)
+        self.assertEqual(2, mock_main.call_count)
+
+    @mock.patch.object(daemon, 'forward', return_value=(3, 'out', 'err'))
+    def test_main_forwarded(self, mock_forward):
+        stdout = self.useFixture(fixtures.StringStream('stdout')).stream
+        self.useFixture(fixtures.MonkeyPatch('sys.stdout', stdout))
+        stderr = self.useFixture(fixtures.StringStream('stderr')).stream
+        self.useFixture(fixtures.MonkeyPatch('sys.stderr', stderr))
+        ex = self.assertRaises(SystemExit, daemon.main, ['plan-list'])
+        self.assertEqual(3, ex.code)
@@ -0,0 +1,45 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import testtools
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import deadline
+
+
+class DeadlineTest(testtools.TestCase):
+
+    def setUp(self):
+        super(DeadlineTest, self).setUp()
+        self.now = 100.0
+        self.deadline = deadline.Deadline(10, lambda: self.now)
+
+    def test_timeout(self):
+        self.now = 104
+        self.assertEqual(6, self.deadline.remaining())
+        self.assertEqual(6, self.deadline.timeout())
+        self.assertEqual(2, self.deadline.timeout(2))
+        self.assertEqual(6, self.deadline.timeout('30'))
+        self.assertFalse(self.deadline.expired)
+
+    def test_expired(self):
+        self.now = 110
+        self.assertTrue(self.deadline.expired)
+        self.assertRaises(exc.DeadlineExceeded, self.deadline.check)
+        self.assertRaises(exc.DeadlineExceeded, self.deadline.timeout, 5)
+
+    def test_earliest(self):
+        later = deadline.Deadline(20, lambda: self.now)
+        self.assertIs(self.deadline, deadline.earliest(self.deadline, later))
+        self.assertIs(self.deadline, deadline.earliest(later, self.deadline))
+        self.assertIs(later, deadline.earliest(None, later))
+        self.assertIs(later, deadline.earliest(later, None))
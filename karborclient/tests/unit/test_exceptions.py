@@ -0,0 +1,42 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import testtools
+
+from karborclient.common.apiclient import exceptions as exc
+
+
+class FromResponseTest(testtools.TestCase):
+
+    def _error(self, status, headers=None):
+        resp = mock.Mock(status_code=status, headers=headers or {})
+        return exc.from_response(resp, 'GET', '/plans')
+
+    def test_too_many_requests(self):
+        e = self._error(429, {'retry-after': '3'})
+        self.assertIsInstance(e, exc.TooManyRequests)
+        self.assertIsInstance(e, exc.HTTPClientError)
+        self.assertNotIsInstance(e, exc.RequestEntityTooLarge)
+        self.assertEqual(3, e.retry_after)
+
+    def test_retry_after(self):
+        for status, cls in ((413, exc.RequestEntityTooLarge),
+                            (503, exc.ServiceUnavailable)):
+            e = self._error(status, {'retry-after': '5'})
+            self.assertIsInstance(e, cls)
+            self.assertEqual(5, e.retry_after)
+            self.assertEqual(0, self._error(status).retry_after)
+        e = self._error(429, {'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEqual(0, e.retry_after)
+        e = self._error(404, {'retry-after': '5'})
+        self.assertFalse(hasattr(e, 'retry_after'))
@@ -0,0 +1,148 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import requests
+import testtools
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient import fake_server
+from karborclient.v1 import client
+
+PROVIDER_ID = fake_server.PROVIDER_ID
+
+
+class FakeServerTestCase(testtools.TestCase):
+
+    server_kwargs = {}
+
+    def setUp(self):
+        super(FakeServerTestCase, self).setUp()
+        self.server = fake_server.FakeServer(**self.server_kwargs).start()
+        self.addCleanup(self.server.stop)
+        self.app = self.server.app
+        self.client = client.Client(self.server.endpoint, token='token',
+                                    project_id=self.server.project_id,
+                                    coalesce_requests=False)
+
+
+class DatasetTest(testtools.TestCase):
+
+    def test_deterministic(self):
+        ids = [list(fake_server.Dataset(seed=1).checkpoints(
+            PROVIDER_ID).records) for _ in range(2)]
+        self.assertEqual(ids[0], ids[1])
+        self.assertEqual(100, len(ids[0]))
+        self.assertNotEqual(ids[0], list(fake_server.Dataset(
+            seed=2).checkpoints(PROVIDER_ID).records))
+
+
+class PaginationTest(FakeServerTestCase):
+
+    server_kwargs = {'checkpoints': 25, 'max_limit': 10}
+
+    def test_marker_and_limit(self):
+        seen = []
+        marker = None
+        while True:
+            page = self.client.checkpoints.list(PROVIDER_ID, limit=10,
+                                                marker=marker)
+            if not page:
+                break
+            seen.extend(c.id for c in page)
+            marker = page[-1].id
+        self.assertEqual(25, len(set(seen)))
+        created = [self.app.dataset.checkpoints(PROVIDER_ID).records[i]
+                   ['created_at'] for i in seen]
+        self.assertEqual(sorted(created, reverse=True), created)
+
+    def test_max_limit_and_links(self):
+        status, body = self.app._list(
+            self.app.dataset.checkpoints(PROVIDER_ID), 'checkpoints',
+            'providers/%s/checkpoints' % PROVIDER_ID, {})
+        self.assertEqual(10, len(body['checkpoints']))
+        self.assertIn('marker=%s' % body['checkpoints'][-1]['id'],
+                      body['checkpoints_links'][0]['href'])
+
+    def test_sort_and_filter(self):
+        plans = self.client.plans.list(sort='name:asc')
+        self.assertEqual(sorted(p.name for p in plans),
+                         [p.name for p in plans])
+        plans = self.client.plans.list(search_opts={'name': 'plan-3'})
+        self.assertEqual(['plan-3'], [p.name for p in plans])
+
+    def test_invalid_marker(self):
+        self.assertRaises(exc.BadRequest, self.client.plans.list,
+                          marker='unknown')
+
+
+class ResourcesTest(FakeServerTestCase):
+
+    def test_checkpoint_status_progression(self):
+        plan = self.client.plans.list()[0]
+        checkpoint = self.client.checkpoints.create(PROVIDER_ID, plan.id)
+        self.assertEqual('protecting', checkpoint.status)
+        self.assertEqual('available', self.client.checkpoints.get(
+            PROVIDER_ID, checkpoint.id).status)
+
+        self.client.checkpoints.reset_state(PROVIDER_ID, checkpoint.id,
+                                            'error')
+        self.assertEqual('error', self.client.checkpoints.get(
+            PROVIDER_ID, checkpoint.id).status)
+        self.client.checkpoints.delete(PROVIDER_ID, checkpoint.id)
+        self.assertRaises(exc.NotFound, self.client.checkpoints.get,
+                          PROVIDER_ID, checkpoint.id)
+
+    def test_plan_create_update_delete(self):
+        plan = self.client.plans.create('my plan', PROVIDER_ID, [], {})
+        self.assertEqual('my plan', plan.name)
+        plan = self.client.plans.update(plan.id, {'name': 'renamed'})
+        self.assertEqual('renamed', plan.name)
+        self.client.plans.delete(plan.id)
+        self.assertRaises(exc.NotFound, self.client.plans.get, plan.id)
+
+    def test_other_endpoints(self):
+        self.assertEqual(2, len(self.client.providers.list()))
+        self.assertEqual(4, len(self.client.protectables.list()))
+        self.assertEqual(10, len(self.client.protectables.list_instances(
+            'OS::Nova::Server')))
+        self.assertEqual(10, len(self.client.scheduled_operations.list()))
+        self.assertEqual('disabled',
+                         self.client.services.disable(1).status)
+        self.assertEqual(50, self.client.quotas.defaults(
+            self.server.project_id).plans)
+
+
+class FaultInjectionTest(FakeServerTestCase):
+
+    server_kwargs = {'retry_after': 3}
+
+    def test_fail_next(self):
+        self.app.fail_next(429)
+        e = self.assertRaises(exc.TooManyRequests, self.client.plans.list)
+        self.assertEqual(3, e.retry_after)
+        self.app.fail_next(503, retry_after=5)
+        e = self.assertRaises(exc.ServiceUnavailable,
+                              self.client.plans.list)
+        self.assertEqual(5, e.retry_after)
+        self.assertEqual(10, len(self.client.plans.list()))
+
+    def test_error_rates(self):
+        self.app.error_rates = {503: 1.0}
+        self.assertRaises(exc.ServiceUnavailable, self.client.plans.list)
+
+    def test_connection_reuse(self):
+        session = requests.Session()
+        for _ in range(3):
+            session.get(self.server.endpoint + '/plans').raise_for_status()
+        self.assertEqual(1, self.server.connections)
+        self.assertEqual(3, len(self.app.requests))
@@ -0,0 +1,95 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import mock
+import testtools
+
+from karborclient.common import hedging
+
+
+class HedgerTest(testtools.TestCase):
+
+    def _slow_then_fast(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        responses = [mock.Mock(name='slow'), mock.Mock(name='fast')]
+        calls = []
+
+        def func():
+            calls.append(None)
+            if len(calls) == 1:
+                release.wait(5)
+                return responses[0]
+            return responses[1]
+
+        return func, calls, responses, release
+
+    def test_fast_response_not_hedged(self):
+        hedger = hedging.Hedger(initial_delay=1)
+        func = mock.Mock(return_value='resp')
+        self.assertEqual('resp', hedger.run(func))
+        func.assert_called_once_with()
+
+    def test_slow_response_hedged(self):
+        hedger = hedging.Hedger(initial_delay=0.01)
+        func, calls, responses, release = self._slow_then_fast()
+        self.assertIs(responses[1], hedger.run(func))
+        self.assertEqual(2, len(calls))
+        # The losing response is closed once it arrives.
+        release.set()
+        for _ in range(100):
+            if responses[0].close.called:
+                break
+            threading.Event().wait(0.01)
+        responses[0].close.assert_called_once_with()
+        responses[1].close.assert_not_called()
+
+    def test_budget(self):
+        hedger = hedging.Hedger(initial_delay=0.01, budget=0, burst=1)
+        self.assertTrue(hedger._spend())
+        func, calls, responses, release = self._slow_then_fast()
+        threading.Timer(0.05, release.set).start()
+        self.assertIs(responses[0], hedger.run(func))
+        self.assertEqual(1, len(calls))
+
+    def test_all_attempts_failed(self):
+        hedger = hedging.Hedger(initial_delay=0.01)
+        errors = [RuntimeError('first'), RuntimeError('second')]
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def func():
+            error = errors.pop(0)
+            if error.args == ('first',):
+                release.wait(0.1)
+            raise error
+
+        e = self.assertRaises(RuntimeError, hedger.run, func)
+        self.assertEqual('first', str(e))
+
+    def test_delay(self):
+        hedger = hedging.Hedger(percentile=90, initial_delay=2,
+                                min_samples=10)
+        for latency in range(1, 10):
+            hedger.observe(latency / 100.0)
+        self.assertEqual(2, hedger.delay())
+        hedger.observe(0.1)
+        self.assertEqual(0.09, hedger.delay())
+
+    def test_get_hedger(self):
+        self.assertIsNone(hedging.get_hedger(None))
+        hedger = hedging.get_hedger({'percentile': 99})
+        self.assertEqual(99, hedger.percentile)
+        self.assertIs(hedger, hedging.get_hedger(hedger))
+        self.assertRaises(ValueError, hedging.Hedger, percentile=100)
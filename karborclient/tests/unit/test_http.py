@@ -11,14 +11,34 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gzip
+import io
+import logging
 import socket
+import tempfile
+import threading
 
+import fixtures
 import mock
+from oslo_serialization import jsonutils
+import requests
 import testtools
 
 from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import deadline
 from karborclient.common import http
+from karborclient import fake_server
 from karborclient.tests.unit import fakes
+from karborclient.v1 import client
+
+
+def _streamed_response(status_code, content_type, content):
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp.headers['Content-Type'] = content_type
+    resp.raw = mock.Mock(wraps=io.BytesIO(content), version=11)
+    resp.raw.release_conn = mock.Mock()
+    return resp
 
 
 @mock.patch('karborclient.common.http.requests.request')
@@ -449,3 +469,612 @@ class HttpClientTest(testtools.TestCase):
             gsf.return_value = "SOMEWHERE"
             client = http.HTTPClient('https://foo')
             self.assertEqual("SOMEWHERE", client.verify_cert)
+
+    def test_http_json_request_coalesces_concurrent_gets(self, mock_request):
+        release = threading.Event()
+
+        def slow_request(*args, **kwargs):
+            release.wait(5)
+            return fakes.FakeHTTPResponse(
+                200, 'OK',
+                {'content-type': 'application/json'},
+                '{"plan": {"id": "1234"}}')
+        mock_request.side_effect = slow_request
+
+        client = http.HTTPClient('http://example.com:8082',
+                                 coalesce_requests=True)
+        results = []
+
+        def get_plan():
+            results.append(client.json_request('GET', '/plans/1234')[1])
+
+        threads = [threading.Thread(target=get_plan) for _ in range(4)]
+        threads[0].start()
+        while not client._inflight._calls:
+            release.wait(0.001)
+        for t in threads[1:]:
+            t.start()
+        call = list(client._inflight._calls.values())[0]
+        while call.waiters < 3:
+            release.wait(0.001)
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(1, mock_request.call_count)
+        self.assertEqual([{'plan': {'id': '1234'}}] * 4, results)
+        # Each caller gets its own copy of the decoded body.
+        self.assertEqual(4, len(set(id(r) for r in results)))
+
+    def test_http_json_request_no_coalescing_for_writes(self, mock_request):
+        mock_request.return_value = \
+            fakes.FakeHTTPResponse(
+                200, 'OK',
+                {'content-type': 'application/json'},
+                '{}')
+        client = http.HTTPClient('http://example.com:8082',
+                                 coalesce_requests=True)
+        with mock.patch.object(client._inflight, 'do') as mock_do:
+            client.json_request('POST', '/plans', data={})
+            client.json_request('GET', '/plans', data={})
+            self.assertFalse(mock_do.called)
+
+    def test_http_json_request_streamed_closes_response(self, mock_request):
+        client = http.HTTPClient('http://example.com:8082',
+                                 spill_threshold=1024)
+        resp = _streamed_response(200, 'text/plain', b'ok')
+        mock_request.return_value = resp
+        self.assertIsNone(client.json_request('GET', '/plans')[1])
+        self.assertTrue(resp.raw.close.called)
+        self.assertTrue(resp.raw.release_conn.called)
+
+        resp = _streamed_response(404, 'application/json',
+                                  b'{"itemNotFound": {"message": "gone"}}')
+        mock_request.return_value = resp
+        self.assertRaises(exc.NotFound, client.json_request, 'GET', '/plans')
+        self.assertTrue(resp.raw.release_conn.called)
+
+    def test_http_request_streamed_redirect_closes_response(self,
+                                                            mock_request):
+        redirect = _streamed_response(302, 'text/plain', b'')
+        redirect.headers['location'] = 'http://example.com:8082/v2/plans'
+        resp = _streamed_response(200, 'application/json', b'{}')
+        mock_request.side_effect = [redirect, resp]
+        client = http.HTTPClient('http://example.com:8082')
+        self.assertIs(resp, client.raw_request('GET', '/plans', stream=True))
+        self.assertTrue(redirect.raw.release_conn.called)
+        self.assertFalse(resp.raw.release_conn.called)
+
+    def test_http_json_request_coalescing_disabled(self, mock_request):
+        mock_request.return_value = \
+            fakes.FakeHTTPResponse(
+                200, 'OK',
+                {'content-type': 'application/json'},
+                '{}')
+        client = http.HTTPClient('http://example.com:8082')
+        self.assertFalse(client.coalesce_requests)
+        with mock.patch.object(client._inflight, 'do') as mock_do:
+            client.json_request('GET', '/plans')
+            self.assertFalse(mock_do.called)
+
+    def test_http_request_records_timings(self, mock_request):
+        mock_request.return_value = \
+            fakes.FakeHTTPResponse(
+                200, 'OK',
+                {'content-type': 'application/json'},
+                '{"plans": []}')
+        client = http.HTTPClient('http://example.com:8082', timings=True)
+        client.json_request('POST', '/plans', data={'name': 'a'})
+        client.json_request(
+            'GET', '/plans/3f2a3c3a-4b4e-4a9c-9d1c-2b1f5c6d7e8f?limit=2')
+
+        timings = client.get_timings()
+        self.assertEqual(2, len(timings))
+        self.assertEqual(('POST', '/plans', '/plans', 200, 13, 13),
+                         (timings[0].method, timings[0].url,
+                          timings[0].url_template, timings[0].status,
+                          timings[0].request_bytes,
+                          timings[0].response_bytes))
+        self.assertEqual('/plans/{id}', timings[1].url_template)
+        self.assertGreaterEqual(timings[1].elapsed, 0)
+
+        client.reset_timings()
+        self.assertEqual([], client.get_timings())
+
+    def test_http_request_records_failed_timings(self, mock_request):
+        mock_request.side_effect = [socket.timeout]
+        client = http.HTTPClient('http://example.com:8082', timings=True)
+        self.assertRaises(exc.ConnectionRefused,
+                          client.json_request, 'GET', '/plans')
+        self.assertIsNone(client.get_timings()[0].status)
+
+    def test_http_request_timings_disabled(self, mock_request):
+        mock_request.return_value = \
+            fakes.FakeHTTPResponse(
+                200, 'OK',
+                {'content-type': 'application/json'},
+                '{}')
+        client = http.HTTPClient('http://example.com:8082')
+        client.json_request('GET', '/plans')
+        self.assertEqual([], client.get_timings())
+
+    def test_http_request_rate_limited(self, mock_request):
+        mock_request.return_value = \
+            fakes.FakeHTTPResponse(
+                200, 'OK',
+                {'content-type': 'application/json'},
+                '{}')
+        client = http.HTTPClient('http://example.com:8082',
+                                 rate_limit={'write_rate': 1, 'block': False})
+        client.json_request('GET', '/plans')
+        client.json_request('GET', '/plans')
+        client.json_request('POST', '/plans', data={})
+        self.assertRaises(exc.RateLimitExceeded,
+                          client.json_request, 'POST', '/plans', data={})
+        self.assertEqual(3, mock_request.call_count)
+
+    def test_http_request_balanced(self, mock_request):
+        mock_request.side_effect = [
+            requests.exceptions.ConnectionError(),
+            fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'}, '{}'),
+            fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'}, '{}')]
+        client = http.HTTPClient(['http://karbor-1:8082',
+                                  'http://karbor-2:8082'])
+        self.assertRaises(exc.ConnectionRefused,
+                          client.json_request, 'GET', '/plans')
+        client.json_request('GET', '/plans')
+        client.json_request('GET', '/plans')
+        # The unreachable endpoint is not used any more.
+        self.assertEqual(
+            ['http://karbor-1:8082/plans', 'http://karbor-2:8082/plans',
+             'http://karbor-2:8082/plans'],
+            [c[0][1] for c in mock_request.call_args_list])
+        self.assertEqual('/plans',
+                         client.strip_endpoint('http://karbor-2:8082/plans'))
+
+    def test_http_request_logs_chosen_endpoint(self, mock_request):
+        mock_request.return_value = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, '{}')
+        logger = self.useFixture(fixtures.FakeLogger(level=logging.DEBUG))
+        client = http.HTTPClient(['http://karbor-1:8082',
+                                  'http://karbor-2:8082'])
+        client.json_request('GET', '/plans')
+        client.json_request('GET', '/plans')
+        curls = [line for line in logger.output.splitlines()
+                 if line.startswith('curl')]
+        self.assertEqual(2, len(curls))
+        self.assertTrue(curls[0].endswith(' http://karbor-1:8082/plans'))
+        self.assertTrue(curls[1].endswith(' http://karbor-2:8082/plans'))
+
+    def test_http_request_hedged(self, mock_request):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def request(method, url, **kwargs):
+            if url.startswith('http://karbor-1'):
+                release.wait(5)
+            return fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'},
+                '{"url": "%s"}' % url)
+
+        mock_request.side_effect = request
+        client = http.HTTPClient(['http://karbor-1:8082',
+                                  'http://karbor-2:8082'],
+                                 hedge={'initial_delay': 0.01})
+        with client.deadline(30):
+            resp, body = client.json_request('GET', '/plans')
+        self.assertEqual({'url': 'http://karbor-2:8082/plans'}, body)
+        self.assertEqual(2, mock_request.call_count)
+        # Both attempts are bounded by the deadline.
+        for call in mock_request.call_args_list:
+            self.assertLessEqual(call[1]['timeout'], 30)
+
+        # Writes are never hedged.
+        release.set()
+        mock_request.reset_mock()
+        client.json_request('POST', '/plans', data={})
+        self.assertEqual(1, mock_request.call_count)
+
+    def test_http_request_circuit_open(self, mock_request):
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+        client = http.HTTPClient('http://karbor:8082',
+                                 circuit_breaker={'failure_threshold': 2})
+        for _ in range(2):
+            e = self.assertRaises(exc.ConnectionRefused,
+                                  client.json_request, 'GET', '/plans')
+            self.assertNotIsInstance(e, exc.CircuitOpen)
+        self.assertRaises(exc.CircuitOpen,
+                          client.json_request, 'GET', '/plans')
+        self.assertEqual(2, mock_request.call_count)
+
+    def test_http_request_avoids_open_circuits(self, mock_request):
+        def request(method, url, **kwargs):
+            if url.startswith('http://karbor-1'):
+                return fakes.FakeHTTPResponse(
+                    503, 'Service Unavailable', {}, '')
+            return fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'}, '{}')
+
+        mock_request.side_effect = request
+        client = http.HTTPClient(['http://karbor-1:8082',
+                                  'http://karbor-2:8082'],
+                                 circuit_breaker={'failure_threshold': 1})
+        self.assertRaises(exc.HttpError, client.raw_request, 'GET', '/plans')
+        unavailable = client.endpoint_pool.endpoints[0]
+        ewma = unavailable.ewma
+        for _ in range(4):
+            client.json_request('GET', '/plans')
+        self.assertEqual(
+            ['http://karbor-1:8082/plans'] +
+            4 * ['http://karbor-2:8082/plans'],
+            [c[0][1] for c in mock_request.call_args_list])
+        self.assertEqual(ewma, unavailable.ewma)
+        self.assertEqual(0, unavailable.outstanding)
+
+    def test_http_request_unavailable_opens_circuit(self, mock_request):
+        mock_request.return_value = fakes.FakeHTTPResponse(
+            503, 'Service Unavailable', {}, '')
+        client = http.HTTPClient('http://karbor:8082',
+                                 circuit_breaker={'failure_threshold': 1})
+        self.assertRaises(exc.HttpError, client.raw_request, 'GET', '/plans')
+        self.assertRaises(exc.CircuitOpen,
+                          client.raw_request, 'GET', '/plans')
+
+    def test_http_request_deadline(self, mock_request):
+        mock_request.return_value = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, '{}')
+        client = http.HTTPClient('http://karbor:8082', timeout=600)
+        now = [0]
+        client.active_deadline = deadline.Deadline(30, lambda: now[0])
+        now[0] = 5
+        client.json_request('GET', '/plans')
+        self.assertEqual(25, mock_request.call_args[1]['timeout'])
+        # A nested deadline can only shorten the enclosing one.
+        with client.deadline(60) as nested:
+            self.assertEqual(30, nested.seconds)
+            now[0] = 20
+            client.json_request('POST', '/plans', data={})
+            self.assertEqual(10, mock_request.call_args[1]['timeout'])
+        now[0] = 30
+        self.assertRaises(exc.DeadlineExceeded,
+                          client.json_request, 'GET', '/plans')
+        self.assertEqual(2, mock_request.call_count)
+
+        client.active_deadline = None
+        with client.deadline(None):
+            client.json_request('GET', '/plans')
+        self.assertEqual(600, mock_request.call_args[1]['timeout'])
+        with client.deadline(1) as outer:
+            self.assertIs(outer, client.active_deadline)
+        self.assertIsNone(client.active_deadline)
+
+    def test_http_request_deadline_per_thread(self, mock_request):
+        mock_request.return_value = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, '{}')
+        client = http.HTTPClient('http://karbor:8082')
+        first_entered = threading.Event()
+        second_entered = threading.Event()
+        first_exited = threading.Event()
+        seen = []
+
+        def first():
+            with client.deadline(0.2):
+                first_entered.set()
+                second_entered.wait(5)
+            first_exited.set()
+
+        def second():
+            first_entered.wait(5)
+            with client.deadline(30) as active:
+                seen.append(active.seconds)
+                second_entered.set()
+                first_exited.wait(5)
+                client.json_request('GET', '/plans')
+
+        threads = [threading.Thread(target=first),
+                   threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual([30], seen)
+        self.assertGreater(mock_request.call_args[1]['timeout'], 0.2)
+        # Neither deadline outlives its block.
+        self.assertIsNone(client.active_deadline)
+        client.json_request('GET', '/plans')
+        self.assertNotIn('timeout', mock_request.call_args[1])
+
+    def test_http_request_deadline_timeout(self, mock_request):
+        now = [0]
+
+        def request(*args, **kwargs):
+            now[0] = kwargs['timeout']
+            raise requests.exceptions.ConnectTimeout()
+
+        mock_request.side_effect = request
+        client = http.HTTPClient('http://karbor:8082')
+        client.active_deadline = deadline.Deadline(2, lambda: now[0])
+        self.assertRaises(exc.DeadlineExceeded,
+                          client.json_request, 'GET', '/plans')
+
+    def test_http_request_compressed(self, mock_request):
+        mock_request.return_value = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, '{}')
+        client = http.HTTPClient('http://karbor:8082', compress_threshold=64)
+        client.json_request('POST', '/plans', data={'name': 'small'})
+        kwargs = mock_request.call_args[1]
+        self.assertNotIn('Content-Encoding', kwargs['headers'])
+
+        plan = {'resources': [{'id': str(i)} for i in range(50)]}
+        client.json_request('POST', '/plans', data=plan)
+        kwargs = mock_request.call_args[1]
+        self.assertEqual('gzip', kwargs['headers']['Content-Encoding'])
+        self.assertEqual(plan,
+                         jsonutils.loads(gzip.decompress(kwargs['data'])))
+
+    def test_http_request_compressed_redirect(self, mock_request):
+        mock_request.side_effect = [
+            fakes.FakeHTTPResponse(
+                302, 'Found',
+                {'location': 'http://karbor:8082/plans/moved'}, ''),
+            fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'}, '{}')]
+        client = http.HTTPClient('http://karbor:8082', compress_threshold=64)
+        plan = {'resources': [{'id': str(i)} for i in range(50)]}
+        client.json_request('POST', '/plans', data=plan)
+        self.assertEqual(['http://karbor:8082/plans',
+                          'http://karbor:8082/plans/moved'],
+                         [c[0][1] for c in mock_request.call_args_list])
+        for call in mock_request.call_args_list:
+            kwargs = call[1]
+            self.assertEqual('gzip', kwargs['headers']['Content-Encoding'])
+            self.assertEqual(plan,
+                             jsonutils.loads(gzip.decompress(kwargs['data'])))
+
+
+class TimingsTest(testtools.TestCase):
+
+    def test_url_template(self):
+        self.assertEqual(
+            '/providers/{id}/checkpoints/{id}',
+            http.url_template('/providers/cf56bd3e-97a7-4078-b6d5-'
+                              'f36246333fd9/checkpoints/1234?limit=2'))
+        self.assertEqual('/plans', http.url_template('/plans?marker=1'))
+        self.assertEqual('/protectables/OS::Nova::Server/instances',
+                         http.url_template(
+                             '/protectables/OS::Nova::Server/instances'))
+
+    def test_summarize_timings(self):
+        def timing(method, url, status, elapsed, size=10):
+            return http.RequestTiming(method, url, http.url_template(url),
+                                      status, 0, size, 0, elapsed, size // 2)
+        stats = http.summarize_timings([
+            timing('GET', '/plans/1', 200, 0.5),
+            timing('GET', '/plans/2', 404, 1.5),
+            timing('GET', '/plans', 200, 0.25),
+            timing('GET', '/plans/3', None, 1.0),
+        ])
+        self.assertEqual(2, len(stats))
+        self.assertEqual(
+            http.ApiStat('GET', '/plans/{id}', 3, 2, 3.0, 1.0, 1.5, 30, 15),
+            stats[0])
+        self.assertEqual(('/plans', 1, 0.25),
+                         (stats[1].url_template, stats[1].count,
+                          stats[1].total))
+
+    def test_compressed_exchanges(self):
+        with fake_server.FakeServer(gzip_min_size=1024) as server:
+            cs = client.Client(server.endpoint, token='token',
+                               project_id=server.project_id, timings=True,
+                               compress_threshold=256)
+            resources = [{'id': str(i), 'type': 'OS::Nova::Server',
+                          'name': 'server-%d' % i} for i in range(20)]
+            cs.plans.create('plan', fake_server.PROVIDER_ID, resources, {})
+            self.assertEqual(10 + 1, len(cs.plans.list(limit=1000)))
+        create, listing = cs.http_client.get_timings()
+        self.assertLess(create.request_bytes, len(str(resources)))
+        self.assertLess(listing.wire_bytes, listing.response_bytes)
+
+    def test_spilled_responses(self):
+        with fake_server.FakeServer(checkpoints=50) as server:
+            cs = client.Client(server.endpoint, token='token',
+                               project_id=server.project_id)
+            expected = [c.id for c in cs.checkpoints.list(
+                fake_server.PROVIDER_ID, limit=1000)]
+            cs = client.Client(server.endpoint, token='token',
+                               project_id=server.project_id,
+                               spill_threshold=1024)
+            with mock.patch('tempfile.TemporaryFile',
+                            wraps=tempfile.TemporaryFile) as mock_file:
+                checkpoints = cs.checkpoints.list(fake_server.PROVIDER_ID,
+                                                  limit=1000)
+                # Small bodies are not spilled.
+                cs.providers.get(fake_server.PROVIDER_ID)
+        self.assertEqual(expected, [c.id for c in checkpoints])
+        mock_file.assert_called_once_with()
+
+
+class SingleFlightTest(testtools.TestCase):
+
+    def test_do_runs_function(self):
+        flight = http.SingleFlight()
+        result, shared = flight.do('key', lambda x: x * 2, 21)
+        self.assertEqual(42, result)
+        self.assertFalse(shared)
+        self.assertEqual({}, flight._calls)
+
+    def test_do_propagates_error_and_cleans_up(self):
+        flight = http.SingleFlight()
+
+        def fail():
+            raise exc.ConnectionRefused('boom')
+        self.assertRaises(exc.ConnectionRefused, flight.do, 'key', fail)
+        self.assertEqual({}, flight._calls)
+
+    def test_do_logs_waiters(self):
+        logger = self.useFixture(fixtures.FakeLogger(level=logging.DEBUG))
+        flight = http.SingleFlight()
+        release = threading.Event()
+        results = []
+
+        def slow():
+            release.wait(5)
+            return 'done'
+
+        def call():
+            results.append(flight.do('key', slow))
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        threads[0].start()
+        while not flight._calls:
+            release.wait(0.001)
+        for t in threads[1:]:
+            t.start()
+        while flight._calls['key'].waiters < 2:
+            release.wait(0.001)
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual([('done', False), ('done', True), ('done', True)],
+                         sorted(results, key=lambda r: r[1]))
+        self.assertIn("Shared the result of key with 2 waiting callers",
+                      logger.output)
+
+    def test_coalesce_key(self):
+        self.assertIsNone(http._coalesce_key('POST', '/plans', {}))
+        self.assertIsNone(http._coalesce_key('GET', '/plans', {'data': 1}))
+        self.assertEqual(
+            http._coalesce_key('GET', '/plans', {'headers': {'a': 1,
+                                                             'b': 2}}),
+            http._coalesce_key('GET', '/plans', {'headers': {'b': 2,
+                                                             'a': 1}}))
+        self.assertNotEqual(
+            http._coalesce_key('GET', '/plans', {'headers': {'a': 1}}),
+            http._coalesce_key('GET', '/plans', {'headers': {'a': 2}}))
+
+
+class JSONCodecTest(testtools.TestCase):
+
+    def test_get_json_codec_default(self):
+        codec = http.get_json_codec()
+        self.assertIsInstance(codec, http.JSONCodec)
+        self.assertEqual('json', codec.name)
+        self.assertEqual({'a': [1, 2]}, codec.loads(b'{"a": [1, 2]}'))
+        self.assertEqual('{"a": 1}', codec.dumps({'a': 1}))
+
+    def test_get_json_codec_instance(self):
+        codec = http.JSONCodec()
+        self.assertIs(codec, http.get_json_codec(codec))
+
+    def test_get_json_codec_invalid(self):
+        self.assertRaises(ValueError, http.get_json_codec, 'yaml')
+
+    def test_get_json_codec_auto_without_orjson(self):
+        with mock.patch('karborclient.common.http.importutils.'
+                        'import_module', side_effect=ImportError):
+            codec = http.get_json_codec('auto')
+        self.assertEqual('json', codec.name)
+
+    def test_orjson_codec(self):
+        try:
+            codec = http.get_json_codec('orjson')
+        except ImportError:
+            self.skipTest('orjson is not installed')
+        self.assertEqual(b'{"a":1,"1":"\xc3\xa9"}',
+                         codec.dumps({'a': 1, 1: u'\xe9'}))
+        self.assertEqual({'a': 1}, codec.loads(b'{"a": 1}'))
+        self.assertRaises(ValueError, codec.loads, b'invalid-json')
+
+    @mock.patch('karborclient.common.http.requests.request')
+    def test_http_client_uses_codec(self, mock_request):
+        mock_request.return_value = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, b'{"a": 1}')
+        codec = mock.Mock()
+        codec.dumps.return_value = b'encoded'
+        codec.loads.return_value = {'decoded': True}
+        client = http.HTTPClient('http://example.com:8082', json_codec=codec)
+        resp, body = client.json_request('POST', '/plans', data={'a': 1})
+        self.assertEqual({'decoded': True}, body)
+        codec.dumps.assert_called_once_with({'a': 1})
+        codec.loads.assert_called_once_with(b'{"a": 1}')
+        self.assertEqual(b'encoded', mock_request.call_args[1]['data'])
+
+
+@mock.patch('keystoneauth1.adapter.Adapter.request')
+class SessionClientTest(testtools.TestCase):
+
+    def _client(self, **kwargs):
+        return http.SessionClient(session=mock.Mock(), **kwargs)
+
+    def _response(self, content, status_code=200):
+        resp = mock.Mock(status_code=status_code, content=content)
+        resp.text = content.decode('utf-8')
+        return resp
+
+    def test_json_request_streamed_content(self, mock_request):
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.encoding = 'utf-8'
+        resp.raw = io.BytesIO(b'{"plan": {"id": 1}}')
+        mock_request.return_value = resp
+        client = self._client(spill_threshold=1024)
+        self.assertEqual({'plan': {'id': 1}},
+                         client.json_request('GET', '/plans/1')[1])
+        self.assertTrue(mock_request.call_args[1]['stream'])
+
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.raw = io.BytesIO(b'invalid-json')
+        mock_request.return_value = resp
+        self.assertEqual('invalid-json',
+                         client.json_request('GET', '/plans/1')[1])
+
+    def test_json_request_streamed_error_closes_response(self,
+                                                         mock_request):
+        resp = _streamed_response(500, 'text/plain', b'boom')
+        mock_request.return_value = resp
+        client = self._client(spill_threshold=1024)
+        self.assertRaises(exc.InternalServerError, client.json_request,
+                          'GET', '/plans/1')
+        self.assertTrue(resp.raw.release_conn.called)
+
+    def test_json_request_decodes_content(self, mock_request):
+        mock_request.return_value = self._response(b'{"plan": {"id": 1}}')
+        resp, body = self._client().json_request('GET', '/plans/1')
+        self.assertEqual({'plan': {'id': 1}}, body)
+
+    def test_json_request_invalid_json(self, mock_request):
+        mock_request.return_value = self._response(b'invalid-json')
+        resp, body = self._client().json_request('GET', '/plans/1')
+        self.assertEqual('invalid-json', body)
+
+    def test_json_request_empty_body(self, mock_request):
+        mock_request.return_value = self._response(b'')
+        resp, body = self._client().json_request('DELETE', '/plans/1')
+        self.assertEqual('', body)
+
+    def test_json_request_with_codec(self, mock_request):
+        mock_request.return_value = self._response(b'{}')
+        codec = mock.Mock()
+        codec.dumps.return_value = b'encoded'
+        client = self._client(json_codec=codec)
+        client.json_request('POST', '/plans', data={'a': 1})
+        self.assertEqual(b'encoded', mock_request.call_args[1]['data'])
+        codec.loads.assert_called_once_with(b'{}')
+
+    def test_request_records_timings(self, mock_request):
+        mock_request.return_value = self._response(b'{"a": 1}')
+        client = self._client(timings=True)
+        client.json_request('GET', '/plans')
+        client.raw_request('DELETE', '/plans/1')
+        self.assertEqual([('GET', '/plans', 8), ('DELETE', '/plans/{id}', 8)],
+                         [(t.method, t.url_template, t.response_bytes)
+                          for t in client.get_timings()])
+
+    def test_request_returns_text(self, mock_request):
+        mock_request.return_value = self._response(b'{"a": 1}')
+        resp, body = self._client().request('/plans', 'GET')
+        self.assertEqual('{"a": 1}', body)
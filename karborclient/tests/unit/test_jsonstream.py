@@ -0,0 +1,82 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import types
+
+from oslo_serialization import jsonutils
+import testtools
+
+from karborclient.common import jsonstream
+from karborclient import fake_server
+from karborclient.v1 import client
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class IterItemsTest(testtools.TestCase):
+
+    body = {
+        'total': 3,
+        'checkpoints': [{'id': 'a', 'name': u'r\xe9sum\xe9'},
+                        {'id': 'b', 'resource_graph': '[{"x": 1}]'},
+                        12345, None, True],
+        'checkpoints_links': [{'rel': 'next', 'href': 'http://k/v1'}],
+        'count': 100,
+    }
+
+    def test_chunk_sizes(self):
+        data = jsonutils.dump_as_bytes(self.body)
+        for size in (1, 2, 5, 64, len(data)):
+            self.assertEqual(
+                self.body['checkpoints'],
+                list(jsonstream.iter_items(_chunks(data, size),
+                                           'checkpoints')))
+
+    def test_items_yielded_before_end(self):
+        chunks = iter([b'{"plans": [{"id": 1}, ', b'{"id": 2}]}'])
+        items = jsonstream.iter_items(chunks, 'plans')
+        self.assertEqual({'id': 1}, next(items))
+        # The second chunk was not read yet.
+        self.assertEqual([b'{"id": 2}]}'], list(chunks))
+
+    def test_empty(self):
+        for data in (b'{}', b'{"plans": []}', b' { "plans" : null } ',
+                     b'{"other": [1]}'):
+            self.assertEqual([], list(jsonstream.iter_items([data],
+                                                            'plans')))
+
+    def test_invalid(self):
+        for data in (b'[1, 2]', b'{"plans": [1, 2', b'{"plans": 1}',
+                     b'{"plans": [1 2]}', b''):
+            self.assertRaises(ValueError, list,
+                              jsonstream.iter_items(_chunks(data, 3),
+                                                    'plans'))
+
+
+class StreamedListTest(testtools.TestCase):
+
+    def test_list_stream(self):
+        with fake_server.FakeServer(checkpoints=30,
+                                    gzip_min_size=1024) as server:
+            cs = client.Client(server.endpoint, token='token',
+                               project_id=server.project_id)
+            expected = cs.checkpoints.list(fake_server.PROVIDER_ID)
+            streamed = cs.checkpoints.list(fake_server.PROVIDER_ID,
+                                           stream=True)
+            self.assertIsInstance(streamed, types.GeneratorType)
+            self.assertEqual([c.to_dict() for c in expected],
+                             [c.to_dict() for c in streamed])
+            self.assertEqual(
+                len(cs.operation_logs.list()),
+                len(list(cs.operation_logs.list(stream=True))))
@@ -0,0 +1,122 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import testtools
+
+from karborclient.common import loadbalancer
+from karborclient.tests.unit import fakes
+
+URLS = ['http://karbor-1:8799/v1/p', 'http://karbor-2:8799/v1/p',
+        'http://karbor-3:8799/v1/p']
+
+
+class EndpointPoolTest(testtools.TestCase):
+
+    def setUp(self):
+        super(EndpointPoolTest, self).setUp()
+        self.clock = fakes.FakeClock()
+
+    def _pool(self, **kwargs):
+        return loadbalancer.EndpointPool(URLS, clock=self.clock, **kwargs)
+
+    def test_least_outstanding(self):
+        pool = self._pool()
+        endpoints = [pool.acquire() for _ in range(3)]
+        # Idle endpoints are used first.
+        self.assertEqual(sorted(URLS), sorted(e.url for e in endpoints))
+        pool.release(endpoints[1], 0.1)
+        self.assertIs(endpoints[1], pool.acquire())
+
+    def test_spread_when_idle(self):
+        pool = self._pool()
+        urls = set()
+        for _ in range(3):
+            endpoint = pool.acquire()
+            urls.add(endpoint.url)
+            pool.release(endpoint, 0.1)
+        self.assertEqual(set(URLS), urls)
+
+    def test_ewma(self):
+        pool = self._pool(strategy='ewma')
+        latencies = {URLS[0]: 0.5, URLS[1]: 0.05, URLS[2]: 0.2}
+        for _ in range(3):
+            endpoint = pool.acquire()
+            pool.release(endpoint, latencies[endpoint.url])
+        for _ in range(5):
+            endpoint = pool.acquire()
+            self.assertEqual(URLS[1], endpoint.url)
+            pool.release(endpoint, 0.05)
+        # Requests in flight weigh on the fastest endpoint.
+        busy = [pool.acquire() for _ in range(4)]
+        self.assertEqual(URLS[2], busy[-1].url)
+
+    def test_ewma_update(self):
+        pool = self._pool(strategy='ewma', decay=0.5)
+        endpoint = pool.endpoints[0]
+        endpoint.outstanding = 2
+        pool.release(endpoint, 1.0)
+        pool.release(endpoint, 0.0)
+        self.assertEqual(0.5, endpoint.ewma)
+
+    def test_mark_down_and_readmit(self):
+        pool = self._pool(readmit_after=30)
+        down = pool.endpoints[0]
+        down.outstanding += 1
+        pool.release(down, 0.1, failed=True)
+        for _ in range(6):
+            endpoint = pool.acquire()
+            self.assertIsNot(down, endpoint)
+            pool.release(endpoint, 0.1)
+        self.clock.now += 30
+        self.assertIn(down, [pool.acquire() for _ in range(3)])
+
+    def test_all_down(self):
+        pool = self._pool()
+        for delay, endpoint in enumerate(reversed(pool.endpoints)):
+            self.clock.now = delay
+            endpoint.outstanding += 1
+            pool.release(endpoint, 0.1, failed=True)
+        # The endpoint marked down first is tried first.
+        self.assertIs(pool.endpoints[-1], pool.acquire())
+
+    def test_unavailable_skipped(self):
+        pool = self._pool()
+        for _ in range(6):
+            endpoint = pool.acquire(available=lambda url: url != URLS[0])
+            self.assertNotEqual(URLS[0], endpoint.url)
+            pool.release(endpoint, 0.1)
+        # Unavailable endpoints are still used when no other is.
+        endpoint = pool.acquire(available=lambda url: False)
+        self.assertIn(endpoint.url, URLS)
+
+    def test_cancel(self):
+        pool = self._pool()
+        endpoint = pool.acquire()
+        pool.release(endpoint, 0.1, failed=True)
+        endpoint = pool.acquire()
+        endpoint.ewma = 0.2
+        pool.cancel(endpoint)
+        self.assertEqual(0, endpoint.outstanding)
+        self.assertEqual(0.2, endpoint.ewma)
+        self.assertIsNotNone(pool.endpoints[0].down_until)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, loadbalancer.EndpointPool, URLS,
+                          strategy='random')
+        self.assertRaises(ValueError, loadbalancer.EndpointPool, [])
+
+    def test_get_endpoint_pool(self):
+        self.assertIsNone(loadbalancer.get_endpoint_pool(None))
+        self.assertIsNone(loadbalancer.get_endpoint_pool(URLS[:1]))
+        pool = loadbalancer.get_endpoint_pool(URLS, 'ewma', 5)
+        self.assertEqual(('ewma', 5), (pool.strategy, pool.readmit_after))
+        self.assertIs(pool, loadbalancer.get_endpoint_pool(pool))
@@ -0,0 +1,191 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import fixtures
+import mock
+import testtools
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import http
+from karborclient.common import metrics
+from karborclient.tests.unit import fakes
+from karborclient.v1 import checkpoints
+from karborclient.v1 import plans
+
+
+class MetricsTestCase(testtools.TestCase):
+
+    def setUp(self):
+        super(MetricsTestCase, self).setUp()
+        self.exporter = metrics.InMemoryExporter()
+        metrics.register_exporter(self.exporter)
+        self.addCleanup(metrics.unregister_exporter, self.exporter)
+
+
+class HistogramTest(testtools.TestCase):
+
+    def test_observe(self):
+        histogram = metrics.Histogram(buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        self.assertEqual([(0.1, 2), (1, 3), (float('inf'), 4)],
+                         histogram.cumulative_counts())
+        self.assertEqual(4, histogram.count)
+        self.assertEqual(3.65, histogram.sum)
+
+
+class RegistryTest(testtools.TestCase):
+
+    def test_no_exporter(self):
+        self.assertFalse(metrics.enabled())
+        metrics.inc('counter', {})
+        metrics.observe('histogram', {}, 1)
+
+    def test_register_unregister(self):
+        exporter = metrics.InMemoryExporter()
+        metrics.register_exporter(exporter)
+        metrics.register_exporter(exporter)
+        self.assertTrue(metrics.enabled())
+        metrics.inc('counter', {'a': 'b'}, 2)
+        metrics.unregister_exporter(exporter)
+        self.assertFalse(metrics.enabled())
+        metrics.inc('counter', {'a': 'b'})
+        self.assertEqual(2, exporter.get_counter('counter', a='b'))
+
+    def test_exporter_interface_is_abstract(self):
+        self.assertRaises(TypeError, metrics.MetricsExporter)
+
+
+@mock.patch('karborclient.common.http.requests.request')
+class HttpMetricsTest(MetricsTestCase):
+
+    def test_http_request_metrics(self, mock_request):
+        mock_request.return_value = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, '{}')
+        client = http.HTTPClient('http://example.com:8082')
+        client.json_request('GET', '/providers/1234/checkpoints/5678')
+        client.json_request('GET', '/providers/1234/checkpoints?limit=1')
+
+        self.assertEqual(2, self.exporter.get_counter(
+            metrics.HTTP_REQUESTS, resource='checkpoints',
+            operation='GET', status='200'))
+        histogram = self.exporter.get_histogram(
+            metrics.HTTP_REQUEST_DURATION, resource='checkpoints',
+            operation='GET')
+        self.assertEqual(2, histogram.count)
+
+    def test_http_request_error_metrics(self, mock_request):
+        mock_request.return_value = fakes.FakeHTTPResponse(
+            503, 'Unavailable', {}, '')
+        client = http.HTTPClient('http://example.com:8082')
+        self.assertRaises(exc.ServiceUnavailable,
+                          client.json_request, 'DELETE', '/plans/1')
+        self.assertEqual(1, self.exporter.get_counter(
+            metrics.HTTP_REQUESTS, resource='plans',
+            operation='DELETE', status='503'))
+
+
+class ManagerMetricsTest(MetricsTestCase):
+
+    def test_manager_operation_metrics(self):
+        api = mock.Mock(project_id='project_id')
+        api.json_request.return_value = ({}, {'plans': [{'id': '1'}]})
+        manager = plans.PlanManager(api)
+        manager.list()
+        api.json_request.side_effect = exc.NotFound
+        self.assertRaises(exc.NotFound, manager.get, '1')
+
+        self.assertEqual(1, self.exporter.get_counter(
+            metrics.OPERATIONS, resource='plan', operation='list',
+            status='success'))
+        self.assertEqual(1, self.exporter.get_counter(
+            metrics.OPERATIONS, resource='plan', operation='get',
+            status='NotFound'))
+        self.assertEqual(1, self.exporter.get_histogram(
+            metrics.OPERATION_DURATION, resource='plan',
+            operation='get').count)
+
+    def test_streamed_list_metrics(self):
+        api = mock.Mock(project_id='project_id')
+
+        def json_stream(url, response_key, **kwargs):
+            yield {'id': '1'}
+            raise exc.ConnectionRefused()
+
+        api.json_stream.side_effect = json_stream
+        manager = checkpoints.CheckpointManager(api)
+        streamed = manager.list('provider_id', stream=True)
+        # Nothing is sent before the iteration.
+        self.assertIsNone(self.exporter.get_histogram(
+            metrics.OPERATION_DURATION, resource='checkpoint',
+            operation='list'))
+        self.assertEqual('1', next(streamed).id)
+        self.assertRaises(exc.ConnectionRefused, next, streamed)
+        self.assertEqual(1, self.exporter.get_counter(
+            metrics.OPERATIONS, resource='checkpoint', operation='list',
+            status='ConnectionRefused'))
+
+
+class PrometheusTextfileExporterTest(testtools.TestCase):
+
+    def test_flush(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        path = os.path.join(tmpdir, 'karbor.prom')
+        exporter = metrics.PrometheusTextfileExporter(path, buckets=(0.5,))
+        exporter.inc(metrics.HTTP_REQUESTS,
+                     {'operation': 'GET', 'status': '200'})
+        exporter.observe(metrics.HTTP_REQUEST_DURATION,
+                         {'operation': 'GET'}, 0.25)
+        exporter.observe(metrics.HTTP_REQUEST_DURATION,
+                         {'operation': 'GET'}, 1.0)
+        exporter.flush()
+
+        with open(path) as f:
+            content = f.read()
+        self.assertEqual(
+            '# TYPE karborclient_http_requests_total counter\n'
+            'karborclient_http_requests_total'
+            '{operation="GET",status="200"} 1\n'
+            '# TYPE karborclient_http_request_duration_seconds histogram\n'
+            'karborclient_http_request_duration_seconds_bucket'
+            '{operation="GET",le="0.5"} 1\n'
+            'karborclient_http_request_duration_seconds_bucket'
+            '{operation="GET",le="+Inf"} 2\n'
+            'karborclient_http_request_duration_seconds_sum'
+            '{operation="GET"} 1.25\n'
+            'karborclient_http_request_duration_seconds_count'
+            '{operation="GET"} 2\n',
+            content)
+        self.assertEqual(['karbor.prom'], os.listdir(tmpdir))
+
+    def test_flush_at_exit(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'karbor.prom')
+        with mock.patch('atexit.register') as register:
+            exporter = metrics.PrometheusTextfileExporter(
+                path, flush_interval=60)
+        flush_at_exit = register.call_args[0][0]
+        flush_at_exit()
+        self.assertFalse(os.path.exists(path))
+        exporter.inc(metrics.HTTP_REQUESTS, {'status': '200'})
+        exporter._flush_timer.cancel()
+        flush_at_exit()
+        with open(path) as f:
+            self.assertIn('karborclient_http_requests_total', f.read())
+
+    def test_label_escaping(self):
+        exporter = metrics.PrometheusTextfileExporter('unused')
+        exporter.inc('counter', {'error': 'a "b"\nc'})
+        self.assertIn('counter{error="a \\"b\\"\\nc"} 1', exporter.render())
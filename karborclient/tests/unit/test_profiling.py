@@ -0,0 +1,96 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pstats
+
+import fixtures
+import mock
+from oslo_serialization import jsonutils
+import six
+import testtools
+
+from karborclient.common import profiling
+from karborclient.osc import plugin
+
+
+class ClassifyTest(testtools.TestCase):
+
+    def test_classify(self):
+        for phase, location in (
+                ('auth', '/usr/lib/keystoneauth1/identity/v3/base.py:'
+                         'get_auth_ref'),
+                ('http', '/usr/lib/urllib3/connectionpool.py:urlopen'),
+                ('http', "~:<method 'recv_into' of '_socket.socket' "
+                         "objects>"),
+                ('json', '/usr/lib/python3/json/decoder.py:raw_decode'),
+                ('json', '~:<built-in method orjson.loads>'),
+                ('render', '/usr/lib/prettytable/prettytable.py:get_string'),
+                ('import', '<frozen importlib._bootstrap>:_load'),
+                ('other', '/usr/lib/python3/uuid.py:uuid4')):
+            self.assertEqual(phase, profiling.classify(location), location)
+
+
+class ProfilerTest(testtools.TestCase):
+
+    def setUp(self):
+        super(ProfilerTest, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'karbor.prof')
+
+    def test_profile(self):
+        stream = six.StringIO()
+        with profiling.Profiler(self.path, stream=stream):
+            jsonutils.loads(jsonutils.dumps([{'id': i} for i in range(100)]))
+
+        self.assertGreater(pstats.Stats(self.path).total_calls, 0)
+        output = stream.getvalue()
+        self.assertIn('Time by phase', output)
+        self.assertIn('  json ', output)
+        self.assertNotIn('Peak traced memory', output)
+        self.assertFalse(os.path.exists(self.path + '.memory'))
+
+    def test_profile_memory(self):
+        stream = six.StringIO()
+        with profiling.Profiler(self.path, memory=True, stream=stream):
+            data = [{'id': i} for i in range(1000)]
+
+        self.assertEqual(1000, len(data))
+        self.assertIn('Peak traced memory', stream.getvalue())
+        self.assertIn('Memory still allocated by phase', stream.getvalue())
+        self.assertTrue(os.path.exists(self.path + '.memory'))
+
+    def test_report_on_error(self):
+        stream = six.StringIO()
+
+        def fail():
+            with profiling.Profiler(self.path, stream=stream):
+                raise ValueError()
+
+        self.assertRaises(ValueError, fail)
+        self.assertTrue(os.path.exists(self.path))
+
+
+class PluginProfilerTest(testtools.TestCase):
+
+    @mock.patch('atexit.register')
+    @mock.patch('karborclient.common.profiling.Profiler')
+    def test_start_profiler(self, mock_profiler, mock_register):
+        plugin.start_profiler('/tmp/karbor.prof', memory=True)
+        mock_profiler.assert_called_once_with('/tmp/karbor.prof',
+                                              memory=True)
+        mock_profiler.return_value.start.assert_called_once_with()
+        report = mock_register.call_args[0][0]
+        report()
+        mock_profiler.return_value.stop.assert_called_once_with()
+        mock_profiler.return_value.report.assert_called_once_with()
@@ -0,0 +1,117 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import testtools
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import metrics
+from karborclient.common import ratelimit
+from karborclient.tests.unit import fakes
+
+
+class TokenBucketTest(testtools.TestCase):
+
+    def setUp(self):
+        super(TokenBucketTest, self).setUp()
+        self.clock = fakes.FakeClock(100.0)
+
+    def test_burst_then_rate(self):
+        bucket = ratelimit.TokenBucket(2, burst=3, clock=self.clock)
+        self.assertEqual([0, 0, 0], [bucket.reserve() for _ in range(3)])
+        # Waiting callers queue behind each other.
+        self.assertEqual(0.5, bucket.reserve())
+        self.assertEqual(1.0, bucket.reserve())
+        self.clock.now += 10
+        self.assertEqual(0, bucket.reserve())
+
+    def test_max_wait(self):
+        bucket = ratelimit.TokenBucket(1, clock=self.clock)
+        self.assertEqual(0, bucket.reserve(max_wait=0))
+        self.assertIsNone(bucket.reserve(max_wait=0.5))
+        self.clock.now += 0.5
+        self.assertEqual(0.5, bucket.reserve(max_wait=0.5))
+
+    def test_invalid_rate(self):
+        self.assertRaises(ValueError, ratelimit.TokenBucket, 0)
+
+
+class RateLimiterTest(testtools.TestCase):
+
+    def setUp(self):
+        super(RateLimiterTest, self).setUp()
+        self.clock = fakes.FakeClock(100.0)
+        self.exporter = metrics.InMemoryExporter()
+        metrics.register_exporter(self.exporter)
+        self.addCleanup(metrics.unregister_exporter, self.exporter)
+
+    def _limiter(self, **kwargs):
+        return ratelimit.RateLimiter(clock=self.clock,
+                                     sleep=self.clock.sleep, **kwargs)
+
+    def test_reads_and_writes(self):
+        limiter = self._limiter(read_rate=10, write_rate=1)
+        self.assertEqual(0, limiter.acquire('POST', 'checkpoints'))
+        self.assertEqual(1, limiter.acquire('DELETE', 'checkpoints'))
+        self.assertEqual(101, self.clock.now)
+        for _ in range(10):
+            self.assertEqual(0, limiter.acquire('GET', 'plans'))
+        self.assertAlmostEqual(0.1, limiter.acquire('HEAD', 'plans'))
+
+        histogram = self.exporter.get_histogram(
+            metrics.RATE_LIMIT_WAIT, resource='checkpoints',
+            operation='write')
+        self.assertEqual(2, histogram.count)
+        self.assertEqual(1, histogram.sum)
+
+    def test_unlimited(self):
+        limiter = self._limiter(write_rate=1)
+        for _ in range(100):
+            self.assertEqual(0, limiter.acquire('GET', 'plans'))
+        self.assertEqual(100, self.clock.now)
+
+    def test_per_resource(self):
+        limiter = self._limiter(write_rate=1, per_resource=True)
+        self.assertEqual(0, limiter.acquire('POST', 'checkpoints'))
+        self.assertEqual(0, limiter.acquire('POST', 'restores'))
+        self.assertEqual(1, limiter.acquire('POST', 'restores'))
+
+    def test_not_blocking(self):
+        limiter = self._limiter(write_rate=1, block=False)
+        limiter.acquire('POST', 'restores')
+        self.assertRaises(exc.RateLimitExceeded, limiter.acquire, 'POST',
+                          'restores')
+        self.assertEqual(1, self.exporter.get_counter(
+            metrics.RATE_LIMIT_REJECTED, resource='restores',
+            operation='write'))
+
+    def test_max_wait(self):
+        # Concurrent callers: none of them has slept yet.
+        limiter = ratelimit.RateLimiter(write_rate=1, burst=1, max_wait=2,
+                                        clock=self.clock,
+                                        sleep=lambda seconds: None)
+        self.assertEqual([0, 1, 2], [limiter.acquire('POST', 'restores')
+                                     for _ in range(3)])
+        self.assertRaises(exc.RateLimitExceeded, limiter.acquire, 'POST',
+                          'restores')
+
+    def test_deadline(self):
+        limiter = self._limiter(write_rate=1, burst=1)
+        limiter.acquire('POST', 'restores', deadline=0.5)
+        self.assertRaises(exc.RateLimitExceeded, limiter.acquire, 'POST',
+                          'restores', deadline=0.5)
+        self.assertEqual(1, limiter.acquire('POST', 'restores', deadline=1))
+
+    def test_get_rate_limiter(self):
+        self.assertIsNone(ratelimit.get_rate_limiter(None))
+        limiter = ratelimit.get_rate_limiter({'read_rate': 5})
+        self.assertEqual({'read': 5, 'write': None}, limiter.rates)
+        self.assertIs(limiter, ratelimit.get_rate_limiter(limiter))
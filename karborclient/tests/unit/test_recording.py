@@ -0,0 +1,120 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import fixtures
+import mock
+import six
+import testtools
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import http
+from karborclient.common import recording
+from karborclient import fake_server
+from karborclient import shell
+from karborclient.v1 import client
+
+PROVIDER_ID = fake_server.PROVIDER_ID
+
+
+class RecordReplayTest(testtools.TestCase):
+
+    def setUp(self):
+        super(RecordReplayTest, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'session.jsonl')
+
+    def _record(self, **server_kwargs):
+        with fake_server.FakeServer(**server_kwargs) as server:
+            cs = client.Client(server.endpoint, token='secret-token',
+                               project_id=server.project_id,
+                               record_file=self.path)
+            plan = cs.plans.list()[0]
+            checkpoint = cs.checkpoints.create(PROVIDER_ID, plan.id)
+            cs.checkpoints.get(PROVIDER_ID, checkpoint.id)
+            cs.restores.create(PROVIDER_ID, checkpoint.id, None, {},
+                               {'type': 'password', 'username': 'admin',
+                                'password': 'secret-password'})
+            self.assertRaises(exc.NotFound, cs.plans.get, 'missing')
+        return plan, checkpoint
+
+    def test_record_redacts_secrets(self):
+        self._record()
+        with open(self.path) as f:
+            content = f.read()
+        self.assertNotIn('secret-token', content)
+        self.assertNotIn('secret-password', content)
+        entries = recording.load(self.path)
+        self.assertEqual(recording.REDACTED,
+                         entries[0]['request']['headers']['X-Auth-Token'])
+
+        entries = recording.load(self.path)
+        self.assertEqual(['GET', 'POST', 'GET', 'POST', 'GET'],
+                         [e['request']['method'] for e in entries])
+        self.assertEqual('/plans', entries[0]['request']['url'])
+        self.assertEqual(200, entries[0]['response']['status'])
+        self.assertEqual(404, entries[-1]['response']['status'])
+
+    def test_record_redacts_credential_headers(self):
+        with fake_server.FakeServer() as server:
+            cs = client.Client(server.endpoint, username='admin',
+                               password='s3cret',
+                               project_id=server.project_id,
+                               record_file=self.path)
+            cs.plans.list()
+        with open(self.path) as f:
+            content = f.read()
+        self.assertNotIn('s3cret', content)
+        headers = recording.load(self.path)[0]['request']['headers']
+        self.assertEqual(recording.REDACTED, headers['X-Auth-Key'])
+        self.assertEqual('admin', headers['X-Auth-User'])
+
+    def test_replay(self):
+        plan, checkpoint = self._record()
+        cs = client.Client('http://karbor.replay', token='token',
+                           project_id='project', replay_file=self.path,
+                           replay_speed=0)
+        self.assertEqual(plan.id, cs.plans.list()[0].id)
+        self.assertEqual('available', cs.checkpoints.get(
+            PROVIDER_ID, checkpoint.id).status)
+        # The last response of a request is served again.
+        self.assertEqual('available', cs.checkpoints.get(
+            PROVIDER_ID, checkpoint.id).status)
+        self.assertRaises(exc.NotFound, cs.plans.get, 'missing')
+        self.assertRaises(exc.ConnectionRefused, cs.plans.get, 'other')
+
+    @mock.patch('time.sleep')
+    def test_replay_speed(self, mock_sleep):
+        self._record()
+        entry = recording.load(self.path)[0]
+        player = recording.Player(self.path, speed=2)
+        player.respond('GET', '/plans')
+        mock_sleep.assert_called_once_with(entry['time'] / 1000.0 / 2)
+
+    @mock.patch('keystoneauth1.adapter.Adapter.request')
+    def test_session_client_replay(self, mock_request):
+        self._record()
+        cs = http.SessionClient(session=mock.Mock(), replay_file=self.path,
+                                replay_speed=0)
+        resp, body = cs.json_request('GET', '/plans')
+        self.assertEqual(10, len(body['plans']))
+        self.assertFalse(mock_request.called)
+
+    def test_shell_replay(self):
+        plan, _checkpoint = self._record()
+        stdout = six.StringIO()
+        self.useFixture(fixtures.MonkeyPatch('sys.stdout', stdout))
+        shell.KarborShell().main(['--replay-file', self.path,
+                                  '--replay-speed', '0', 'plan-list'])
+        self.assertIn(plan.id, stdout.getvalue())
@@ -0,0 +1,44 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_serialization import jsonutils
+import testtools
+
+from karborclient.common import http
+from karborclient.common import spool
+
+
+class ReadBodyTest(testtools.TestCase):
+
+    def test_small_body_in_memory(self):
+        self.assertEqual(b'{"a": 1}',
+                         spool.read_body(iter([b'{"a":', b' 1}']), 8))
+        self.assertEqual(b'{"a": 1}', spool.read_body([b'{"a": 1}'], 8))
+        self.assertEqual(b'', spool.read_body([], 8))
+
+    def test_large_body_spilled(self):
+        chunks = [b'{"a": [', b'1, 2, 3', b', 4]}']
+        body = spool.read_body(iter(chunks), 8)
+        self.assertIsInstance(body, spool.SpilledBody)
+        with body:
+            self.assertEqual(len(b''.join(chunks)), len(body))
+            with body.view() as view:
+                self.assertEqual(b''.join(chunks), view.tobytes())
+        # Closing twice is harmless.
+        body.close()
+
+    def test_codecs_decode_spilled_body(self):
+        data = jsonutils.dump_as_bytes({'name': u'r\xe9sum\xe9'})
+        for codec in (http.JSONCodec(), http.get_json_codec('auto')):
+            with spool.read_body([data], 4) as body, body.view() as view:
+                self.assertEqual({'name': u'r\xe9sum\xe9'},
+                                 codec.loads(view))
@@ -0,0 +1,205 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+import time
+
+import fixtures
+import mock
+from oslo_serialization import jsonutils
+import testtools
+
+from karborclient.common.apiclient import exceptions as exc
+from karborclient.common import http
+from karborclient.common import tracing
+from karborclient import fake_server
+from karborclient.tests.unit import fakes
+from karborclient.v1 import client
+from karborclient.v1 import plans
+
+
+class RecordingTracer(tracing.Tracer):
+
+    def __init__(self):
+        super(RecordingTracer, self).__init__()
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+class TracingTestCase(testtools.TestCase):
+
+    def setUp(self):
+        super(TracingTestCase, self).setUp()
+        self.tracer = RecordingTracer()
+        tracing.configure(self.tracer)
+        self.addCleanup(tracing.configure, None)
+
+
+class SpanTest(TracingTestCase):
+
+    def test_nested_spans(self):
+        with tracing.span('parent', a=1) as parent:
+            with tracing.span('child') as child:
+                child.set_attribute('b', 2)
+        self.assertEqual(['child', 'parent'],
+                         [s.name for s in self.tracer.spans])
+        self.assertEqual(parent.span_id, child.parent_id)
+        self.assertEqual(parent.trace_id, child.trace_id)
+        self.assertIsNone(parent.parent_id)
+        self.assertEqual({'b': 2}, child.attributes)
+        self.assertIsNone(self.tracer.current_span())
+
+    def test_span_error(self):
+        def fail():
+            with tracing.span('failing'):
+                raise exc.NotFound()
+        self.assertRaises(exc.NotFound, fail)
+        span = self.tracer.spans[0]
+        self.assertEqual('error', span.status)
+        self.assertEqual('NotFound', span.attributes['error.type'])
+
+    def test_disabled(self):
+        tracing.configure(None)
+        self.assertIs(tracing.NOOP_SPAN, tracing.span('nothing'))
+
+    def test_streamed_list_spans(self):
+        with fake_server.FakeServer(checkpoints=3) as server:
+            cs = client.Client(server.endpoint, token='token',
+                               project_id=server.project_id)
+            streamed = cs.checkpoints.list(fake_server.PROVIDER_ID,
+                                           stream=True)
+            self.assertEqual([], self.tracer.spans)
+            self.assertEqual(3, len(list(streamed)))
+
+        http_span, manager_span = self.tracer.spans
+        self.assertEqual('checkpoint.list', manager_span.name)
+        self.assertEqual('HTTP GET /providers/{id}/checkpoints',
+                         http_span.name)
+        self.assertEqual(manager_span.span_id, http_span.parent_id)
+
+
+@mock.patch('karborclient.common.http.requests.request')
+class HttpTracingTest(TracingTestCase):
+
+    def test_manager_and_http_spans(self, mock_request):
+        mock_request.return_value = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json',
+                        'x-openstack-request-id': 'req-1234'},
+            '{"plan": {"id": "1"}}')
+        client = http.HTTPClient('http://example.com:8082',
+                                 global_request_id='req-global')
+        plans.PlanManager(client).get('1')
+
+        http_span, manager_span = self.tracer.spans
+        self.assertEqual('plan.get', manager_span.name)
+        self.assertEqual('HTTP GET /plans/{id}', http_span.name)
+        self.assertEqual(manager_span.span_id, http_span.parent_id)
+        self.assertEqual(200, http_span.attributes['http.status_code'])
+        self.assertEqual('req-1234', http_span.attributes['karbor.request_id'])
+        self.assertEqual('req-global',
+                         http_span.attributes['karbor.global_request_id'])
+        self.assertEqual(
+            'req-global',
+            mock_request.call_args[1]['headers']['X-OpenStack-Request-ID'])
+
+    def test_hedged_request_spans(self, mock_request):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def request(method, url, **kwargs):
+            if url.startswith('http://karbor-1'):
+                release.wait(5)
+            return fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'},
+                '{"plan": {"id": "1"}}')
+
+        mock_request.side_effect = request
+        client = http.HTTPClient(['http://karbor-1:8082',
+                                  'http://karbor-2:8082'],
+                                 hedge={'initial_delay': 0.01})
+        plans.PlanManager(client).get('1')
+        release.set()
+        for _ in range(50):
+            if len(self.tracer.spans) == 3:
+                break
+            time.sleep(0.01)
+
+        manager_span = [s for s in self.tracer.spans
+                        if s.name == 'plan.get'][0]
+        http_spans = [s for s in self.tracer.spans
+                      if s.name == 'HTTP GET /plans/{id}']
+        self.assertEqual(2, len(http_spans))
+        for span in http_spans:
+            self.assertEqual(manager_span.span_id, span.parent_id)
+            self.assertEqual(manager_span.trace_id, span.trace_id)
+        self.assertIsNone(self.tracer.current_span())
+
+
+class JsonLinesTracerTest(testtools.TestCase):
+
+    def test_export(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'trace.jsonl')
+        tracer = tracing.JsonLinesTracer(path)
+        with tracer.start_span('parent'):
+            with tracer.start_span('child', {'k': 'v'}):
+                pass
+        with open(path) as f:
+            child, parent = [jsonutils.loads(line) for line in f]
+        self.assertEqual('child', child['name'])
+        self.assertEqual(parent['span_id'], child['parent_id'])
+        self.assertEqual({'k': 'v'}, child['attributes'])
+        self.assertGreaterEqual(child['duration'], 0)
+
+
+class SetupTest(testtools.TestCase):
+
+    def setUp(self):
+        super(SetupTest, self).setUp()
+        self.addCleanup(tracing.configure, None)
+
+    def test_setup_without_opentelemetry(self):
+        with mock.patch('karborclient.common.tracing.importutils.'
+                        'import_module', side_effect=ImportError):
+            tracer = tracing.setup()
+        self.assertIsInstance(tracer, tracing.JsonLinesTracer)
+        self.assertIs(tracer, tracing.get_tracer())
+
+    def test_setup_with_opentelemetry(self):
+        trace = mock.MagicMock()
+        with mock.patch('karborclient.common.tracing.importutils.'
+                        'import_module', return_value=trace):
+            tracer = tracing.setup()
+        self.assertIsInstance(tracer, tracing.OpenTelemetryTracer)
+        otel_tracer = trace.get_tracer.return_value
+        with tracing.span('op', a=1, b=None) as span:
+            span.set_attribute('c', 2)
+        otel_tracer.start_as_current_span.assert_called_once_with(
+            'op', attributes={'a': 1})
+        otel_span = otel_tracer.start_as_current_span.return_value
+        otel_span.__enter__.return_value.set_attribute.assert_called_once_with(
+            'c', 2)
+
+    def test_opentelemetry_context(self):
+        otel = mock.MagicMock()
+        with mock.patch('karborclient.common.tracing.importutils.'
+                        'import_module', return_value=otel):
+            tracing.setup()
+        context = tracing.current_context()
+        self.assertIs(otel.get_current.return_value, context)
+        with tracing.attach(context):
+            otel.attach.assert_called_once_with(context)
+        otel.detach.assert_called_once_with(otel.attach.return_value)
@@ -103,9 +103,15 @@ class FakeHTTPClient(base_client.HTTPClient):
     def get_providers_1234_checkpoints(self, **kwargs):
         return 200, {}, {"checkpoints": []}
 
+    def get_providers(self, **kwargs):
+        return 200, {}, {"providers": [{"id": "1234"}]}
+
     def get_plans(self, **kwargs):
         return 200, {}, {"plans": []}
 
+    def get_os_services(self, **kwargs):
+        return 200, {}, {"services": []}
+
     def get_operation_logs(self, **kwargs):
         return 200, {}, {"operation_logs": []}
 
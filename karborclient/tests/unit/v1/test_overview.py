@@ -0,0 +1,195 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import datetime
+import time
+
+import fixtures
+import mock
+import testtools
+
+from karborclient.common.apiclient import exceptions
+from karborclient.common import concurrency
+from karborclient import fake_server
+from karborclient.v1 import client
+from karborclient.v1 import overview
+
+NOW = datetime.datetime(2020, 1, 1, 1, 0, 0)
+
+
+class RunParallelTest(testtools.TestCase):
+
+    def test_results_and_errors(self):
+        def fail():
+            raise exceptions.NotFound()
+        results = concurrency.run_parallel({'a': lambda: 1, 'b': fail})
+        self.assertEqual(1, results['a'].result)
+        self.assertIsNone(results['a'].error)
+        self.assertIsInstance(results['b'].error, exceptions.NotFound)
+        self.assertEqual({}, concurrency.run_parallel({}))
+
+    def test_calls_run_at_once(self):
+        started_at = time.time()
+        concurrency.run_parallel(
+            {i: lambda: time.sleep(0.2) for i in range(5)})
+        self.assertLess(time.time() - started_at, 0.6)
+
+
+class OverviewTest(testtools.TestCase):
+
+    def setUp(self):
+        super(OverviewTest, self).setUp()
+        self.server = fake_server.FakeServer(checkpoints=20)
+        dataset = self.server.app.dataset
+        plans = dataset.collection('plans')
+        self.plans = sorted(plans.records.values(),
+                            key=lambda plan: plan['name'])
+        plans.get(self.plans[1]['id'])['status'] = 'started'
+        dataset.add_checkpoint(fake_server.PROVIDER_ID, self.plans[2], 100,
+                               status='error')
+        dataset.add_operation_log(100, plan_id=self.plans[3]['id'],
+                                  status='failed')
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.client = client.Client(self.server.endpoint, token='token',
+                                    project_id=self.server.project_id)
+
+    def test_overview(self):
+        result = overview.get_overview(self.client, now=NOW)
+        self.assertEqual({'suspended': 9, 'started': 1},
+                         result.counts['plans'])
+        self.assertEqual(2, result.counts['providers']['total'])
+        self.assertEqual({'available': 20, 'error': 1},
+                         result.counts['checkpoints'])
+        self.assertEqual({'success': 10, 'failed': 1},
+                         result.counts['operation_logs'])
+        self.assertEqual({'up': 2}, result.counts['services'])
+        self.assertEqual({}, result.errors)
+
+        self.assertEqual(['plan-2', 'plan-3'],
+                         [state.name for state in result.failing_plans])
+        self.assertEqual(10, len(result.plans))
+        state = result.plans[0]
+        self.assertEqual('error', state.checkpoint_status)
+        self.assertTrue(0 < state.checkpoint_age < 3600)
+
+        summary = result.summary()
+        self.assertEqual('11 (failed: 1, success: 10)',
+                         summary['operation_logs'])
+        self.assertEqual('plan-2\nplan-3', summary['failing_plans'])
+        self.assertIn('plan-2: 0:', summary['latest_checkpoints'])
+        self.assertNotIn('errors', summary)
+
+    def test_failed_queries_reported(self):
+        with mock.patch.object(self.client.services, 'list',
+                               side_effect=exceptions.Forbidden()):
+            result = overview.get_overview(self.client, now=NOW)
+        self.assertNotIn('services', result.counts)
+        self.assertIsInstance(result.errors['services'],
+                              exceptions.Forbidden)
+        self.assertIn('services: Forbidden', result.summary()['errors'])
+        self.assertEqual(10, len(result.plans))
+
+    def test_queries_run_concurrently(self):
+        self.server.app.latency = 0.2
+        started_at = time.time()
+        overview.get_overview(self.client, now=NOW)
+        # The checkpoints are listed once the providers are known, the
+        # other queries meanwhile.
+        self.assertLess(time.time() - started_at, 0.8)
+
+    def test_queries_bounded_by_deadline(self):
+        seen = _spy_deadlines(self, self.client, [
+            'plans.list', 'providers.list', 'checkpoints.list',
+            'restores.list', 'operation_logs.list', 'services.list'])
+        with self.client.deadline(30) as active:
+            result = overview.get_overview(self.client, now=NOW)
+        self.assertEqual({}, result.errors)
+        # The checkpoints are listed by a query nested in a worker.
+        self.assertEqual(2, len(seen['checkpoints.list']))
+        for name, deadlines in seen.items():
+            self.assertEqual(len(deadlines) * [active], deadlines, name)
+
+
+def _spy_deadlines(test, cs, methods):
+    """Record the deadline of the client when each method is called."""
+    seen = collections.defaultdict(list)
+
+    def spy(method, original):
+        def call(*args, **kwargs):
+            seen[method].append(cs.http_client.active_deadline)
+            return original(*args, **kwargs)
+        return call
+
+    for method in methods:
+        manager, name = method.split('.')
+        manager = getattr(cs, manager)
+        test.useFixture(fixtures.MockPatchObject(
+            manager, name, spy(method, getattr(manager, name))))
+    return seen
+
+
+class PlanDetailsTest(testtools.TestCase):
+
+    def test_plan_details(self):
+        with fake_server.FakeServer(checkpoints=30) as server:
+            dataset = server.app.dataset
+            plan = sorted(dataset.collection('plans').records.values(),
+                          key=lambda plan: plan['name'])[0]
+            trigger = dataset.add_trigger(100)
+            operation = dataset.add_scheduled_operation(trigger['id'],
+                                                        plan['id'], 100)
+            dataset.add_scheduled_operation('missing', plan['id'], 101)
+            cs = client.Client(server.endpoint, token='token',
+                               project_id=server.project_id)
+            details = overview.get_plan_details(
+                cs, lambda: cs.plans.get(plan['id']), checkpoint_limit=2)
+        self.assertEqual(plan['id'], details.plan.id)
+        self.assertEqual(fake_server.PROVIDER_ID, details.provider.id)
+        self.assertEqual(2, len(details.checkpoints))
+        for checkpoint in details.checkpoints:
+            self.assertEqual(plan['id'], checkpoint.protection_plan['id'])
+        self.assertGreater(details.checkpoints[0].created_at,
+                           details.checkpoints[1].created_at)
+        # The operation created with the dataset and the new ones.
+        self.assertEqual(3, len(details.scheduled_operations))
+        self.assertIn(operation['id'],
+                      [op.id for op in details.scheduled_operations])
+        self.assertIn(trigger['id'], [t.id for t in details.triggers])
+        summary = overview.related_summary(details)
+        self.assertIn('trigger missing', summary['scheduled_operations'])
+        self.assertEqual({}, details.errors)
+
+    def test_queries_bounded_by_deadline(self):
+        with fake_server.FakeServer() as server:
+            plan = list(server.app.dataset.collection('plans').records)[0]
+            cs = client.Client(server.endpoint, token='token',
+                               project_id=server.project_id)
+            seen = _spy_deadlines(self, cs, [
+                'plans.get', 'providers.get', 'checkpoints.list',
+                'scheduled_operations.list', 'triggers.list'])
+            with cs.deadline(30) as active:
+                details = overview.get_plan_details(
+                    cs, lambda: cs.plans.get(plan))
+        self.assertEqual({}, details.errors)
+        self.assertEqual(5, len(seen))
+        for name, deadlines in seen.items():
+            self.assertEqual([active], deadlines, name)
+
+    def test_plan_not_found(self):
+        with fake_server.FakeServer() as server:
+            cs = client.Client(server.endpoint, token='token',
+                               project_id=server.project_id)
+            self.assertRaises(
+                exceptions.NotFound, overview.get_plan_details, cs,
+                lambda: cs.plans.get('missing'))
@@ -12,8 +12,10 @@
 
 import mock
 
+from karborclient import fake_server
 from karborclient.tests.unit import base
 from karborclient.tests.unit.v1 import fakes
+from karborclient.v1 import client
 
 cs = fakes.FakeClient()
 mock_request_return = ({}, {'scheduled_operation': {'name': 'fake_name'}})
@@ -89,3 +91,22 @@ class ScheduledOperationsTest(base.TestCaseShell):
             'GET',
             '/scheduled_operations/1',
             headers={'X-Configuration-Session': 'fake_session_id'})
+
+    def test_list_with_triggers(self):
+        with fake_server.FakeServer(scheduled_operations=25, triggers=7,
+                                    max_limit=4) as server:
+            dataset = server.app.dataset
+            dangling = dataset.add_scheduled_operation('missing', None, 99)
+            client_ = client.Client(server.endpoint, token='token',
+                                    project_id=server.project_id)
+            rows = list(client_.scheduled_operations.list_with_triggers())
+            requests = list(server.app.requests)
+        self.assertEqual(26, len(rows))
+        for operation, trigger in rows:
+            if operation.id == dangling['id']:
+                self.assertIsNone(trigger)
+            else:
+                self.assertEqual(operation.trigger_id, trigger.id)
+        # Every page of both collections is requested once: 2 pages of
+        # triggers and 7 of operations, no trigger GET.
+        self.assertEqual(2 + 7, len(requests))
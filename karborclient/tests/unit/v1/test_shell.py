@@ -12,7 +12,10 @@
 
 import fixtures
 import mock
+from oslo_serialization import jsonutils
+import six
 
+from karborclient.common.apiclient import exceptions
 from karborclient import shell
 from karborclient.tests.unit import base
 from karborclient.tests.unit.v1 import fakes
@@ -88,6 +91,17 @@ class ShellTest(base.TestCaseShell):
                            '/providers/1234/'
                            'checkpoints?all_tenants=1')
 
+    def test_status(self):
+        self.run_command('status')
+        for url in ('/plans', '/providers', '/providers/1234/checkpoints',
+                    '/restores', '/operation_logs', '/os-services'):
+            self.shell.cs.assert_called_anytime('GET', url)
+
+    def test_scheduledoperation_list_with_triggers(self):
+        self.run_command('scheduledoperation-list --with-triggers')
+        self.shell.cs.assert_called_anytime('GET', '/triggers')
+        self.assert_called('GET', '/scheduled_operations')
+
     def test_plan_list_with_all_tenants(self):
         self.run_command('plan-list --all-tenants 1')
         self.assert_called('GET', '/plans?all_tenants=1')
@@ -135,3 +149,68 @@ class ShellTest(base.TestCaseShell):
     def test_operationlog_list_with_all(self):
         self.run_command('operationlog-list --all')
         self.assert_called('GET', '/operation_logs?all_tenants=1')
+
+    @mock.patch('karborclient.common.utils.print_api_stats')
+    @mock.patch('karborclient.common.utils.print_timings')
+    def test_plan_list_with_timings(self, mock_timings, mock_stats):
+        self.run_command('--timings --api-stats plan-list')
+        timings = self.shell.cs.http_client.get_timings()
+        mock_timings.assert_called_once_with(timings)
+        mock_stats.assert_called_once_with('plan-list', timings)
+
+    @mock.patch('karborclient.common.utils.print_api_stats')
+    @mock.patch('karborclient.common.utils.print_timings')
+    def test_plan_list_without_timings(self, mock_timings, mock_stats):
+        self.run_command('plan-list')
+        self.assertFalse(mock_timings.called)
+        self.assertFalse(mock_stats.called)
+
+    @mock.patch('karborclient.common.profiling.Profiler')
+    def test_plan_list_with_profile(self, mock_profiler):
+        self.run_command('--profile /tmp/karbor.prof --profile-memory '
+                         'plan-list')
+        mock_profiler.assert_called_once_with('/tmp/karbor.prof',
+                                              memory=True)
+        self.assertTrue(mock_profiler.return_value.__enter__.called)
+        self.assertTrue(mock_profiler.return_value.__exit__.called)
+        self.assert_called('GET', '/plans')
+
+    def _run_batch(self, content, *options):
+        stdout = six.StringIO()
+        self.useFixture(fixtures.MonkeyPatch('sys.stdout', stdout))
+        self.useFixture(fixtures.MonkeyPatch('sys.stdin',
+                                             six.StringIO(content)))
+        self.run_command(['batch', '-'] + list(options))
+        return [jsonutils.loads(line)
+                for line in stdout.getvalue().splitlines()]
+
+    def test_batch(self):
+        results = self._run_batch('# plans\n'
+                                  'plan-list\n'
+                                  '\n'
+                                  'karbor plan-list --all-tenants 1\n')
+        self.assertEqual([2, 4], [r['line'] for r in results])
+        self.assertEqual(['ok', 'ok'], [r['status'] for r in results])
+        self.assertIn('| Id', results[0]['output'])
+        self.assert_called('GET', '/plans?all_tenants=1')
+
+    def test_batch_parallel(self):
+        results = self._run_batch('plan-list\n' * 8, '--parallel', '4')
+        self.assertEqual(list(range(1, 9)), [r['line'] for r in results])
+        self.assertEqual({'ok'}, set(r['status'] for r in results))
+
+    def test_batch_errors(self):
+        stdout = six.StringIO()
+        self.useFixture(fixtures.MonkeyPatch('sys.stdout', stdout))
+        self.useFixture(fixtures.MonkeyPatch(
+            'sys.stdin', six.StringIO('plan-show\nhelp\nplan-list\n')))
+        ex = self.assertRaises(exceptions.CommandError, self.run_command,
+                               ['batch', '-'])
+        self.assertEqual('2 of 3 commands failed', six.text_type(ex))
+        results = [jsonutils.loads(line)
+                   for line in stdout.getvalue().splitlines()]
+        self.assertEqual(['error', 'error', 'ok'],
+                         [r['status'] for r in results])
+        self.assertIn('required', results[0]['error'])
+        self.assertEqual('help can not be used in a batch',
+                         results[1]['error'])
@@ -35,6 +35,8 @@ class Checkpoint(base.Resource):
 
 class CheckpointManager(base.ManagerWithFind):
     resource_class = Checkpoint
+    shared_fields = ('project_id', 'status', 'protection_plan',
+                     'extra_info')
 
     def create(self, provider_id, plan_id, checkpoint_extra_info=None):
         body = {'checkpoint': {'plan_id': plan_id,
@@ -69,7 +71,8 @@ class CheckpointManager(base.ManagerWithFind):
         return self._get(url, response_key="checkpoint", headers=headers)
 
     def list(self, provider_id=None, search_opts=None, marker=None,
-             limit=None, sort_key=None, sort_dir=None, sort=None):
+             limit=None, sort_key=None, sort_dir=None, sort=None,
+             stream=False):
         """Lists all checkpoints.
 
         :param provider_id:
@@ -81,6 +84,8 @@ class CheckpointManager(base.ManagerWithFind):
         :param sort_dir: Sort direction, should be 'desc' or 'asc'; deprecated
                          in kilo
         :param sort: Sort information
+        :param stream: Return a generator yielding the checkpoints as the
+                       response is received, instead of a list.
         :rtype: list of :class:`checkpoint`
         """
 
@@ -89,7 +94,7 @@ class CheckpointManager(base.ManagerWithFind):
             search_opts=search_opts, marker=marker,
             limit=limit, sort_key=sort_key,
             sort_dir=sort_dir, sort=sort)
-        return self._list(url, 'checkpoints')
+        return self._list(url, 'checkpoints', stream=stream)
 
     def _build_checkpoints_list_url(self, provider_id,
                                     search_opts=None, marker=None, limit=None,
@@ -54,3 +54,14 @@ class Client(object):
         self.services = services.ServiceManager(self.http_client)
         self.quotas = quotas.QuotaManager(self.http_client)
         self.quota_classes = quota_classes.QuotaClassManager(self.http_client)
+
+    def deadline(self, seconds):
+        """Bound the requests sent within the block to ``seconds`` in total.
+
+        Each request gets the time left as its timeout, and none is sent
+        once the deadline expired::
+
+            with client.deadline(60):
+                client.plans.create(name, provider_id, resources, {})
+        """
+        return self.http_client.deadline(seconds)
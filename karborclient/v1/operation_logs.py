@@ -20,6 +20,9 @@ class OperationLog(base.Resource):
 
 class OperationLogManager(base.ManagerWithFind):
     resource_class = OperationLog
+    shared_fields = ('project_id', 'operation_type', 'status',
+                     'provider_id', 'plan_id', 'scheduled_operation_id',
+                     'error_info', 'extra_info')
 
     def get(self, operation_log_id, session_id=None):
         if session_id:
@@ -31,9 +34,11 @@ class OperationLogManager(base.ManagerWithFind):
         return self._get(url, response_key="operation_log", headers=headers)
 
     def list(self, detailed=False, search_opts=None, marker=None, limit=None,
-             sort_key=None, sort_dir=None, sort=None):
+             sort_key=None, sort_dir=None, sort=None, stream=False):
         """Lists all operation_logs.
 
+        :param stream: Return a generator yielding the operation logs as the
+                       response is received, instead of a list.
         """
         resource_type = "operation_logs"
         url = self._build_list_url(
@@ -41,4 +46,4 @@ class OperationLogManager(base.ManagerWithFind):
             search_opts=search_opts, marker=marker,
             limit=limit, sort_key=sort_key,
             sort_dir=sort_dir, sort=sort)
-        return self._list(url, 'operation_logs')
+        return self._list(url, 'operation_logs', stream=stream)
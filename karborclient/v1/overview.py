@@ -0,0 +1,288 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Overviews of the protection state of a project and of a plan.
+
+The queries of an overview run at once through the same client; queries
+which need the result of another one, such as the checkpoints of the
+providers, start as soon as it is known.
+"""
+
+import collections
+import datetime
+import functools
+
+from oslo_utils import timeutils
+
+from karborclient.common import concurrency
+
+PlanState = collections.namedtuple('PlanState', [
+    'id', 'name', 'status', 'provider_id', 'checkpoint_id',
+    'checkpoint_status', 'checkpoint_age', 'failing'])
+
+PlanDetails = collections.namedtuple('PlanDetails', [
+    'plan', 'provider', 'checkpoints', 'scheduled_operations', 'triggers',
+    'errors'])
+
+# Resources counted by status, with the attribute holding their status.
+COUNTED = collections.OrderedDict([
+    ('plans', 'status'),
+    ('checkpoints', 'status'),
+    ('restores', 'status'),
+    ('operation_logs', 'status'),
+    ('services', 'state'),
+])
+
+
+def is_failure(status):
+    """Tell whether a checkpoint or operation status is a failure."""
+    status = (status or '').lower()
+    return 'error' in status or 'fail' in status
+
+
+def _created_at(resource):
+    created_at = getattr(resource, 'created_at', None)
+    if not created_at:
+        return None
+    return timeutils.normalize_time(timeutils.parse_isotime(created_at))
+
+
+def _latest(resources):
+    """Return the most recently created resource, or None."""
+    dated = [(_created_at(resource), resource) for resource in resources]
+    dated = [item for item in dated if item[0] is not None]
+    if not dated:
+        return None
+    return max(dated, key=lambda item: item[0])[1]
+
+
+def _list_checkpoints(client):
+    providers = client.providers.list()
+    results = concurrency.run_parallel(
+        {provider.id: functools.partial(client.checkpoints.list, provider.id)
+         for provider in providers}, client)
+    return providers, results
+
+
+class Overview(object):
+    """Counts by status, and the state of every plan.
+
+    :ivar counts: dict mapping the resource names of ``COUNTED``, and
+                  ``providers``, to a :class:`collections.Counter` of their
+                  statuses; resources which could not be listed are left
+                  out.
+    :ivar plans: list of :class:`PlanState`, failing plans first.
+    :ivar errors: dict mapping the queries which failed to their error.
+    """
+
+    def __init__(self, results, now):
+        counts = {}
+        self.errors = collections.OrderedDict()
+        resources = {}
+        for name, result in results.items():
+            if result.error is not None:
+                self.errors[name] = result.error
+            else:
+                resources[name] = result.result
+
+        if 'providers' in resources:
+            providers, results = resources.pop('providers')
+            counts['providers'] = collections.Counter(
+                {'total': len(providers)})
+            checkpoints = []
+            for provider in providers:
+                result = results[provider.id]
+                if result.error is not None:
+                    self.errors['checkpoints of provider %s' % provider.id] = \
+                        result.error
+                else:
+                    checkpoints.extend(result.result)
+            resources['checkpoints'] = checkpoints
+
+        for name, attr in COUNTED.items():
+            if name in resources:
+                counts[name] = collections.Counter(
+                    getattr(resource, attr, None) or 'unknown'
+                    for resource in resources[name])
+        order = ['plans', 'providers'] + list(COUNTED)[1:]
+        self.counts = collections.OrderedDict(
+            (name, counts[name]) for name in order if name in counts)
+
+        self.plans = self._plan_states(resources, now)
+
+    @staticmethod
+    def _plan_states(resources, now):
+        by_plan = collections.defaultdict(list)
+        for checkpoint in resources.get('checkpoints', []):
+            plan = getattr(checkpoint, 'protection_plan', None) or {}
+            if plan.get('id'):
+                by_plan[plan['id']].append(checkpoint)
+        logs_by_plan = collections.defaultdict(list)
+        for log in resources.get('operation_logs', []):
+            if getattr(log, 'plan_id', None):
+                logs_by_plan[log.plan_id].append(log)
+
+        states = []
+        for plan in resources.get('plans', []):
+            checkpoint = _latest(by_plan.get(plan.id, []))
+            log = _latest(logs_by_plan.get(plan.id, []))
+            age = None
+            if checkpoint is not None:
+                age = timeutils.delta_seconds(_created_at(checkpoint), now)
+            states.append(PlanState(
+                id=plan.id,
+                name=getattr(plan, 'name', None) or plan.id,
+                status=getattr(plan, 'status', None),
+                provider_id=getattr(plan, 'provider_id', None),
+                checkpoint_id=checkpoint.id if checkpoint else None,
+                checkpoint_status=checkpoint.status if checkpoint else None,
+                checkpoint_age=age,
+                failing=bool(
+                    (checkpoint is not None and
+                     is_failure(checkpoint.status)) or
+                    (log is not None and is_failure(log.status)))))
+        states.sort(key=lambda state: (not state.failing, state.name))
+        return states
+
+    @property
+    def failing_plans(self):
+        return [state for state in self.plans if state.failing]
+
+    def summary(self):
+        """Return the overview as a dict of printable values."""
+        summary = collections.OrderedDict()
+        for name, counter in self.counts.items():
+            if name == 'providers':
+                summary[name] = str(counter['total'])
+                continue
+            statuses = ', '.join('%s: %d' % item
+                                 for item in sorted(counter.items()))
+            summary[name] = '%d (%s)' % (sum(counter.values()), statuses) \
+                if counter else '0'
+        summary['failing_plans'] = '\n'.join(
+            state.name for state in self.failing_plans)
+        latest = []
+        for state in self.plans:
+            if state.checkpoint_age is None:
+                latest.append('%s: none' % state.name)
+            else:
+                age = datetime.timedelta(seconds=int(state.checkpoint_age))
+                latest.append('%s: %s ago (%s)'
+                              % (state.name, age, state.checkpoint_status))
+        summary['latest_checkpoints'] = '\n'.join(latest)
+        if self.errors:
+            summary['errors'] = '\n'.join(
+                '%s: %s' % item for item in self.errors.items())
+        return summary
+
+
+def get_overview(client, now=None):
+    """Return the :class:`Overview` of the project of a client.
+
+    :param now: time to compute the checkpoint ages from, UTC now by
+                default.
+    """
+    calls = {
+        'plans': client.plans.list,
+        'providers': functools.partial(_list_checkpoints, client),
+        'restores': client.restores.list,
+        'operation_logs': client.operation_logs.list,
+        'services': client.services.list,
+    }
+    results = concurrency.run_parallel(calls, client)
+    return Overview(results, now or timeutils.utcnow())
+
+
+def _plan_followups(client, get_plan, checkpoint_limit):
+    plan = get_plan()
+    calls = {'provider': functools.partial(client.providers.get,
+                                           plan.provider_id)}
+    if checkpoint_limit:
+        calls['checkpoints'] = functools.partial(
+            client.checkpoints.list, plan.provider_id,
+            search_opts={'plan_id': plan.id}, limit=checkpoint_limit,
+            sort='created_at:desc')
+    return plan, concurrency.run_parallel(calls, client)
+
+
+def get_plan_details(client, get_plan, checkpoint_limit=5):
+    """Return the :class:`PlanDetails` of a plan.
+
+    The plan is fetched along with the scheduled operations and triggers,
+    then its provider and latest checkpoints, which need the ID of its
+    provider.
+
+    :param get_plan: function without arguments returning the plan.
+    :param checkpoint_limit: number of checkpoints returned, the latest
+                             ones.
+    :raises: the error of ``get_plan``; the errors of the other queries
+             are returned in ``errors``.
+    """
+    results = concurrency.run_parallel({
+        'plan': functools.partial(_plan_followups, client, get_plan,
+                                  checkpoint_limit),
+        'scheduled_operations': client.scheduled_operations.list,
+        'triggers': client.triggers.list,
+    }, client)
+    plan_result = results.pop('plan')
+    if plan_result.error is not None:
+        raise plan_result.error
+    plan, followups = plan_result.result
+    results.update(followups)
+
+    errors = collections.OrderedDict(
+        (name, result.error) for name, result in sorted(results.items())
+        if result.error is not None)
+
+    def value(name, default=None):
+        result = results.get(name)
+        if result is None or result.error is not None:
+            return default
+        return result.result
+
+    operations = [
+        operation for operation in value('scheduled_operations', [])
+        if (getattr(operation, 'operation_definition', None) or
+            {}).get('plan_id') == plan.id]
+    trigger_ids = set(operation.trigger_id for operation in operations)
+    triggers = [trigger for trigger in value('triggers', [])
+                if trigger.id in trigger_ids]
+    return PlanDetails(plan=plan, provider=value('provider'),
+                       checkpoints=value('checkpoints', []),
+                       scheduled_operations=operations, triggers=triggers,
+                       errors=errors)
+
+
+def related_summary(details):
+    """Return the related objects of :class:`PlanDetails` to print."""
+    summary = collections.OrderedDict()
+    provider = details.provider
+    summary['provider'] = '%s (%s)' % (provider.name, provider.id) \
+        if provider is not None else ''
+    summary['latest_checkpoints'] = '\n'.join(
+        '%s %s %s' % (checkpoint.id, checkpoint.status,
+                      getattr(checkpoint, 'created_at', ''))
+        for checkpoint in details.checkpoints)
+    triggers = {trigger.id: trigger for trigger in details.triggers}
+    lines = []
+    for operation in details.scheduled_operations:
+        trigger = triggers.get(operation.trigger_id)
+        lines.append('%s (%s), trigger %s' % (
+            operation.name, operation.id,
+            '%s (%s)' % (trigger.name, trigger.type) if trigger
+            else operation.trigger_id))
+    summary['scheduled_operations'] = '\n'.join(lines)
+    if details.errors:
+        summary['related_errors'] = '\n'.join(
+            '%s: %s' % item for item in details.errors.items())
+    return summary
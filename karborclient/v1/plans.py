@@ -20,6 +20,8 @@ class Plan(base.Resource):
 
 class PlanManager(base.ManagerWithFind):
     resource_class = Plan
+    shared_fields = ('project_id', 'provider_id', 'status',
+                     'parameters')
 
     def create(self, name, provider_id, resources, parameters,
                description=None):
@@ -20,6 +20,8 @@ class Restore(base.Resource):
 
 class RestoreManager(base.ManagerWithFind):
     resource_class = Restore
+    shared_fields = ('project_id', 'provider_id', 'checkpoint_id',
+                     'restore_target', 'status', 'parameters')
 
     def create(self, provider_id, checkpoint_id, restore_target, parameters,
                restore_auth):
@@ -11,6 +11,7 @@
 #    under the License.
 
 from karborclient.common import base
+from karborclient.v1 import triggers
 
 
 class ScheduledOperation(base.Resource):
@@ -20,6 +21,8 @@ class ScheduledOperation(base.Resource):
 
 class ScheduledOperationManager(base.ManagerWithFind):
     resource_class = ScheduledOperation
+    shared_fields = ('project_id', 'operation_type', 'trigger_id',
+                     'operation_definition')
 
     def create(self, name, operation_type, trigger_id, operation_definition):
         body = {'scheduled_operation': {'name': name,
@@ -57,3 +60,34 @@ class ScheduledOperationManager(base.ManagerWithFind):
             limit=limit, sort_key=sort_key,
             sort_dir=sort_dir, sort=sort)
         return self._list(url, 'operations')
+
+    def list_with_triggers(self, search_opts=None, marker=None, sort=None,
+                           page_size=None):
+        """Yield the scheduled operations joined with their trigger.
+
+        Every page of the triggers, then of the scheduled operations, is
+        requested once: the triggers are indexed by ID first, and the
+        operations are yielded page after page as they are received.
+
+        :param search_opts: Search options to filter out operations; the
+                            ``all_tenants`` and ``project_id`` options
+                            apply to the triggers as well.
+        :param marker: Begin with the operations that appear later in the
+                       list than that represented by this ID.
+        :param sort: Sort information of the operations.
+        :param page_size: Number of operations and triggers requested per
+                          page, the API default when None.
+        :returns: generator of ``(operation, trigger)``; ``trigger`` is None
+                  when the operation references a trigger which does not
+                  exist.
+        """
+        search_opts = search_opts or {}
+        trigger_opts = {key: search_opts.get(key)
+                        for key in ('all_tenants', 'project_id')}
+        index = triggers.TriggerManager(self.api).index(
+            search_opts=trigger_opts, page_size=page_size)
+        url = self._build_list_url(
+            'scheduled_operations', search_opts=search_opts, marker=marker,
+            limit=page_size, sort=sort)
+        for operation in self._list_pages(url, 'operations'):
+            yield operation, index.get(operation.trigger_id)
@@ -20,6 +20,7 @@ class Service(base.Resource):
 
 class ServiceManager(base.ManagerWithFind):
     resource_class = Service
+    shared_fields = ('binary', 'host', 'status', 'state', 'zone')
 
     def enable(self, service_id):
         """Enable the service specified by the service ID
@@ -11,6 +11,8 @@
 #    under the License.
 
 import argparse
+import functools
+import itertools
 import os
 
 from datetime import datetime
@@ -19,8 +21,10 @@ from oslo_utils import uuidutils
 
 from karborclient.common.apiclient import exceptions
 from karborclient.common import base
+from karborclient.common import concurrency
 from karborclient.common import utils
 from karborclient import utils as arg_utils
+from karborclient.v1 import overview
 
 
 @utils.arg('--all-tenants',
@@ -152,11 +156,30 @@ def do_plan_create(cs, args):
 @utils.arg('plan',
            metavar='<plan>',
            help='ID of plan.')
+@utils.arg('--with-related',
+           action='store_true',
+           default=False,
+           help='Also show the provider, the latest checkpoints and the '
+                'scheduled operations of the plan, fetched concurrently.')
+@utils.arg('--checkpoint-limit',
+           metavar='<limit>',
+           type=int,
+           default=5,
+           help='Number of checkpoints shown with --with-related. '
+                'Default=5.')
 def do_plan_show(cs, args):
     """Shows plan details."""
-    plan = cs.plans.get(args.plan)
     dict_format_list = {"resources", "parameters"}
-    utils.print_dict(plan.to_dict(), dict_format_list=dict_format_list)
+    if not args.with_related:
+        plan = cs.plans.get(args.plan)
+        utils.print_dict(plan.to_dict(), dict_format_list=dict_format_list)
+        return
+    details = overview.get_plan_details(
+        cs, functools.partial(cs.plans.get, args.plan),
+        args.checkpoint_limit)
+    plan_dict = details.plan.to_dict()
+    plan_dict.update(overview.related_summary(details))
+    utils.print_dict(plan_dict, dict_format_list=dict_format_list)
 
 
 @utils.arg('plan',
@@ -165,15 +188,20 @@ def do_plan_show(cs, args):
            help='ID of plan.')
 def do_plan_delete(cs, args):
     """Deletes plan."""
+    def delete(plan_id):
+        plan = utils.find_resource(cs.plans, plan_id)
+        cs.plans.delete(plan.id)
+
     failure_count = 0
-    for plan_id in args.plan:
-        try:
-            plan = utils.find_resource(cs.plans, plan_id)
-            cs.plans.delete(plan.id)
-        except exceptions.NotFound:
+    for result in concurrency.run_bulk(delete, args.plan,
+                                       concurrency.client_controller(cs),
+                                       cs):
+        if isinstance(result.error, exceptions.NotFound):
             failure_count += 1
             print("Failed to delete '{0}'; plan not found".
-                  format(plan_id))
+                  format(result.item))
+        elif result.error is not None:
+            raise result.error
     if failure_count == len(args.plan):
         raise exceptions.CommandError("Unable to find and delete any of the "
                                       "specified plan.")
@@ -835,16 +863,20 @@ def do_checkpoint_show(cs, args):
            help='ID of checkpoint.')
 def do_checkpoint_delete(cs, args):
     """Deletes checkpoints."""
+    def delete(checkpoint_id):
+        checkpoint = cs.checkpoints.get(args.provider_id, checkpoint_id)
+        cs.checkpoints.delete(args.provider_id, checkpoint.id)
+
     failure_count = 0
-    for checkpoint_id in args.checkpoint:
-        try:
-            checkpoint = cs.checkpoints.get(args.provider_id,
-                                            checkpoint_id)
-            cs.checkpoints.delete(args.provider_id, checkpoint.id)
-        except exceptions.NotFound:
+    for result in concurrency.run_bulk(delete, args.checkpoint,
+                                       concurrency.client_controller(cs),
+                                       cs):
+        if isinstance(result.error, exceptions.NotFound):
             failure_count += 1
             print("Failed to delete '{0}'; checkpoint not found".
-                  format(checkpoint_id))
+                  format(result.item))
+        elif result.error is not None:
+            raise result.error
     if failure_count == len(args.checkpoint):
         raise exceptions.CommandError("Unable to find and delete any of the "
                                       "specified checkpoint.")
@@ -866,24 +898,28 @@ def do_checkpoint_delete(cs, args):
                 'of "error" state(the default).')
 def do_checkpoint_reset_state(cs, args):
     """Reset state of a checkpoint."""
-    failure_count = 0
+    def reset_state(checkpoint_id):
+        cs.checkpoints.reset_state(args.provider_id, checkpoint_id,
+                                   args.state)
 
-    for checkpoint_id in args.checkpoint:
-        try:
-            cs.checkpoints.reset_state(args.provider_id, checkpoint_id,
-                                       args.state)
-        except exceptions.NotFound:
+    failure_count = 0
+    for result in concurrency.run_bulk(reset_state, args.checkpoint,
+                                       concurrency.client_controller(cs),
+                                       cs):
+        if isinstance(result.error, exceptions.NotFound):
             failure_count += 1
             print("Failed to reset state of '{0}'; checkpoint not found".
-                  format(checkpoint_id))
-        except exceptions.Forbidden:
+                  format(result.item))
+        elif isinstance(result.error, exceptions.Forbidden):
             failure_count += 1
             print("Failed to reset state of '{0}'; not allowed".
-                  format(checkpoint_id))
-        except exceptions.BadRequest:
+                  format(result.item))
+        elif isinstance(result.error, exceptions.BadRequest):
             failure_count += 1
             print("Failed to reset state of '{0}'; invalid input or "
-                  "current checkpoint state".format(checkpoint_id))
+                  "current checkpoint state".format(result.item))
+        elif result.error is not None:
+            raise result.error
     if failure_count == len(args.checkpoint):
         raise exceptions.CommandError("Unable to find or reset any of the "
                                       "specified checkpoint's state.")
@@ -1026,15 +1062,20 @@ def do_trigger_show(cs, args):
            help='ID of trigger.')
 def do_trigger_delete(cs, args):
     """Deletes trigger."""
+    def delete(trigger_id):
+        trigger = utils.find_resource(cs.triggers, trigger_id)
+        cs.triggers.delete(trigger.id)
+
     failure_count = 0
-    for trigger_id in args.trigger:
-        try:
-            trigger = utils.find_resource(cs.triggers, trigger_id)
-            cs.triggers.delete(trigger.id)
-        except exceptions.NotFound:
+    for result in concurrency.run_bulk(delete, args.trigger,
+                                       concurrency.client_controller(cs),
+                                       cs):
+        if isinstance(result.error, exceptions.NotFound):
             failure_count += 1
             print("Failed to delete '{0}'; trigger not found".
-                  format(trigger_id))
+                  format(result.item))
+        elif result.error is not None:
+            raise result.error
     if failure_count == len(args.trigger):
         raise exceptions.CommandError("Unable to find and delete any of the "
                                       "specified trigger.")
@@ -1095,6 +1136,13 @@ def do_trigger_delete(cs, args):
            nargs='?',
            metavar='<tenant>',
            help='Display information from single tenant (Admin only).')
+@utils.arg('--with-triggers',
+           action='store_true',
+           default=False,
+           help='Also show the name and type of the trigger of each '
+                'scheduled operation, listing every page of the triggers and '
+                'scheduled operations once. Operations whose trigger does '
+                'not exist are flagged.')
 def do_scheduledoperation_list(cs, args):
     """Lists all scheduledoperations."""
 
@@ -1114,19 +1162,42 @@ def do_scheduledoperation_list(cs, args):
             'The --sort_key and --sort_dir arguments are deprecated and are '
             'not supported with --sort.')
 
-    scheduledoperations = cs.scheduled_operations.list(
-        search_opts=search_opts, marker=args.marker, limit=args.limit,
-        sort_key=args.sort_key, sort_dir=args.sort_dir, sort=args.sort)
-
     key_list = ['Id', 'Name', 'OperationType', 'TriggerId',
                 'OperationDefinition']
+    formatters = {}
+    if args.with_triggers:
+        if args.sort_key or args.sort_dir:
+            raise exceptions.CommandError(
+                'The --sort_key and --sort_dir arguments are not supported '
+                'with --with-triggers; use --sort.')
+        rows = cs.scheduled_operations.list_with_triggers(
+            search_opts=search_opts, marker=args.marker, sort=args.sort)
+        if args.limit:
+            rows = itertools.islice(rows, int(args.limit))
+        scheduledoperations = []
+        triggers = {}
+        for operation, trigger in rows:
+            scheduledoperations.append(operation)
+            triggers[operation.id] = trigger
+        key_list += ['TriggerName', 'TriggerType']
+        formatters = {
+            'TriggerName': lambda o: triggers[o.id].name
+            if triggers[o.id] is not None
+            else '(missing %s)' % o.trigger_id,
+            'TriggerType': lambda o: triggers[o.id].type
+            if triggers[o.id] is not None else '-',
+        }
+    else:
+        scheduledoperations = cs.scheduled_operations.list(
+            search_opts=search_opts, marker=args.marker, limit=args.limit,
+            sort_key=args.sort_key, sort_dir=args.sort_dir, sort=args.sort)
 
     if args.sort_key or args.sort_dir or args.sort:
         sortby_index = None
     else:
         sortby_index = 0
     utils.print_list(scheduledoperations, key_list, exclude_unavailable=True,
-                     sortby_index=sortby_index)
+                     formatters=formatters, sortby_index=sortby_index)
 
 
 @utils.arg('name',
@@ -1172,16 +1243,21 @@ def do_scheduledoperation_show(cs, args):
            help='ID of scheduled operation.')
 def do_scheduledoperation_delete(cs, args):
     """Deletes a scheduled operation."""
+    def delete(scheduledoperation_id):
+        scheduledoperation = utils.find_resource(cs.scheduled_operations,
+                                                 scheduledoperation_id)
+        cs.scheduled_operations.delete(scheduledoperation.id)
+
     failure_count = 0
-    for scheduledoperation_id in args.scheduledoperation:
-        try:
-            scheduledoperation = utils.find_resource(cs.scheduled_operations,
-                                                     scheduledoperation_id)
-            cs.scheduled_operations.delete(scheduledoperation.id)
-        except exceptions.NotFound:
+    for result in concurrency.run_bulk(delete, args.scheduledoperation,
+                                       concurrency.client_controller(cs),
+                                       cs):
+        if isinstance(result.error, exceptions.NotFound):
             failure_count += 1
             print("Failed to delete '{0}'; scheduledoperation not found".
-                  format(scheduledoperation_id))
+                  format(result.item))
+        elif result.error is not None:
+            raise result.error
     if failure_count == len(args.scheduledoperation):
         raise exceptions.CommandError("Unable to find and delete any of the "
                                       "specified scheduled operation.")
@@ -1409,3 +1485,9 @@ def do_quota_class_update(cs, args):
     }
     result = cs.quota_classes.update(class_name, data)
     _quota_set_pretty_show(result)
+
+
+def do_status(cs, args):
+    """Shows an overview of the protection state of the project."""
+    result = overview.get_overview(cs)
+    utils.print_dict(result.summary(), property='Resource')
@@ -21,6 +21,7 @@ class Trigger(base.Resource):
 
 class TriggerManager(base.ManagerWithFind):
     resource_class = Trigger
+    shared_fields = ('project_id', 'type')
 
     def create(self, name, type, properties):
         if properties.get('window', None):
@@ -75,3 +76,14 @@ class TriggerManager(base.ManagerWithFind):
             limit=limit, sort_key=sort_key,
             sort_dir=sort_dir, sort=sort)
         return self._list(url, 'triggers')
+
+    def index(self, search_opts=None, page_size=None):
+        """Return every trigger, indexed by ID.
+
+        :param page_size: number of triggers requested per page, the API
+                          default when None.
+        """
+        url = self._build_list_url('triggers', search_opts=search_opts,
+                                   limit=page_size)
+        return {trigger.id: trigger
+                for trigger in self._list_pages(url, 'triggers')}
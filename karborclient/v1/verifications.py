@@ -20,6 +20,8 @@ class Verification(base.Resource):
 
 class VerificationManager(base.ManagerWithFind):
     resource_class = Verification
+    shared_fields = ('project_id', 'provider_id', 'checkpoint_id',
+                     'status', 'parameters')
 
     def create(self, provider_id, checkpoint_id, parameters):
         body = {